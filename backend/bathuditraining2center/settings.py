@@ -96,6 +96,23 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'modules'),  # Your modules folder
 ]
 
+# WSGI static layer (core.utils.static_files, wired up in wsgi.py): files under
+# these URL prefixes are indexed at startup and served before Django, with
+# gzip/brotli variants and immutable content-hashed URLs. When it is off,
+# static_url() returns plain paths for Django's own static serving.
+STATIC_LAYER_ENABLED = os.environ.get('STATIC_LAYER_ENABLED', 'True') == 'True'
+STATIC_LAYER_MOUNTS = [
+    (STATIC_URL, STATIC_ROOT),
+    ('/pdfs/', os.path.join(BASE_DIR, 'pdfs')),
+    ('/modules/', os.path.join(BASE_DIR, 'modules')),
+]
+# Digests and variants are precomputed by `manage.py compress_static`, which the
+# Procfile runs before gunicorn starts; workers load this manifest and only hash
+# files that are new or changed since
+STATIC_LAYER_MANIFEST = os.environ.get('STATIC_LAYER_MANIFEST', os.path.join(BASE_DIR, 'static-manifest.json'))
+# max-age for un-hashed URLs; hashed URLs are cached for a year
+STATIC_LAYER_MAX_AGE = int(os.environ.get('STATIC_LAYER_MAX_AGE', 60))
+
 # ========== MEDIA FILES (User Uploads) ==========
 # FIXED: Using Railway volume for persistent storage
 MEDIA_URL = '/media/'
@@ -103,6 +120,26 @@ MEDIA_URL = '/media/'
 # MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_ROOT = '/app/media'  # Matches Railway volume mount path
 
+# Media responses (core.utils.file_serving). Set MEDIA_OFFLOAD to 'x-accel-redirect'
+# (nginx, internal location at MEDIA_ACCEL_REDIRECT_PREFIX aliased to MEDIA_ROOT)
+# or 'x-sendfile' (Apache / lighttpd) to let the front proxy stream the bytes.
+MEDIA_OFFLOAD = os.environ.get('MEDIA_OFFLOAD', '')
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 3600))
+
+# Responsive image renditions (core.services.image_variants), written under MEDIA_ROOT/variants/.
+# Saves queue them as RenderJobs; run_render_worker renders them outside the web workers.
+IMAGE_VARIANT_WIDTHS = [int(w) for w in os.environ.get('IMAGE_VARIANT_WIDTHS', '320,640,1024,1600').split(',')]
+IMAGE_VARIANT_QUALITY = int(os.environ.get('IMAGE_VARIANT_QUALITY', 80))
+
+# run_render_worker: seconds between polls of an empty queue, attempts per job
+# (retried after RENDER_RETRY_SECONDS, doubling), and how long a claimed job may
+# run before another worker takes it over
+RENDER_POLL_INTERVAL = float(os.environ.get('RENDER_POLL_INTERVAL', '5'))
+RENDER_MAX_ATTEMPTS = int(os.environ.get('RENDER_MAX_ATTEMPTS', '3'))
+RENDER_RETRY_SECONDS = float(os.environ.get('RENDER_RETRY_SECONDS', '60'))
+RENDER_CLAIM_LEASE_SECONDS = int(os.environ.get('RENDER_CLAIM_LEASE_SECONDS', '600'))
+
 # Create necessary directories
 os.makedirs(os.path.join(BASE_DIR, 'static'), exist_ok=True)
 os.makedirs(os.path.join(BASE_DIR, 'pdfs'), exist_ok=True)
@@ -126,6 +163,35 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Applications list API page size (?page_size= may ask for up to the maximum)
+APPLICATIONS_PAGE_SIZE = int(os.environ.get('APPLICATIONS_PAGE_SIZE', 50))
+APPLICATIONS_MAX_PAGE_SIZE = int(os.environ.get('APPLICATIONS_MAX_PAGE_SIZE', 200))
+
+# ========== CACHE SETTINGS ==========
+# Local memory by default, which is per gunicorn worker. Cached responses are
+# keyed by model versions kept in the database (core.utils.response_cache), so a
+# content edit in any process invalidates them everywhere either way; set
+# CACHE_DIR to share the cached responses themselves between the workers on a host.
+if os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'bathudi-default',
+        }
+    }
+
+# Cached responses of the public read endpoints (core.utils.response_cache).
+# Entries are invalidated by model versions, so this only bounds how long an
+# unused entry takes up cache space.
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 300))
+
 # ========== CORS SETTINGS ==========
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
@@ -176,13 +242,20 @@ SESSION_COOKIE_SAMESITE = 'Lax'
 
 # ========== FILE UPLOAD SETTINGS ==========
 FILE_UPLOAD_PERMISSIONS = 0o644
-FILE_UPLOAD_MAX_MEMORY_SIZE = 104857600  # 100MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 104857600 # 100MB
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB - larger uploads spill to temp files
+DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB of non-file form data
+# Application documents are streamed to storage in chunks of this size (core.utils.uploads)
+DOCUMENT_UPLOAD_CHUNK_SIZE = int(os.environ.get('DOCUMENT_UPLOAD_CHUNK_SIZE', 65536))  # 64KB
 
 # ========== TWILIO WHATSAPP SETTINGS ==========
 TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID', '')
 TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN', '')
 TWILIO_WHATSAPP_NUMBER = os.environ.get('TWILIO_WHATSAPP_NUMBER', 'whatsapp:+14155238886')
+# Point the Twilio client at another server (e.g. a local fake Twilio); empty means api.twilio.com
+TWILIO_API_BASE_URL = os.environ.get('TWILIO_API_BASE_URL', '')
+# Public URL of the status webhook (…/api/webhooks/twilio/status/); set it to get delivery reports
+TWILIO_STATUS_CALLBACK_URL = os.environ.get('TWILIO_STATUS_CALLBACK_URL', '')
+TWILIO_VALIDATE_WEBHOOKS = os.environ.get('TWILIO_VALIDATE_WEBHOOKS', 'True') == 'True'
 
 # ========== WHATSAPP CLOUD API SETTINGS ==========
 WHATSAPP_CLOUD_API_TOKEN = os.environ.get('WHATSAPP_CLOUD_API_TOKEN', '')
@@ -201,6 +274,16 @@ BATHUDI_EMAIL = os.environ.get('BATHUDI_EMAIL', 'info@bathudi.co.za')
 BATHUDI_ADDRESS = os.environ.get('BATHUDI_ADDRESS', '123 Training Street, Johannesburg, South Africa')
 BATHUDI_WEBSITE = os.environ.get('BATHUDI_WEBSITE', 'https://bathudi.co.za')
 
+# ========== EMAIL SETTINGS ==========
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', '587'))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', '20'))
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', BATHUDI_EMAIL)
+
 # ========== WHATSAPP NOTIFICATION SETTINGS ==========
 WHATSAPP_PROVIDER = os.environ.get('WHATSAPP_PROVIDER', 'twilio')
 WHATSAPP_NOTIFICATIONS_ENABLED = os.environ.get('WHATSAPP_NOTIFICATIONS_ENABLED', 'True') == 'True'
@@ -209,7 +292,47 @@ WHATSAPP_SEND_REJECTION = os.environ.get('WHATSAPP_SEND_REJECTION', 'True') == '
 WHATSAPP_SANDBOX_MODE = os.environ.get('WHATSAPP_SANDBOX_MODE', 'True') == 'True'
 WHATSAPP_TEST_NUMBERS = os.environ.get('WHATSAPP_TEST_NUMBERS', '+263773074487,+27681234567').split(',')
 
+# ========== WHATSAPP OUTBOX WORKER ==========
+# Status changes queue messages in the outbox; `manage.py run_whatsapp_worker` sends them
+WHATSAPP_WORKER_CONCURRENCY = int(os.environ.get('WHATSAPP_WORKER_CONCURRENCY', '8'))
+WHATSAPP_OUTBOX_BATCH_SIZE = int(os.environ.get('WHATSAPP_OUTBOX_BATCH_SIZE', '50'))
+WHATSAPP_POLL_INTERVAL = float(os.environ.get('WHATSAPP_POLL_INTERVAL', '2'))
+WHATSAPP_MAX_ATTEMPTS = int(os.environ.get('WHATSAPP_MAX_ATTEMPTS', '6'))
+WHATSAPP_RETRY_BASE_SECONDS = float(os.environ.get('WHATSAPP_RETRY_BASE_SECONDS', '30'))
+WHATSAPP_RETRY_MAX_SECONDS = float(os.environ.get('WHATSAPP_RETRY_MAX_SECONDS', '3600'))
+# A message stuck in 'sending' this long (worker crashed mid-send) is picked up again
+WHATSAPP_CLAIM_LEASE_SECONDS = int(os.environ.get('WHATSAPP_CLAIM_LEASE_SECONDS', '300'))
+# Status callbacks are buffered per worker and upserted in batches of up to
+# WHATSAPP_STATUS_FLUSH_SIZE SIDs, and flushed when the worker exits (gunicorn.conf.py).
+# A worker killed outright loses up to WHATSAPP_STATUS_FLUSH_INTERVAL seconds of callbacks
+# that Twilio won't resend; False writes each one before the webhook answers instead
+WHATSAPP_STATUS_BUFFERED = os.environ.get('WHATSAPP_STATUS_BUFFERED', 'True') == 'True'
+WHATSAPP_STATUS_FLUSH_SIZE = int(os.environ.get('WHATSAPP_STATUS_FLUSH_SIZE', '500'))
+WHATSAPP_STATUS_FLUSH_INTERVAL = float(os.environ.get('WHATSAPP_STATUS_FLUSH_INTERVAL', '1'))
+WHATSAPP_STATUS_BUFFER_MAX = int(os.environ.get('WHATSAPP_STATUS_BUFFER_MAX', '20000'))
+
+# ========== OUTBOUND HTTP CLIENTS ==========
+# One keep-alive connection pool per provider, shared by all threads (core/services/http_clients.py)
+OUTBOUND_HTTP_POOL_SIZE = int(os.environ.get('OUTBOUND_HTTP_POOL_SIZE', '16'))
+OUTBOUND_HTTP_CONNECT_TIMEOUT = float(os.environ.get('OUTBOUND_HTTP_CONNECT_TIMEOUT', '5'))
+OUTBOUND_HTTP_READ_TIMEOUT = float(os.environ.get('OUTBOUND_HTTP_READ_TIMEOUT', '20'))
+
+# ========== BROADCASTS ==========
+# `manage.py run_broadcasts` sends queued broadcasts; the rates are per process and per channel
+BROADCAST_CONCURRENCY = int(os.environ.get('BROADCAST_CONCURRENCY', '8'))
+BROADCAST_BATCH_SIZE = int(os.environ.get('BROADCAST_BATCH_SIZE', '200'))
+BROADCAST_WHATSAPP_RATE = float(os.environ.get('BROADCAST_WHATSAPP_RATE', '10'))  # messages per second
+BROADCAST_EMAIL_RATE = float(os.environ.get('BROADCAST_EMAIL_RATE', '5'))  # emails per second
+BROADCAST_MAX_ATTEMPTS = int(os.environ.get('BROADCAST_MAX_ATTEMPTS', '3'))
+BROADCAST_POLL_INTERVAL = float(os.environ.get('BROADCAST_POLL_INTERVAL', '5'))
+# A 'sending' broadcast without progress for this long is taken over by another dispatcher
+BROADCAST_LEASE_SECONDS = int(os.environ.get('BROADCAST_LEASE_SECONDS', '300'))
+
 # ========== LOGGING CONFIGURATION ==========
+# Log files are written at runtime and kept out of git
+LOG_DIR = os.path.join(BASE_DIR, 'logs')
+os.makedirs(LOG_DIR, exist_ok=True)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -230,7 +353,7 @@ LOGGING = {
         },
         'file': {
             'class': 'logging.FileHandler',
-            'filename': os.path.join(BASE_DIR, 'logs', 'whatsapp.log'),
+            'filename': os.path.join(LOG_DIR, 'whatsapp.log'),
             'formatter': 'verbose',
         },
     },
@@ -252,9 +375,6 @@ LOGGING = {
     },
 }
 
-# Create logs directory
-os.makedirs(os.path.join(BASE_DIR, 'logs'), exist_ok=True)
-
 # ========== REGISTRATION FEE ==========
 REGISTRATION_FEE_AMOUNT = os.environ.get('REGISTRATION_FEE_AMOUNT', '661.25')
 REGISTRATION_FEE_CURRENCY = os.environ.get('REGISTRATION_FEE_CURRENCY', 'ZAR')
@@ -268,6 +388,10 @@ COURSE_ID_MAPPING = {
 }
 
 # ========== APPLICATION STATUS MESSAGES ==========
+# Defaults for core.services.notification_templates; an active MessageTemplate
+# (admin) replaces them. Other workers see edits after NOTIFICATION_TEMPLATE_TTL seconds.
+NOTIFICATION_TEMPLATE_TTL = int(os.environ.get('NOTIFICATION_TEMPLATE_TTL', 300))
+
 WHATSAPP_APPROVAL_MESSAGE = """
 Good day this is an automated message from Bathudi Automotive Training Center 🇿🇦
 
@@ -296,8 +420,7 @@ Good day this is an automated message from Bathudi Automotive Training Center
 
 Thank you for your interest in our {course_name} programme.
 
-After careful review of your application, we regret to inform you that your application has been unsuccessful at this time.
-{reason_text}
+After careful review of your application, we regret to inform you that your application has been unsuccessful at this time.{reason_text}
 
 We encourage you to apply again in the future when you meet the minimum requirements.
 
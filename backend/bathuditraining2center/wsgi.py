@@ -32,4 +32,12 @@ try:
 except Exception as e:
     print(f"Error creating superuser: {e}")
 
-application = get_wsgi_application()
\ No newline at end of file
+application = get_wsgi_application()
+
+# Static, PDF and module files are served from an in-memory index before Django
+from django.conf import settings
+
+if settings.STATIC_LAYER_ENABLED:
+    from core.utils.static_files import StaticFilesMiddleware
+
+    application = StaticFilesMiddleware(application)
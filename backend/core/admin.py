@@ -1,12 +1,29 @@
-from django.contrib import admin
+import logging
+
+from django.contrib import admin, messages
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
 from django.utils.html import format_html
+from django.utils.http import content_disposition_header
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.safestring import mark_safe
 from .models import (
     Course, CourseRequirement, Application, Student, 
     TeamMember, GalleryImage, Newsletter, NewsPost,
-    DirectorMessage, Testimonial, Video
+    DirectorMessage, Testimonial, Video, WhatsAppMessage, Broadcast, MessageTemplate, RenderJob
 )
+from .services.delivery_status import with_delivery_status
+from .services.dossier import dossier_stream
+from .services.notification_templates import TEMPLATES, default_source
+from .services.render_jobs import queue_renders
+from .services.search import search_applications
+from .services.whatsapp_outbox import queue_status_messages
+from .services.stats import update_counted
+from .utils.response_cache import bump_model_version
+
+logger = logging.getLogger(__name__)
 
 # ========== CUSTOM FILTERS ==========
 class FeeVerifiedFilter(admin.SimpleListFilter):
@@ -100,12 +117,14 @@ class CourseAdmin(admin.ModelAdmin):
     application_count.short_description = 'Applications'
     
     def activate_courses(self, request, queryset):
-        updated = queryset.update(is_active=True)
+        updated = update_counted(queryset, is_active=True, updated_at=timezone.now())
+        bump_model_version(Course)
         self.message_user(request, f'{updated} courses activated.')
     activate_courses.short_description = "Activate selected courses"
     
     def deactivate_courses(self, request, queryset):
-        updated = queryset.update(is_active=False)
+        updated = update_counted(queryset, is_active=False, updated_at=timezone.now())
+        bump_model_version(Course)
         self.message_user(request, f'{updated} courses deactivated.')
     deactivate_courses.short_description = "Deactivate selected courses"
 
@@ -115,7 +134,7 @@ class ApplicationAdmin(admin.ModelAdmin):
     list_display = ['full_name', 'email', 'mobile', 'course', 'status_badge', 'fee_verified_badge', 
                    'documents_icons', 'applied_date_formatted', 'quick_actions']
     list_filter = ['status', FeeVerifiedFilter, DocumentsFilter, 'course', 'country', 'applied_date']
-    search_fields = ['name', 'surname', 'email', 'mobile', 'id_number', 'course__title']
+    search_fields = ['name', 'surname', 'email', 'mobile', 'id_number', 'course_title']
     list_per_page = 50
     readonly_fields = ['applied_date', 'documents_preview', 'view_documents_link']
     ordering = ['-applied_date']
@@ -145,6 +164,12 @@ class ApplicationAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_search_results(self, request, queryset, search_term):
+        """Use the application search index instead of icontains over search_fields"""
+        if not search_term.strip():
+            return queryset, False
+        return search_applications(queryset, search_term), False
+    
     def full_name(self, obj):
         return f"{obj.name} {obj.surname}"
     full_name.short_description = 'Name'
@@ -224,7 +249,8 @@ class ApplicationAdmin(admin.ModelAdmin):
         """Direct link to view all documents"""
         if any([obj.id_document, obj.matric_certificate, obj.proof_of_payment, 
                 obj.additional_doc_1, obj.additional_doc_2]):
-            return format_html('<a href="/admin/core/application/{}/documents/" style="padding: 8px 16px; background-color: #3B82F6; color: white; border-radius: 4px; text-decoration: none;">📁 View All Documents</a>', obj.id)
+            return format_html('<a href="/admin/core/application/{}/documents/" style="padding: 8px 16px; background-color: #3B82F6; color: white; border-radius: 4px; text-decoration: none;">📁 View All Documents</a> '
+                               '<a href="/admin/core/application/{}/dossier/" style="padding: 8px 16px; background-color: #10B981; color: white; border-radius: 4px; text-decoration: none;">📄 Download Dossier PDF</a>', obj.id, obj.id)
         return format_html('<span style="color: gray;">No documents to view</span>')
     view_documents_link.short_description = 'Document Preview'
     
@@ -241,12 +267,17 @@ class ApplicationAdmin(admin.ModelAdmin):
     
     # Admin Actions
     def mark_pending(self, request, queryset):
-        updated = queryset.update(status='pending')
+        updated = update_counted(queryset, status='pending')
         self.message_user(request, f'{updated} applications marked as pending.')
     mark_pending.short_description = "Mark as Pending"
     
     def mark_approved(self, request, queryset):
-        updated = queryset.update(status='approved')
+        changed = list(queryset.exclude(status='approved').select_related('course'))
+        with transaction.atomic():
+            updated = update_counted(queryset, status='approved')
+            for app in changed:
+                app.status = 'approved'
+            queue_status_messages(changed)
         
         # Create student records for approved applications
         for app in queryset.filter(status='approved'):
@@ -265,17 +296,22 @@ class ApplicationAdmin(admin.ModelAdmin):
     mark_approved.short_description = "Approve Applications"
     
     def mark_rejected(self, request, queryset):
-        updated = queryset.update(status='rejected')
+        changed = list(queryset.exclude(status='rejected').select_related('course'))
+        with transaction.atomic():
+            updated = update_counted(queryset, status='rejected')
+            for app in changed:
+                app.status = 'rejected'
+            queue_status_messages(changed)
         self.message_user(request, f'{updated} applications rejected.')
     mark_rejected.short_description = "Reject Applications"
     
     def verify_fee(self, request, queryset):
-        updated = queryset.update(fee_verified=True)
+        updated = update_counted(queryset, fee_verified=True)
         self.message_user(request, f'{updated} application fees verified.')
     verify_fee.short_description = "Verify Fee Payment"
     
     def unverify_fee(self, request, queryset):
-        updated = queryset.update(fee_verified=False)
+        updated = update_counted(queryset, fee_verified=False)
         self.message_user(request, f'{updated} application fees unverified.')
     unverify_fee.short_description = "Unverify Fee Payment"
     
@@ -286,6 +322,7 @@ class ApplicationAdmin(admin.ModelAdmin):
         urls = super().get_urls()
         custom_urls = [
             path('<int:application_id>/documents/', self.admin_site.admin_view(self.view_documents), name='core_application_documents'),
+            path('<int:application_id>/dossier/', self.admin_site.admin_view(self.download_dossier), name='core_application_dossier'),
             path('<int:application_id>/approve/', self.admin_site.admin_view(self.approve_application), name='core_application_approve'),
             path('<int:application_id>/reject/', self.admin_site.admin_view(self.reject_application), name='core_application_reject'),
             path('<int:application_id>/verify_fee/', self.admin_site.admin_view(self.verify_application_fee), name='core_application_verify_fee'),
@@ -306,25 +343,44 @@ class ApplicationAdmin(admin.ModelAdmin):
         }
         return render(request, 'admin/core/application/documents.html', context)
     
+    def download_dossier(self, request, application_id):
+        """Summary plus uploaded documents as one PDF, streamed while it is built"""
+        app = get_object_or_404(Application.objects.select_related('course'), id=application_id)
+        try:
+            chunks = dossier_stream(app)
+        except Exception as e:
+            # Nothing has been sent yet, so the admin gets a message instead of a broken download
+            logger.exception(f"Could not build the dossier for application {app.id}")
+            messages.error(request, f'Could not build the dossier for {app.name} {app.surname}: {e}')
+            return redirect('admin:core_application_change', app.id)
+        response = StreamingHttpResponse(chunks, content_type='application/pdf')
+        response['Content-Disposition'] = content_disposition_header(False, f'dossier-{app.id}-{app.surname}.pdf')
+        response['Cache-Control'] = 'private, no-store'
+        return response
+    
     def approve_application(self, request, application_id):
         from django.shortcuts import redirect, get_object_or_404
         from django.contrib import messages
         
         app = get_object_or_404(Application, id=application_id)
-        app.status = 'approved'
-        app.save()
-        
-        # Create student record
-        if not hasattr(app, 'student_record'):
-            Student.objects.create(
-                application=app,
-                name=app.name,
-                surname=app.surname,
-                email=app.email,
-                phone=app.mobile,
-                course=app.course,
-                address=app.address
-            )
+        notify = app.status != 'approved'
+        with transaction.atomic():
+            app.status = 'approved'
+            app.save()
+            
+            # Create student record
+            if not hasattr(app, 'student_record'):
+                Student.objects.create(
+                    application=app,
+                    name=app.name,
+                    surname=app.surname,
+                    email=app.email,
+                    phone=app.mobile,
+                    course=app.course,
+                    address=app.address
+                )
+            if notify:
+                queue_status_messages([app])
         
         messages.success(request, f'Application for {app.name} {app.surname} approved successfully.')
         return redirect('admin:core_application_changelist')
@@ -334,8 +390,12 @@ class ApplicationAdmin(admin.ModelAdmin):
         from django.contrib import messages
         
         app = get_object_or_404(Application, id=application_id)
-        app.status = 'rejected'
-        app.save()
+        notify = app.status != 'rejected'
+        with transaction.atomic():
+            app.status = 'rejected'
+            app.save()
+            if notify:
+                queue_status_messages([app])
         
         messages.success(request, f'Application for {app.name} {app.surname} rejected.')
         return redirect('admin:core_application_changelist')
@@ -357,12 +417,35 @@ class StudentAdmin(admin.ModelAdmin):
     list_display = ['full_name', 'student_id', 'course', 'status_badge', 'enrollment_date_formatted', 'view_application']
     list_filter = ['status', 'enrollment_date', 'course']
     search_fields = ['name', 'surname', 'email', 'student_id', 'phone']
+    list_select_related = ['course', 'application']
     readonly_fields = ['enrollment_date', 'student_id']
+    actions = ['generate_acceptance_letters', 'generate_certificates']
     
     def full_name(self, obj):
         return f"{obj.name} {obj.surname}"
     full_name.short_description = 'Name'
     
+    def _queue_documents(self, request, queryset, kind, label):
+        """Rendered by run_render_worker, one RenderJob per student, so the request returns at once"""
+        skipped = 0
+        if kind == 'certificate':
+            skipped = queryset.exclude(status='completed').count()
+            queryset = queryset.filter(status='completed')
+        with transaction.atomic():
+            queued = queue_renders(kind, queryset)
+        message = f'{queued} {label} queued; the render worker writes them to media storage.'
+        if skipped:
+            message += f' {skipped} students skipped (not completed).'
+        self.message_user(request, message)
+    
+    def generate_acceptance_letters(self, request, queryset):
+        self._queue_documents(request, queryset, 'acceptance_letter', 'acceptance letters')
+    generate_acceptance_letters.short_description = "Generate Acceptance Letters (PDF)"
+    
+    def generate_certificates(self, request, queryset):
+        self._queue_documents(request, queryset, 'certificate', 'completion certificates')
+    generate_certificates.short_description = "Generate Completion Certificates (PDF)"
+    
     def status_badge(self, obj):
         colors = {
             'enrolled': 'blue',
@@ -694,4 +777,133 @@ class VideoAdmin(admin.ModelAdmin):
     
     def created_date_formatted(self, obj):
         return obj.created_at.strftime('%d %b %Y')
-    created_date_formatted.short_description = 'Created'
\ No newline at end of file
+    created_date_formatted.short_description = 'Created'
+
+# ========== WHATSAPP OUTBOX ADMIN ==========
+@admin.register(WhatsAppMessage)
+class WhatsAppMessageAdmin(admin.ModelAdmin):
+    list_display = ['to_number', 'kind', 'application', 'status_badge', 'delivery', 'attempts', 'next_attempt_at', 'sent_at', 'twilio_sid']
+    list_filter = ['status', 'kind', 'created_at']
+    search_fields = ['to_number', 'twilio_sid', 'application__name', 'application__surname']
+    list_select_related = ['application']
+    readonly_fields = [field.name for field in WhatsAppMessage._meta.fields]
+    actions = ['retry_messages']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def get_queryset(self, request):
+        return with_delivery_status(super().get_queryset(request))
+    
+    def delivery(self, obj):
+        if not obj.delivery_status:
+            return '-'
+        if obj.delivery_error:
+            return f"{obj.delivery_status} ({obj.delivery_error})"
+        return obj.delivery_status
+    delivery.short_description = 'Delivery'
+    delivery.admin_order_field = 'delivery_status'
+    
+    def status_badge(self, obj):
+        colors = {
+            'pending': 'orange',
+            'sending': 'blue',
+            'sent': 'green',
+            'failed': 'red',
+        }
+        color = colors.get(obj.status, 'gray')
+        return format_html(
+            '<span style="background-color: {}; color: white; padding: 3px 8px; border-radius: 10px; font-size: 12px;">{}</span>',
+            color, obj.get_status_display().upper()
+        )
+    status_badge.short_description = 'Status'
+    
+    def retry_messages(self, request, queryset):
+        updated = queryset.filter(status='failed').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now(), last_error='', updated_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} failed messages queued for another try.')
+    retry_messages.short_description = "Retry Failed Messages"
+
+# ========== BROADCAST ADMIN ==========
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ['title', 'audience', 'course', 'channels', 'status_badge', 'recipient_count', 'sent_count', 'failed_count', 'created_at']
+    list_filter = ['status', 'audience', 'course']
+    search_fields = ['title', 'message']
+    readonly_fields = ['status', 'recipient_count', 'sent_count', 'failed_count', 'heartbeat_at', 'created_at', 'sent_at', 'finished_at']
+    actions = ['queue_broadcasts']
+    
+    fieldsets = (
+        ('Message', {
+            'fields': ('title', 'message', 'sender')
+        }),
+        ('Audience', {
+            'fields': ('audience', 'course', 'student_status', 'send_whatsapp', 'send_email')
+        }),
+        ('Progress', {
+            'fields': ('status', 'recipient_count', 'sent_count', 'failed_count', 'heartbeat_at', 'created_at', 'sent_at', 'finished_at')
+        }),
+    )
+    
+    def channels(self, obj):
+        return ', '.join(name for name, enabled in (('WhatsApp', obj.send_whatsapp), ('Email', obj.send_email)) if enabled)
+    channels.short_description = 'Channels'
+    
+    def status_badge(self, obj):
+        colors = {
+            'draft': 'gray',
+            'queued': 'orange',
+            'sending': 'blue',
+            'sent': 'green',
+            'cancelled': 'red',
+        }
+        color = colors.get(obj.status, 'gray')
+        return format_html(
+            '<span style="background-color: {}; color: white; padding: 3px 8px; border-radius: 10px; font-size: 12px;">{}</span>',
+            color, obj.get_status_display().upper()
+        )
+    status_badge.short_description = 'Status'
+    
+    def queue_broadcasts(self, request, queryset):
+        updated = queryset.filter(status='draft').update(status='queued')
+        self.message_user(request, f'{updated} broadcasts queued; run_broadcasts will send them.')
+    queue_broadcasts.short_description = "Send Broadcasts"
+
+# ========== RENDER JOB ADMIN ==========
+@admin.register(RenderJob)
+class RenderJobAdmin(admin.ModelAdmin):
+    list_display = ['kind', 'label', 'object_id', 'status', 'attempts', 'next_attempt_at', 'updated_at']
+    list_filter = ['status', 'kind', 'label']
+    readonly_fields = [field.name for field in RenderJob._meta.fields]
+    actions = ['retry_jobs']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def retry_jobs(self, request, queryset):
+        updated = queryset.filter(status='failed').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now(), last_error='', updated_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} failed jobs queued for another try; run_render_worker will run them.')
+    retry_jobs.short_description = "Retry Failed Jobs"
+
+# ========== MESSAGE TEMPLATE ADMIN ==========
+@admin.register(MessageTemplate)
+class MessageTemplateAdmin(admin.ModelAdmin):
+    list_display = ['key', 'is_active', 'updated_at']
+    list_filter = ['is_active']
+    readonly_fields = ['placeholders', 'default_text', 'updated_at']
+    fields = ['key', 'body', 'is_active', 'placeholders', 'default_text', 'updated_at']
+    
+    def placeholders(self, obj):
+        if not obj.key:
+            return 'Pick a template and save to see its placeholders'
+        return ', '.join('{' + name + '}' for name in TEMPLATES[obj.key])
+    placeholders.short_description = 'Available placeholders'
+    
+    def default_text(self, obj):
+        if not obj.key:
+            return '-'
+        return format_html('<pre style="white-space: pre-wrap;">{}</pre>', default_source(obj.key))
+    default_text.short_description = 'Default text'
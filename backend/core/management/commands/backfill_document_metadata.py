@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from core.models import Application
+from core.utils.querysets import iter_chunks
+from core.utils.uploads import APPLICATION_DOCUMENT_FIELDS, document_metadata
+
+
+class Command(BaseCommand):
+    help = 'Record size, content type and SHA-256 for application documents that have no metadata yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Applications read and updated per query')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without reading files')
+
+    def handle(self, *args, **options):
+        has_document = Q()
+        for field in APPLICATION_DOCUMENT_FIELDS:
+            has_document |= ~Q(**{field: ''}) & Q(**{f'{field}__isnull': False})
+        queryset = Application.objects.filter(has_document).only('pk', 'document_metadata', *APPLICATION_DOCUMENT_FIELDS)
+
+        seen = described = missing = 0
+        for chunk in iter_chunks(queryset, max(options['batch_size'], 1)):
+            stale = []
+            for application in chunk:
+                metadata = dict(application.document_metadata or {})
+                for field in APPLICATION_DOCUMENT_FIELDS:
+                    doc = getattr(application, field)
+                    if not doc or metadata.get(field, {}).get('name') == doc.name:
+                        continue
+                    if options['dry_run']:
+                        described += 1
+                        continue
+                    try:
+                        metadata[field] = document_metadata(doc, doc.name)
+                        doc.close()
+                        described += 1
+                    except OSError:
+                        missing += 1
+                if metadata != application.document_metadata:
+                    application.document_metadata = metadata
+                    stale.append(application)
+            # bulk_update, not save(): no signals or counters for a derived column
+            if stale:
+                Application.objects.bulk_update(stale, ['document_metadata'])
+            seen += len(chunk)
+
+        verb = 'would describe' if options['dry_run'] else 'described'
+        self.stdout.write(self.style.SUCCESS(f'applications: {seen} checked, {described} documents {verb}'))
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{missing} documents could not be read (left without metadata)'))
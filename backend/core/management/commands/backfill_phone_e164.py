@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Application, Student
+from core.utils.phone_numbers import DEFAULT_COUNTRY, normalize_phones
+from core.utils.querysets import iter_chunks
+
+
+class Command(BaseCommand):
+    help = 'Fill Application.mobile_e164 and Student.phone_e164 for existing rows, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows read and updated per query')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        applications = Application.objects.only('pk', 'mobile', 'mobile_e164', 'country')
+        self.backfill(
+            'applications', applications, 'mobile', 'mobile_e164',
+            lambda app: app.country, batch_size, options['dry_run'],
+        )
+        students = Student.objects.select_related('application').only('pk', 'phone', 'phone_e164', 'application__country')
+        self.backfill(
+            'students', students, 'phone', 'phone_e164',
+            lambda student: student.application.country if student.application else DEFAULT_COUNTRY,
+            batch_size, options['dry_run'],
+        )
+
+    def backfill(self, label, queryset, source, target, country_of, batch_size, dry_run):
+        seen = changed = unusable = 0
+        for chunk in iter_chunks(queryset, batch_size):
+            numbers = normalize_phones([getattr(row, source) for row in chunk], [country_of(row) for row in chunk])
+            stale = []
+            for row, number in zip(chunk, numbers):
+                if not number and getattr(row, source).strip():
+                    unusable += 1
+                if getattr(row, target) != number:
+                    setattr(row, target, number)
+                    stale.append(row)
+            # bulk_update, not save(): no signals, cache bumps or document checks for a derived column
+            if stale and not dry_run:
+                queryset.model.objects.bulk_update(stale, [target])
+            seen += len(chunk)
+            changed += len(stale)
+
+        verb = 'would update' if dry_run else 'updated'
+        self.stdout.write(self.style.SUCCESS(f'{label}: {seen} checked, {changed} {verb}'))
+        if unusable:
+            self.stdout.write(self.style.WARNING(f'{label}: {unusable} numbers could not be normalised (left blank)'))
@@ -0,0 +1,68 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.services.notification_templates import (
+    TEMPLATES, CompiledTemplate, contact_context, default_source, template_registry,
+)
+
+NAMES = ['Thabo', 'Lerato', 'Sipho', 'Naledi', 'Kagiso', 'Palesa', 'Tshepo', 'Ayanda']
+COURSES = ['Automotive Engine Repairer', 'Automotive Suspension Fitter', 'Automotive Workshop Assistant']
+
+
+def sample_context(rng):
+    """Personalised variables for one message, covering every template"""
+    return {
+        **contact_context(),
+        'student_name': rng.choice(NAMES), 'name': f'{rng.choice(NAMES)} Mokoena',
+        'course_name': rng.choice(COURSES), 'registration_fee': rng.choice([200, 350, 661.25]),
+        'reason_text': rng.choice(['', '\n\nReason: Minimum requirements not met']),
+        'title': 'Office closed on Friday', 'message': 'Our offices are closed for the public holiday. ' * 4,
+        'sender': 'Admin',
+    }
+
+
+class Command(BaseCommand):
+    help = 'Render personalised notifications from the compiled templates and report the cost per message'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=20000, help='Timed renders per template')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        contexts = [sample_context(rng) for _ in range(max(options['messages'], 1))]
+
+        self.stdout.write(f'{"Template":<22} {"Mode":<16} {"Messages/s":>12} {"Per message":>12}')
+        self.stdout.write('-' * 65)
+        for key in TEMPLATES:
+            compiled = template_registry.get(key)
+            source = default_source(key)
+            modes = [
+                ('compiled', lambda values: compiled.render(values)),
+                # What each send cost before: parse and check the template every time
+                ('parse each time', lambda values: CompiledTemplate.compile(key, source).render(values)),
+            ]
+            if key.startswith('broadcast_'):
+                # Broadcasts fill in everything but the recipient's name once per broadcast
+                bound = compiled.bind({k: v for k, v in contexts[0].items() if k != 'name'})
+                modes.insert(1, ('bound', lambda values: bound.render(values)))
+            for label, render in modes:
+                self.report(key, label, self.measure(render, contexts))
+
+    def measure(self, render, contexts):
+        for values in contexts[:100]:
+            render(values)
+        rounds = []
+        for _ in range(5):
+            started = time.perf_counter()
+            for values in contexts:
+                render(values)
+            rounds.append((time.perf_counter() - started) / len(contexts))
+        return statistics.median(rounds)
+
+    def report(self, key, label, per_message):
+        rate = 1 / per_message if per_message else 0.0
+        self.stdout.write(f'{key:<22} {label:<16} {rate:>12,.0f} {per_message * 1e6:>10.2f}us')
@@ -0,0 +1,206 @@
+import contextlib
+import io
+import logging
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from core.models import Application, Course, MessageDelivery, WhatsAppMessage
+from core.services.delivery_status import status_buffer
+from core.services.whatsapp import WhatsAppService
+from core.services.whatsapp_outbox import claim_batch, process_batch, send_message
+from core.utils.fake_twilio import FakeTwilioServer
+from core.utils.phone_numbers import normalize_phones
+
+ACCOUNT_SID = 'AC' + 'b' * 32
+AUTH_TOKEN = 'benchmark-token'
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+
+    def at(fraction):
+        return values[min(int(len(values) * fraction), len(values) - 1)]
+    return {'p50': statistics.median(values), 'p95': at(0.95), 'p99': at(0.99), 'max': values[-1]}
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Approve and reject seeded applications in a throwaway database, send the notifications through a local '
+        'fake Twilio with injected latency and errors, and report throughput, tail latency and retries'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--applications', type=int, default=500, help='Applications to approve or reject')
+        parser.add_argument('--reject-ratio', type=float, default=0.3, help='Fraction of them rejected')
+        parser.add_argument('--concurrency', type=int, default=settings.WHATSAPP_WORKER_CONCURRENCY, help='Worker send threads')
+        parser.add_argument('--batch-size', type=int, default=settings.WHATSAPP_OUTBOX_BATCH_SIZE, help='Messages claimed per round')
+        parser.add_argument('--latency-ms', type=float, default=80, help='Fake Twilio response time')
+        parser.add_argument('--jitter-ms', type=float, default=120, help='Extra random response time, up to this much')
+        parser.add_argument('--error-rate', type=float, default=0.03, help='Fraction of sends answered 503')
+        parser.add_argument('--throttle-rate', type=float, default=0.03, help='Fraction of sends answered 429')
+        parser.add_argument('--invalid-rate', type=float, default=0.005, help='Fraction of sends rejected as invalid (400)')
+        parser.add_argument('--retry-base-ms', type=float, default=50, help='Backoff base, instead of WHATSAPP_RETRY_BASE_SECONDS')
+        parser.add_argument('--max-attempts', type=int, default=settings.WHATSAPP_MAX_ATTEMPTS)
+        parser.add_argument('--callbacks', action='store_true', help='Also receive status callbacks on the real webhook')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--timeout', type=float, default=600, help='Give up draining after this many seconds')
+
+    def handle(self, *args, **options):
+        # Never touch the real database: build and drop a test one
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=False)
+
+    def seed(self, count, reject_ratio, seed):
+        rng = random.Random(seed)
+        course = Course.objects.create(title='Benchmark Course', description='-', duration='6 months')
+        mobiles = [f'0{rng.randint(600000000, 849999999)}' for _ in range(count)]
+        Application.objects.bulk_create([
+            Application(
+                name=f'Applicant{i}', surname='Benchmark', age=20, email=f'applicant{i}@example.com',
+                mobile=mobile, mobile_e164=e164, course=course, course_title=course.title,
+            )
+            for i, (mobile, e164) in enumerate(zip(mobiles, normalize_phones(mobiles)))
+        ], batch_size=1000)
+        pks = list(Application.objects.values_list('pk', flat=True))
+        return [(pk, 'reject' if rng.random() < reject_ratio else 'approve') for pk in pks]
+
+    def run(self, options):
+        for name in ('twilio.http_client', 'core.services.whatsapp', 'core.services.whatsapp_outbox', 'django.request'):
+            logging.getLogger(name).setLevel(logging.ERROR)
+        decisions = self.seed(max(options['applications'], 1), options['reject_ratio'], options['seed'])
+
+        with contextlib.ExitStack() as stack:
+            fake = stack.enter_context(FakeTwilioServer(
+                latency=options['latency_ms'] / 1000, jitter=options['jitter_ms'] / 1000,
+                error_rate=options['error_rate'], throttle_rate=options['throttle_rate'],
+                invalid_rate=options['invalid_rate'], auth_token=AUTH_TOKEN, seed=options['seed'],
+            ))
+            callback_url = stack.enter_context(self.webhook_server()) if options['callbacks'] else ''
+            stack.enter_context(override_settings(
+                ALLOWED_HOSTS=['*'], TWILIO_ACCOUNT_SID=ACCOUNT_SID, TWILIO_AUTH_TOKEN=AUTH_TOKEN,
+                TWILIO_API_BASE_URL=fake.base_url, TWILIO_STATUS_CALLBACK_URL=callback_url,
+                WHATSAPP_NOTIFICATIONS_ENABLED=True, WHATSAPP_SEND_APPROVAL=True, WHATSAPP_SEND_REJECTION=True,
+                WHATSAPP_SANDBOX_MODE=False, WHATSAPP_MAX_ATTEMPTS=options['max_attempts'],
+                WHATSAPP_RETRY_BASE_SECONDS=options['retry_base_ms'] / 1000,
+                WHATSAPP_RETRY_MAX_SECONDS=options['retry_base_ms'] / 1000 * 64,
+            ))
+
+            api_timings = self.change_statuses(decisions)
+            self.report_latency('Status change (API, queues messages)', api_timings)
+            queued = WhatsAppMessage.objects.count()
+            self.stdout.write(f'{len(decisions)} applications -> {queued} queued messages\n')
+
+            fake.reset_counts()
+            outcomes, send_timings, elapsed = self.drain(options)
+            self.report_drain(outcomes, send_timings, elapsed, fake.counts)
+            if callback_url:
+                self.report_callbacks(fake)
+
+    def change_statuses(self, decisions):
+        client = APIClient()
+        timings = []
+        # Application.save() prints progress; keep it out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            for pk, decision in decisions:
+                tick = time.perf_counter()
+                response = client.patch(f'/api/applications/{pk}/{decision}/', {'reason': 'Benchmark'}, format='json')
+                timings.append(time.perf_counter() - tick)
+                if response.status_code != 200:
+                    raise RuntimeError(f'{decision} {pk} answered {response.status_code}')
+        return timings
+
+    def drain(self, options):
+        """Run the outbox worker loop until nothing is pending, timing every Twilio call"""
+        service = WhatsAppService()
+        send_timings = []
+
+        def send(message):
+            tick = time.perf_counter()
+            result = send_message(service, message)
+            send_timings.append(time.perf_counter() - tick)
+            return result
+
+        outcomes = Counter()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(options['concurrency'], 1)) as pool:
+            while time.perf_counter() - started < options['timeout']:
+                batch = claim_batch(max(options['batch_size'], 1))
+                if batch:
+                    outcomes.update(process_batch(pool, send, batch))
+                elif WhatsAppMessage.objects.filter(status__in=['pending', 'sending']).exists():
+                    time.sleep(0.01)  # retries backing off, or follow-ups waiting on their template
+                else:
+                    break
+        return outcomes, send_timings, time.perf_counter() - started
+
+    def report_latency(self, label, timings):
+        stats = percentiles(timings)
+        self.stdout.write(
+            f'{label}: p50 {stats["p50"] * 1000:.1f}ms, p95 {stats["p95"] * 1000:.1f}ms, '
+            f'p99 {stats["p99"] * 1000:.1f}ms, max {stats["max"] * 1000:.1f}ms'
+        )
+
+    def report_drain(self, outcomes, send_timings, elapsed, counts):
+        sent = WhatsAppMessage.objects.filter(status='sent')
+        self.stdout.write(self.style.MIGRATE_HEADING('Outbox drain'))
+        self.stdout.write(
+            f'{sent.count()} sent, {WhatsAppMessage.objects.filter(status="failed").count()} failed, '
+            f'{WhatsAppMessage.objects.exclude(status__in=["sent", "failed"]).count()} unfinished in {elapsed:.2f}s '
+            f'-> {sent.count() / elapsed if elapsed else 0:.1f} messages/s'
+        )
+        self.report_latency('Twilio call', send_timings)
+        self.stdout.write(
+            f'Attempts: {len(send_timings)} calls, {outcomes["retry"]} retried, {outcomes["failed"]} gave up; '
+            f'fake Twilio answered {counts.get("http_503", 0)}x 503, {counts.get("http_429", 0)}x 429, '
+            f'{counts.get("http_400", 0)}x 400 over {counts["connections"]} connections'
+        )
+        histogram = Counter(sent.values_list('attempts', flat=True))
+        self.stdout.write('Sent after N attempts: ' + ', '.join(f'{n}: {histogram[n]}' for n in sorted(histogram)))
+
+    @contextlib.contextmanager
+    def webhook_server(self):
+        """Serve this project's status webhook on a free local port while the benchmark runs"""
+        server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=False)
+        server.set_app(WSGIHandler())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f'http://127.0.0.1:{server.server_address[1]}/api/webhooks/twilio/status/'
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def report_callbacks(self, fake):
+        expected = 2 * fake.counts['messages']
+        deadline = time.perf_counter() + 30
+        while fake.counts['callbacks'] + fake.counts['callback_errors'] < expected and time.perf_counter() < deadline:
+            time.sleep(0.1)
+        status_buffer.flush()
+        statuses = Counter(MessageDelivery.objects.values_list('status', flat=True))
+        self.stdout.write(self.style.MIGRATE_HEADING('Status callbacks'))
+        self.stdout.write(
+            f'{fake.counts["callbacks"]} accepted, {fake.counts["callback_errors"]} rejected; stored: '
+            + ', '.join(f'{status} {count}' for status, count in sorted(statuses.items()))
+        )
@@ -0,0 +1,117 @@
+import statistics
+import time
+import tracemalloc
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import Application, Course, Student
+from core.utils.pdf_generator import TEMPLATES, get_stylesheet
+
+
+def sample_course():
+    return Course(
+        title='Automotive Engine Repairer', short_title='Engine Repairer', duration='9 months', credits=120,
+        level='intermediate', short_description='Diagnose, strip and rebuild petrol and diesel engines.',
+        description='Hands-on training in engine theory, diagnostics and overhaul. ' * 12,
+        deposit_amount=6612.50, monthly_payment=1850, total_payment=23262.50, assessment_fee=661.25,
+        registration_fee=200, curriculum='Engine fundamentals; fuel systems; cooling systems; overhaul. ' * 6,
+        prerequisites='Grade 9 or equivalent.', requirements='Certified ID copy, school certificate, registration fee.',
+        career_opportunities='Engine fitter, workshop technician, service advisor. ' * 3,
+    )
+
+
+def sample_application():
+    return Application(
+        id=1, name='Thabo', surname='Mokoena', age=23, country='South Africa', mobile='0821234567',
+        email='thabo@example.com', course=sample_course(), education_level='Grade 12',
+        previous_school='Soshanguve High School', qualification='National Senior Certificate',
+        experience='Two years as a general workshop assistant.', message='I want to qualify as an engine repairer. ' * 4,
+        status='pending', applied_date=timezone.now(),
+    )
+
+
+def sample_student():
+    return Student(
+        id=1, student_id='STU0001', name='Thabo', surname='Mokoena', email='thabo@example.com',
+        address='12 Church Street\nSoshanguve\n0152', course=sample_course(), status='completed',
+        enrollment_date=timezone.now().date(), completion_date=timezone.now().date(), certificate_id='BTC-2026-00001',
+    )
+
+
+# Template name -> factory for a representative, unsaved object to render
+SAMPLES = {
+    'course_outline': sample_course,
+    'application_form': sample_application,
+    'acceptance_letter': sample_student,
+    'completion_certificate': sample_student,
+}
+
+
+class Command(BaseCommand):
+    help = 'Render every registered PDF template repeatedly and report renders per second and peak memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--renders', type=int, default=200, help='Timed renders per template')
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed renders per template first')
+        parser.add_argument(
+            '--per-render-styles', action='store_true',
+            help='Also time each template with the stylesheet rebuilt on every render (the old behaviour)',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'{"Template":<24} {"Styles":<11} {"Renders/s":>10} {"Median":>9} {"p95":>9} {"Peak mem":>10} {"Size":>8}')
+        self.stdout.write('-' * 87)
+        for name, template in TEMPLATES.items():
+            factory = SAMPLES.get(name)
+            if factory is None:
+                self.stdout.write(self.style.WARNING(f'{name:<24} no sample object; skipped'))
+                continue
+            obj = factory()
+            modes = [('shared', False)] + ([('per-render', True)] if options['per_render_styles'] else [])
+            for label, rebuild_styles in modes:
+                self.report(name, label, self.measure(template, obj, options['renders'], options['warmup'], rebuild_styles))
+        get_stylesheet.cache_clear()
+
+    def measure(self, template, obj, renders, warmup, rebuild_styles):
+        def render():
+            if rebuild_styles:
+                get_stylesheet.cache_clear()
+            buffer = BytesIO()
+            template.render_to(buffer, obj)
+            return buffer.tell()
+
+        for _ in range(warmup):
+            render()
+
+        timings = []
+        size = 0
+        started = time.perf_counter()
+        for _ in range(renders):
+            tick = time.perf_counter()
+            size = render()
+            timings.append(time.perf_counter() - tick)
+        elapsed = time.perf_counter() - started
+
+        # Peak memory is traced separately so tracemalloc's overhead doesn't skew the timings
+        tracemalloc.start()
+        for _ in range(min(renders, 20)):
+            render()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        timings.sort()
+        return {
+            'rate': renders / elapsed if elapsed else 0.0,
+            'median': statistics.median(timings),
+            'p95': timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0],
+            'peak': peak,
+            'size': size,
+        }
+
+    def report(self, name, label, result):
+        self.stdout.write(
+            f'{name:<24} {label:<11} {result["rate"]:>10.1f} {result["median"] * 1000:>7.2f}ms '
+            f'{result["p95"] * 1000:>7.2f}ms {result["peak"] / 1024:>8.0f}KB {result["size"] / 1024:>6.1f}KB'
+        )
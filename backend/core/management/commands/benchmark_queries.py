@@ -0,0 +1,119 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from core.models import Application, Course, Student
+from core.services.search import search_applications
+
+PAGE = 51  # default page size + 1, as fetched by the cursor paginator
+
+
+def hot_queries(course_id, sample):
+    """(label, queryset, runner) for each query the API, admin and dashboard issue on every view"""
+    ordered = Application.objects.order_by('-applied_date', '-id')
+    week_ago = timezone.now() - timedelta(days=7)
+    return [
+        ('list: first page', ordered, lambda qs: list(qs[:PAGE])),
+        ('list: status=pending', ordered.filter(status='pending'), lambda qs: list(qs[:PAGE])),
+        ('list: fee_verified=false', ordered.filter(fee_verified=False), lambda qs: list(qs[:PAGE])),
+        ('stats: count all', Application.objects.all(), lambda qs: qs.count()),
+        ('stats: count pending', Application.objects.filter(status='pending'), lambda qs: qs.count()),
+        ('stats: count approved', Application.objects.filter(status='approved'), lambda qs: qs.count()),
+        ('stats: count fee_verified', Application.objects.filter(fee_verified=True), lambda qs: qs.count()),
+        ('course: count approved', Application.objects.filter(course_id=course_id, status='approved'), lambda qs: qs.count()),
+        ('admin: applied last 7 days', ordered.filter(applied_date__gte=week_ago), lambda qs: list(qs[:PAGE])),
+        ('dup check: email', Application.objects.filter(email=sample.email), lambda qs: qs.exists()),
+        ('dup check: mobile', Application.objects.filter(mobile=sample.mobile), lambda qs: qs.exists()),
+        ('search: name prefix', search_applications(ordered, sample.surname[:4]), lambda qs: list(qs[:PAGE])),
+        ('search: phone prefix', search_applications(ordered, sample.mobile[:5]), lambda qs: list(qs[:PAGE])),
+        ('dashboard: students', Student.objects.all(), lambda qs: qs.count()),
+        ('dashboard: active courses', Course.objects.filter(is_active=True), lambda qs: qs.count()),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Seed N applications into a throwaway test database and print EXPLAIN plans and timings for the hot queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000, help='Number of applications to seed')
+        parser.add_argument('--repeat', type=int, default=25, help='Timed runs per query')
+        parser.add_argument('--no-plans', action='store_true', help='Only print timings')
+
+    def handle(self, *args, **options):
+        # Never touch the real database: build and drop a test one
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+        try:
+            self.run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=False)
+
+    def seed(self, rows):
+        rng = random.Random(42)
+        courses = [
+            Course.objects.create(title=f'Benchmark Course {i}', description='-', duration='6 months')
+            for i in range(4)
+        ]
+        now = timezone.now()
+        statuses = ['pending'] * 5 + ['approved'] * 3 + ['rejected'] * 2 + ['contacted']
+        surnames = ['Mokoena', 'Dube', 'Nkosi', 'Khumalo', 'Ndlovu', 'Mahlangu', 'Sithole', 'Naidoo']
+        batch = []
+        for i in range(rows):
+            batch.append(Application(
+                name=f'Applicant{i}', surname=rng.choice(surnames), age=rng.randint(17, 45),
+                email=f'applicant{i}@example.com', mobile=f'0{rng.randint(600000000, 849999999)}',
+                course=rng.choice(courses), status=rng.choice(statuses),
+                fee_verified=rng.random() < 0.4,
+            ))
+            if len(batch) == 5000:
+                Application.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Application.objects.bulk_create(batch)
+        # applied_date is auto_now_add, so spread it over two years afterwards
+        spread = []
+        for application in Application.objects.only('pk').iterator(chunk_size=5000):
+            application.applied_date = now - timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60))
+            spread.append(application)
+            if len(spread) == 5000:
+                Application.objects.bulk_update(spread, ['applied_date'])
+                spread = []
+        if spread:
+            Application.objects.bulk_update(spread, ['applied_date'])
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE core_application')
+        elif connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+        return courses
+
+    def run(self, options):
+        started = time.perf_counter()
+        courses = self.seed(options['rows'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['rows']} applications in {time.perf_counter() - started:.1f}s ({connection.vendor})"
+        ))
+        sample = Application.objects.order_by('?').first()
+
+        results = []
+        for label, queryset, runner in hot_queries(courses[0].id, sample):
+            if not options['no_plans']:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n{label}'))
+                self.stdout.write(queryset.explain())
+            runner(queryset)  # warm up
+            timings = []
+            for _ in range(options['repeat']):
+                t0 = time.perf_counter()
+                runner(queryset.all())
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            results.append((label, statistics.median(timings), timings[int(len(timings) * 0.95) - 1]))
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n{'Query':<30} {'median ms':>10} {'p95 ms':>10}"))
+        for label, median, p95 in results:
+            self.stdout.write(f'{label:<30} {median:>10.3f} {p95:>10.3f}')
@@ -0,0 +1,70 @@
+import logging
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from twilio.rest import Client
+
+from core.services.http_clients import PooledTwilioHttpClient, http_timeout, new_session, twilio_client
+from core.services.whatsapp import WhatsAppService
+from core.utils.fake_twilio import FakeTwilioServer
+
+ACCOUNT_SID = 'AC' + '0' * 32
+AUTH_TOKEN = 'benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Send messages to a local fake Twilio with a client per send and with the shared pooled client, and compare'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500, help='Messages sent per mode')
+        parser.add_argument('--concurrency', type=int, default=8, help='Sending threads')
+        parser.add_argument('--latency-ms', type=float, default=0, help='Delay the fake server adds to every response')
+
+    def handle(self, *args, **options):
+        messages = max(options['messages'], 1)
+        concurrency = max(options['concurrency'], 1)
+        # Per-request INFO logging would dominate the timings
+        for name in ('twilio.http_client', 'core.services.whatsapp'):
+            logging.getLogger(name).setLevel(logging.WARNING)
+
+        with FakeTwilioServer(latency=options['latency_ms'] / 1000) as server:
+            def client_per_send():
+                # What WhatsAppService did before: a new Client, and so a new connection, every time
+                return Client(ACCOUNT_SID, AUTH_TOKEN, http_client=PooledTwilioHttpClient(new_session(), http_timeout(), server.base_url))
+
+            shared = twilio_client(ACCOUNT_SID, AUTH_TOKEN, server.base_url)
+            modes = [('client per send', client_per_send), ('shared pooled', lambda: shared)]
+
+            self.stdout.write(f'{messages} messages, {concurrency} threads, {options["latency_ms"]:g}ms server latency')
+            self.stdout.write(f'{"Mode":<18} {"Msgs/s":>9} {"Median":>9} {"p95":>9} {"Connections":>12}')
+            self.stdout.write('-' * 61)
+            for label, make_client in modes:
+                server.reset_counts()
+                self.report(label, self.measure(make_client, messages, concurrency), server.counts['connections'])
+
+    def measure(self, make_client, messages, concurrency):
+        def send(i):
+            service = WhatsAppService()
+            service.client = make_client()
+            tick = time.perf_counter()
+            service.send(f'+2782{i:07d}', body='Benchmark message')
+            return time.perf_counter() - tick
+
+        # Warm up, so the shared client's first connections aren't part of the timing
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(send, range(concurrency)))
+            started = time.perf_counter()
+            timings = sorted(pool.map(send, range(messages)))
+            elapsed = time.perf_counter() - started
+        return {
+            'rate': messages / elapsed if elapsed else 0.0,
+            'median': statistics.median(timings),
+            'p95': timings[max(int(len(timings) * 0.95) - 1, 0)],
+        }
+
+    def report(self, label, result, connections):
+        self.stdout.write(
+            f'{label:<18} {result["rate"]:>9.1f} {result["median"] * 1000:>7.2f}ms {result["p95"] * 1000:>7.2f}ms {connections:>12}'
+        )
@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+import resource
+import shutil
+import tempfile
+import time
+
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.core.management.base import BaseCommand
+from django.http.multipartparser import MultiPartParser
+from django.test import override_settings
+
+from core.utils.uploads import StreamingDocumentUploadHandler
+
+BOUNDARY = 'BathudiBenchmarkBoundary'
+MB = 1024 * 1024
+
+
+class MultipartStream:
+    """File-like multipart body that produces the payload on the fly, so the benchmark itself stays small"""
+
+    def __init__(self, size, field_name='proof_of_payment', file_name='scan.pdf'):
+        self.head = (
+            f'--{BOUNDARY}\r\n'
+            f'Content-Disposition: form-data; name="{field_name}"; filename="{file_name}"\r\n'
+            f'Content-Type: application/pdf\r\n\r\n'
+        ).encode()
+        self.tail = f'\r\n--{BOUNDARY}--\r\n'.encode()
+        self.size = size
+        self.length = len(self.head) + size + len(self.tail)
+        self.block = os.urandom(64 * 1024)
+        self.position = 0
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            n = self.length - self.position
+        out = []
+        while n > 0 and self.position < self.length:
+            if self.position < len(self.head):
+                piece = self.head[self.position:self.position + n]
+            elif self.position < len(self.head) + self.size:
+                offset = (self.position - len(self.head)) % len(self.block)
+                remaining_body = len(self.head) + self.size - self.position
+                piece = self.block[offset:offset + min(n, remaining_body)]
+            else:
+                offset = self.position - len(self.head) - self.size
+                piece = self.tail[offset:offset + n]
+            out.append(piece)
+            self.position += len(piece)
+            n -= len(piece)
+        return b''.join(out)
+
+
+def _memory_kb():
+    """Return (current RSS, high-water RSS) of this process in KB"""
+    values = {}
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    key, value = line.split(':', 1)
+                    values[key] = int(value.split()[0])
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak, peak
+    return values['VmRSS'], values['VmHWM']
+
+
+def _run_upload(mode, size, media_root, conn):
+    """Parse one upload in a forked child and report its peak RSS growth"""
+    baseline, _ = _memory_kb()
+    stream = MultipartStream(size)
+    meta = {
+        'CONTENT_TYPE': f'multipart/form-data; boundary={BOUNDARY}',
+        'CONTENT_LENGTH': str(stream.length),
+    }
+    # The old settings kept anything up to 100MB in memory
+    with override_settings(MEDIA_ROOT=media_root, FILE_UPLOAD_MAX_MEMORY_SIZE=100 * MB):
+        if mode == 'streaming':
+            handler = StreamingDocumentUploadHandler()
+            handlers = [handler, MemoryFileUploadHandler(), TemporaryFileUploadHandler()]
+        else:
+            handler = None
+            handlers = [MemoryFileUploadHandler(), TemporaryFileUploadHandler()]
+        started = time.perf_counter()
+        _, files = MultiPartParser(meta, stream, handlers).parse()
+        elapsed = time.perf_counter() - started
+        uploaded = files['proof_of_payment']
+        received = uploaded.size
+        if handler:
+            handler.discard()
+        else:
+            uploaded.close()
+    _, peak = _memory_kb()
+    conn.send({'peak_kb': peak - baseline, 'seconds': elapsed, 'received': received})
+    conn.close()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark peak RSS of application document uploads, buffered vs streamed, against upload size'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,5,20,50', help='Comma separated upload sizes in MB')
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options['sizes'].split(',') if s.strip()]
+        context = multiprocessing.get_context('fork')
+        media_root = tempfile.mkdtemp(prefix='bathudi-upload-bench-')
+
+        self.stdout.write(f'{"Size":>8} {"Mode":<10} {"Peak RSS +":>12} {"Time":>9} {"MB/s":>8}')
+        self.stdout.write('-' * 51)
+        try:
+            for size_mb in sizes:
+                for mode in ('buffered', 'streaming'):
+                    parent, child = context.Pipe(duplex=False)
+                    process = context.Process(target=_run_upload, args=(mode, size_mb * MB, media_root, child))
+                    process.start()
+                    result = parent.recv()
+                    process.join()
+                    assert result['received'] == size_mb * MB
+                    throughput = size_mb / result['seconds'] if result['seconds'] else 0
+                    self.stdout.write(
+                        f'{size_mb:>6}MB {mode:<10} {result["peak_kb"] / 1024:>10.1f}MB '
+                        f'{result["seconds"]:>8.3f}s {throughput:>8.1f}'
+                    )
+        finally:
+            shutil.rmtree(media_root, ignore_errors=True)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from core.utils.static_files import StaticIndex, brotli, default_mounts, load_manifest, write_manifest
+
+
+class Command(BaseCommand):
+    help = (
+        'Write gzip (and brotli, if installed) variants beside every compressible file the static layer serves, '
+        'and the manifest of digests the web workers load. Run it on deploy, like collectstatic.'
+    )
+
+    def handle(self, *args, **options):
+        index = StaticIndex(default_mounts()).build(compress=True, manifest=load_manifest())
+        path = write_manifest(index)
+        original = compressed = 0
+        for url, hashed in sorted(index.hashed_urls.items()):
+            entry, _ = index.lookup(url)
+            if not entry.variants:
+                continue
+            best = min(size for _, size in entry.variants.values())
+            original += entry.size
+            compressed += best
+            self.stdout.write(f'{url} -> {hashed}  {entry.size} -> {best} bytes ({", ".join(sorted(entry.variants))})')
+        if not brotli:
+            self.stdout.write(self.style.WARNING('brotli is not installed; only gzip variants were written'))
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(index.hashed_urls)} files indexed into {path}; '
+            f'compressed variants save {original - compressed} of {original} bytes'
+        ))
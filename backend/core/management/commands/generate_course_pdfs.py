@@ -1,31 +1,119 @@
 import os
-from django.core.management.base import BaseCommand
-from django.core.files.base import ContentFile
-from core.models import Course
-from core.utils.pdf_generator import CoursePDFGenerator
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from core.models import Application, Course
+from core.services.course_pdfs import course_pdf_is_stale, has_generated_pdf, refresh_course_pdf
+from core.services.pdf_batch import (
+    DEFAULT_CHUNK_SIZE, BatchProgress, default_workers, render_application_chunk, render_course_chunk, run_batch,
+)
+from core.utils.querysets import iter_chunks
 
 class Command(BaseCommand):
-    help = 'Generate PDFs for all courses that don\'t have them'
+    help = (
+        'Generate outline PDFs for courses that have none, and re-render generated ones whose content changed. '
+        'With --applications, render application forms (e.g. a whole intake for printing) instead.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-render even if the content hash is unchanged')
+        parser.add_argument(
+            '--replace-uploaded', action='store_true',
+            help='Also replace uploaded PDFs (including ones written by older versions of this command)',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help=f'Render in this many processes (default: {default_workers()}, the CPU count; 1 renders in-process)',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Rows read from the database and handed to a worker at a time',
+        )
+
+        applications = parser.add_argument_group('application forms')
+        applications.add_argument('--applications', action='store_true', help='Render application PDFs')
+        applications.add_argument('--course', help='Only applications for this course (id or exact title)')
+        applications.add_argument(
+            '--status', action='append', choices=[value for value, _ in Application.STATUS_CHOICES],
+            help='Only applications with this status (repeatable)',
+        )
+        applications.add_argument('--since', type=date.fromisoformat, help='Applied on or after this date (YYYY-MM-DD)')
+        applications.add_argument('--until', type=date.fromisoformat, help='Applied on or before this date (YYYY-MM-DD)')
+        applications.add_argument(
+            '--output', default=os.path.join(settings.BASE_DIR, 'exports', 'applications'),
+            help='Directory the application PDFs are written to',
+        )
 
     def handle(self, *args, **options):
-        courses = Course.objects.all()
-        count = 0
-        
-        for course in courses:
-            if not course.course_pdf:
+        workers = options['workers'] if options['workers'] is not None else default_workers()
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        if options['applications']:
+            self.render_applications(workers, options)
+        else:
+            self.render_courses(workers, options)
+
+    def render_courses(self, workers, options):
+        targets = []
+        fresh = 0
+        for chunk in iter_chunks(Course.objects.all(), options['chunk_size']):
+            for course in chunk:
+                if course.course_pdf and not has_generated_pdf(course) and not options['replace_uploaded']:
+                    continue
+                if options['force'] or course_pdf_is_stale(course):
+                    targets.append(course)
+                else:
+                    fresh += 1
+
+        chunks = [targets[i:i + options['chunk_size']] for i in range(0, len(targets), options['chunk_size'])]
+        progress = BatchProgress(len(targets))
+        rendered = 0
+        for chunk, results in run_batch(chunks, render_course_chunk, workers):
+            courses = {course.pk: course for course in chunk}
+            for pk, content, error in results:
+                course = courses[pk]
+                if error:
+                    self.stdout.write(self.style.ERROR(f'Error generating PDF for {course.title}: {error}'))
+                    continue
                 try:
-                    # Generate PDF content
-                    from core.views import CoursePDFGenerator
-                    pdf_content = CoursePDFGenerator.generate_course_pdf(course)
-                    
-                    # Save to course_pdf field
-                    filename = f"{course.title.lower().replace(' ', '-').replace('/', '-')}-outline.pdf"
-                    course.course_pdf.save(filename, ContentFile(pdf_content), save=True)
-                    
-                    self.stdout.write(self.style.SUCCESS(f'Generated PDF for {course.title}'))
-                    count += 1
-                    
+                    if refresh_course_pdf(course, force=options['force'], content=content):
+                        rendered += 1
+                        self.stdout.write(self.style.SUCCESS(f'Generated PDF for {course.title}'))
+                    else:
+                        self.stdout.write(f'Reused cached PDF for {course.title}')
                 except Exception as e:
-                    self.stdout.write(self.style.ERROR(f'Error generating PDF for {course.title}: {str(e)}'))
-        
-        self.stdout.write(self.style.SUCCESS(f'Successfully generated {count} PDFs'))
\ No newline at end of file
+                    self.stdout.write(self.style.ERROR(f'Error saving PDF for {course.title}: {str(e)}'))
+            progress.update(results)
+            self.stdout.write(str(progress))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully generated {rendered} PDFs ({fresh} already up to date) with {max(workers, 1)} worker(s)'
+        ))
+
+    def render_applications(self, workers, options):
+        queryset = Application.objects.select_related('course')
+        if options['course']:
+            course = options['course']
+            queryset = queryset.filter(course_id=course) if course.isdigit() else queryset.filter(course__title__iexact=course)
+        if options['status']:
+            queryset = queryset.filter(status__in=options['status'])
+        if options['since']:
+            queryset = queryset.filter(applied_date__date__gte=options['since'])
+        if options['until']:
+            queryset = queryset.filter(applied_date__date__lte=options['until'])
+
+        output_dir = options['output']
+        os.makedirs(output_dir, exist_ok=True)
+        progress = BatchProgress(queryset.count())
+        self.stdout.write(f'Rendering {progress.total} application PDFs into {output_dir} with {max(workers, 1)} worker(s)')
+
+        chunks = iter_chunks(queryset, options['chunk_size'])
+        for _, results in run_batch(chunks, render_application_chunk, workers, output_dir):
+            for pk, _, error in results:
+                if error:
+                    self.stdout.write(self.style.ERROR(f'Error generating PDF for application {pk}: {error}'))
+            progress.update(results)
+            self.stdout.write(str(progress))
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {progress}'))
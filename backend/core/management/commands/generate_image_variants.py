@@ -0,0 +1,21 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.services.image_variants import IMAGE_VARIANT_FIELDS, generate_image_variants
+
+
+class Command(BaseCommand):
+    help = 'Render responsive WebP/JPEG variants for uploaded images that have none recorded yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Re-record variants even if they are up to date')
+
+    def handle(self, *args, **options):
+        total = 0
+        for label, field in IMAGE_VARIANT_FIELDS.items():
+            model = apps.get_model(label)
+            pks = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).values_list('pk', flat=True)
+            rendered = sum(generate_image_variants(label, pk, force=options['force']) for pk in pks)
+            total += rendered
+            self.stdout.write(f'{model._meta.verbose_name_plural}: {rendered} of {len(pks)} images rendered')
+        self.stdout.write(self.style.SUCCESS(f'Recorded variants for {total} images'))
@@ -0,0 +1,49 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from core.models import Student
+from core.services.pdf_batch import DEFAULT_CHUNK_SIZE, default_workers
+from core.services.student_documents import STUDENT_DOCUMENTS, generate_student_documents
+
+
+class Command(BaseCommand):
+    help = 'Render acceptance letters or completion certificates for a set of students into media storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(STUDENT_DOCUMENTS), help='Which document to generate')
+        parser.add_argument('--course', help='Only students of this course (id or exact title)')
+        parser.add_argument(
+            '--status', action='append', choices=[value for value, _ in Student.STATUS_CHOICES],
+            help='Only students with this status (repeatable)',
+        )
+        parser.add_argument('--completed-since', type=date.fromisoformat, help='Completed on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--student-id', action='append', help='Only these student numbers (repeatable)')
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help=f'Render in this many processes (default: {default_workers()}, the CPU count; 1 renders in-process)',
+        )
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Students handed to a worker at a time')
+
+    def handle(self, *args, **options):
+        queryset = Student.objects.all()
+        if options['course']:
+            course = options['course']
+            queryset = queryset.filter(course_id=course) if course.isdigit() else queryset.filter(course__title__iexact=course)
+        if options['status']:
+            queryset = queryset.filter(status__in=options['status'])
+        if options['completed_since']:
+            queryset = queryset.filter(completion_date__gte=options['completed_since'])
+        if options['student_id']:
+            queryset = queryset.filter(student_id__in=options['student_id'])
+
+        workers = options['workers'] if options['workers'] is not None else default_workers()
+        progress, skipped = generate_student_documents(
+            queryset, options['kind'], workers=workers, chunk_size=max(options['chunk_size'], 1),
+            on_progress=lambda progress: self.stdout.write(str(progress)),
+        )
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'{skipped} students skipped: certificates are only issued once completed'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {progress} with {max(workers, 1)} worker(s), written under {STUDENT_DOCUMENTS[options["kind"]][1]}/'
+        ))
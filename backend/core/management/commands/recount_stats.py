@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.services.stats import recount_counters
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the stats counters from the tables, after writes that bypassed save() (raw SQL, bulk_create)'
+
+    def handle(self, *args, **options):
+        drift = recount_counters()
+        for name, (stored, counted) in drift.items():
+            self.stdout.write(self.style.WARNING(f'{name}: {stored} -> {counted}'))
+        self.stdout.write(self.style.SUCCESS(f'Counters recounted, {len(drift)} corrected'))
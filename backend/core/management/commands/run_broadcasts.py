@@ -0,0 +1,52 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.services.broadcasts import BroadcastDispatcher, claim_broadcast
+
+
+class Command(BaseCommand):
+    help = 'Send queued broadcasts over WhatsApp and email, rate-limited per channel'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.BROADCAST_CONCURRENCY, help='Sends in flight at once',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.BROADCAST_BATCH_SIZE, help='Recipients read and recorded per batch',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.BROADCAST_POLL_INTERVAL,
+            help='Seconds to sleep when nothing is queued',
+        )
+        parser.add_argument('--once', action='store_true', help='Send what is queued now, then exit')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+        dispatcher = BroadcastDispatcher(options['concurrency'], options['batch_size'], stop=stop)
+        self.stdout.write(f'Broadcast dispatcher started ({dispatcher.concurrency} concurrent sends)')
+        while not stop.is_set():
+            close_old_connections()
+            broadcast = claim_broadcast()
+            if broadcast is None:
+                if options['once']:
+                    break
+                stop.wait(options['poll_interval'])
+                continue
+
+            self.stdout.write(f'Sending broadcast {broadcast.pk}: {broadcast.title}')
+            outcome = dispatcher.dispatch(broadcast)
+            broadcast.refresh_from_db()
+            self.stdout.write(
+                f'Broadcast {broadcast.pk} {outcome}: {broadcast.sent_count} sent, '
+                f'{broadcast.failed_count} failed of {broadcast.recipient_count}'
+            )
+
+        close_old_connections()
+        self.stdout.write(self.style.SUCCESS('Broadcast dispatcher stopped'))
@@ -0,0 +1,40 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from core.utils.fake_twilio import FakeTwilioServer
+
+
+class Command(BaseCommand):
+    help = 'Run a local fake Twilio Messages API; point TWILIO_API_BASE_URL at it to send offline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=float, default=0, help='Delay added to every response')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Extra random delay, up to this much')
+        parser.add_argument('--error-rate', type=float, default=0, help='Fraction of sends answered 503')
+        parser.add_argument('--throttle-rate', type=float, default=0, help='Fraction of sends answered 429')
+        parser.add_argument('--invalid-rate', type=float, default=0, help='Fraction of sends rejected as invalid numbers (400)')
+        parser.add_argument('--undelivered-rate', type=float, default=0, help='Fraction of accepted messages reported undelivered')
+        parser.add_argument('--callback-delay-ms', type=float, default=50, help='Delay before each status callback')
+        parser.add_argument('--auth-token', default='', help='Sign status callbacks with this token (TWILIO_AUTH_TOKEN)')
+        parser.add_argument('--seed', type=int, default=None, help='Make the injected failures repeatable')
+
+    def handle(self, *args, **options):
+        server = FakeTwilioServer(
+            port=options['port'], latency=options['latency_ms'] / 1000, jitter=options['jitter_ms'] / 1000,
+            error_rate=options['error_rate'], throttle_rate=options['throttle_rate'],
+            invalid_rate=options['invalid_rate'], undelivered_rate=options['undelivered_rate'],
+            callback_delay=options['callback_delay_ms'] / 1000, auth_token=options['auth_token'], seed=options['seed'],
+        )
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+        with server:
+            self.stdout.write(self.style.SUCCESS(f'Fake Twilio listening on {server.base_url}'))
+            self.stdout.write(f'Set TWILIO_API_BASE_URL={server.base_url} (and any TWILIO_ACCOUNT_SID) to use it')
+            while not stop.wait(10):
+                self.stdout.write(', '.join(f'{name}: {count}' for name, count in sorted(server.counts.items())))
+        self.stdout.write(f'Stopped. {server.counts}')
@@ -0,0 +1,47 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.services.render_jobs import claim_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run queued rendering jobs (image variants, course outline PDFs, student letters and certificates) outside the web workers, retrying failures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10, help='Jobs claimed per round')
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.RENDER_POLL_INTERVAL,
+            help='Seconds to sleep when the queue is empty',
+        )
+        parser.add_argument('--once', action='store_true', help='Run what is due now, then exit')
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: self.stopping.set())
+        signal.signal(signal.SIGINT, lambda *_: self.stopping.set())
+
+        totals = {'done': 0, 'retry': 0, 'failed': 0}
+        self.stdout.write('Render worker started')
+        while not self.stopping.is_set():
+            close_old_connections()
+            batch = claim_jobs(max(options['batch_size'], 1))
+            if not batch:
+                if options['once']:
+                    break
+                self.stopping.wait(options['poll_interval'])
+                continue
+
+            for job in batch:
+                totals[run_job(job)] += 1
+            self.stdout.write(
+                f'{len(batch)} processed: {totals["done"]} done, {totals["retry"]} retrying, {totals["failed"]} failed so far'
+            )
+
+        close_old_connections()
+        self.stdout.write(self.style.SUCCESS(
+            f'Render worker stopped: {totals["done"]} done, {totals["retry"]} retrying, {totals["failed"]} failed'
+        ))
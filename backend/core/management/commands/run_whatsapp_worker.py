@@ -0,0 +1,65 @@
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.services.whatsapp import WhatsAppService
+from core.services.whatsapp_outbox import claim_batch, process_batch, send_message
+
+
+class Command(BaseCommand):
+    help = 'Send queued WhatsApp messages from the outbox, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.WHATSAPP_WORKER_CONCURRENCY,
+            help='Twilio requests in flight at once',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.WHATSAPP_OUTBOX_BATCH_SIZE,
+            help='Messages claimed from the outbox per round',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.WHATSAPP_POLL_INTERVAL,
+            help='Seconds to sleep when the outbox is empty',
+        )
+        parser.add_argument('--once', action='store_true', help='Drain what is due now, then exit')
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: self.stopping.set())
+        signal.signal(signal.SIGINT, lambda *_: self.stopping.set())
+
+        # One service for all threads: the Twilio client and its connection pool are shared
+        service = WhatsAppService()
+
+        def send(message):
+            return send_message(service, message)
+
+        concurrency = max(options['concurrency'], 1)
+        totals = {'sent': 0, 'retry': 0, 'failed': 0}
+        self.stdout.write(f'WhatsApp worker started ({concurrency} concurrent sends)')
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='whatsapp') as pool:
+            while not self.stopping.is_set():
+                close_old_connections()
+                batch = claim_batch(max(options['batch_size'], 1))
+                if not batch:
+                    if options['once']:
+                        break
+                    self.stopping.wait(options['poll_interval'])
+                    continue
+
+                for outcome in process_batch(pool, send, batch):
+                    totals[outcome] += 1
+                self.stdout.write(
+                    f'{len(batch)} processed: {totals["sent"]} sent, {totals["retry"]} retrying, {totals["failed"]} failed so far'
+                )
+
+        close_old_connections()
+        self.stdout.write(self.style.SUCCESS(
+            f'WhatsApp worker stopped: {totals["sent"]} sent, {totals["retry"]} retrying, {totals["failed"]} failed'
+        ))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 03:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_application_rejection_reason'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['-applied_date', '-id'], name='core_app_applied_id_idx'),
+        ),
+    ]
@@ -0,0 +1,99 @@
+from django.db import migrations
+
+# Generated column: Postgres keeps it up to date on every INSERT/UPDATE
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """ALTER TABLE core_application ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(surname, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(email, '') || ' ' || translate(coalesce(email, ''), '@.', '  ')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(id_number, '') || ' ' || coalesce(course_title, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX core_app_search_vector_gin ON core_application USING gin (search_vector)",
+    r"""CREATE INDEX core_app_mobile_digits_trgm ON core_application
+        USING gin (regexp_replace(mobile, '\D', '', 'g') gin_trgm_ops)""",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS core_app_mobile_digits_trgm",
+    "DROP INDEX IF EXISTS core_app_search_vector_gin",
+    "ALTER TABLE core_application DROP COLUMN IF EXISTS search_vector",
+]
+
+# FTS5 shadow table kept in sync by triggers. Written out here so the migration
+# doesn't change when core.services.search does; that module repairs the
+# triggers on post_migrate (SQLite drops them whenever the table is remade).
+SQLITE_FTS_COLUMNS = "rowid, name, surname, email, mobile_digits, id_number, course_title"
+
+
+def _sqlite_fts_values(row):
+    return (
+        f"{row}.id, coalesce({row}.name, ''), coalesce({row}.surname, ''), coalesce({row}.email, ''), "
+        f"replace(replace(replace(replace(replace(coalesce({row}.mobile, ''), "
+        f"' ', ''), '-', ''), '+', ''), '(', ''), ')', ''), "
+        f"coalesce({row}.id_number, ''), coalesce({row}.course_title, '')"
+    )
+
+
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS core_application_fts USING fts5(
+        name, surname, email, mobile_digits, id_number, course_title,
+        tokenize = "unicode61 remove_diacritics 2"
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_application_fts_insert AFTER INSERT ON core_application BEGIN
+        INSERT INTO core_application_fts({SQLITE_FTS_COLUMNS}) VALUES ({_sqlite_fts_values('new')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS core_application_fts_update AFTER UPDATE ON core_application BEGIN
+        DELETE FROM core_application_fts WHERE rowid = old.id;
+        INSERT INTO core_application_fts({SQLITE_FTS_COLUMNS}) VALUES ({_sqlite_fts_values('new')});
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS core_application_fts_delete AFTER DELETE ON core_application BEGIN
+        DELETE FROM core_application_fts WHERE rowid = old.id;
+    END""",
+    "DELETE FROM core_application_fts",
+    f"""INSERT INTO core_application_fts({SQLITE_FTS_COLUMNS})
+        SELECT {_sqlite_fts_values('core_application')} FROM core_application""",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS core_application_fts_insert",
+    "DROP TRIGGER IF EXISTS core_application_fts_update",
+    "DROP TRIGGER IF EXISTS core_application_fts_delete",
+    "DROP TABLE IF EXISTS core_application_fts",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement, params=None)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+    elif vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                # Searches fall back to icontains
+                return
+        _run(schema_editor, SQLITE_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_REVERSE)
+    elif vendor == 'sqlite':
+        _run(schema_editor, SQLITE_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_application_applied_date_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2 on 2026-10-17 03:59
+
+from django.db import migrations, models
+
+from core.utils.uploads import APPLICATION_DOCUMENT_FIELDS, document_metadata
+
+
+def backfill_document_metadata(apps, schema_editor):
+    """Describe documents uploaded before metadata was recorded (reads each file once)"""
+    Application = apps.get_model('core', 'Application')
+    for application in Application.objects.only('pk', *APPLICATION_DOCUMENT_FIELDS).iterator():
+        metadata = {}
+        for field in APPLICATION_DOCUMENT_FIELDS:
+            doc = getattr(application, field)
+            if not doc:
+                continue
+            try:
+                metadata[field] = document_metadata(doc, doc.name)
+                doc.close()
+            except OSError:
+                # Missing on disk; the serializers report size 0 as before
+                continue
+        if metadata:
+            Application.objects.filter(pk=application.pk).update(document_metadata=metadata)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_application_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='document_metadata',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(backfill_document_metadata, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 04:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='course_pdf_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
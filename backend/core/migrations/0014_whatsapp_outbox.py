@@ -0,0 +1,44 @@
+# Generated by Django 4.2 on 2026-10-17 04:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_course_pdf_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WhatsAppMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('approval', 'Approval'), ('approval_followup', 'Approval follow-up'), ('rejection', 'Rejection'), ('rejection_followup', 'Rejection follow-up')], max_length=30)),
+                ('to_number', models.CharField(max_length=40)),
+                ('body', models.TextField(blank=True)),
+                ('content_sid', models.CharField(blank=True, help_text='Pre-approved template, sent instead of body', max_length=64)),
+                ('content_variables', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, help_text='When a worker claimed it', null=True)),
+                ('twilio_sid', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('application', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='whatsapp_messages', to='core.application')),
+                ('depends_on', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dependents', to='core.whatsappmessage')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='whatsappmessage',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='core_wa_due_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-17 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_broadcasts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sid', models.CharField(max_length=64, unique=True)),
+                ('status', models.CharField(max_length=20)),
+                ('error_code', models.CharField(blank=True, max_length=10)),
+                ('to_number', models.CharField(blank=True, max_length=40)),
+                ('reported_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name_plural': 'Message deliveries',
+                'ordering': ['-reported_at'],
+            },
+        ),
+    ]
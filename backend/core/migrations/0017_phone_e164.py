@@ -0,0 +1,27 @@
+# Generated by Django 4.2 on 2026-10-17 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_message_delivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='mobile_e164',
+            field=models.CharField(blank=True, editable=False, help_text='Mobile in E.164 form, set on save', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='phone_e164',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Phone in E.164 form, set on save', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['mobile_e164'], name='core_app_mobile_e164_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-17 04:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_phone_e164'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(choices=[('whatsapp_approval', 'WhatsApp approval follow-up'), ('whatsapp_rejection', 'WhatsApp rejection follow-up'), ('broadcast_whatsapp', 'Broadcast (WhatsApp)'), ('broadcast_email', 'Broadcast (email)')], max_length=40, unique=True)),
+                ('body', models.TextField(help_text='Placeholders like {course_name} are filled in when sending')),
+                ('is_active', models.BooleanField(default=True, help_text='Untick to fall back to the default text')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['key'],
+            },
+        ),
+    ]
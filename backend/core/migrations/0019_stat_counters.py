@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-17 04:49
+
+from django.db import migrations, models
+
+
+def seed_counters(apps, schema_editor):
+    """Start the counters from the rows already there"""
+    Application = apps.get_model('core', 'Application')
+    Course = apps.get_model('core', 'Course')
+    Student = apps.get_model('core', 'Student')
+    StatCounter = apps.get_model('core', 'StatCounter')
+    counts = {
+        'total': Application.objects.count(),
+        'pending': Application.objects.filter(status='pending').count(),
+        'approved': Application.objects.filter(status='approved').count(),
+        'rejected': Application.objects.filter(status='rejected').count(),
+        'fee_verified': Application.objects.filter(fee_verified=True).count(),
+        'students': Student.objects.count(),
+        'active_courses': Course.objects.filter(is_active=True).count(),
+    }
+    StatCounter.objects.bulk_create([StatCounter(name=name, value=value) for name, value in counts.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_message_template'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatCounter',
+            fields=[
+                ('name', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
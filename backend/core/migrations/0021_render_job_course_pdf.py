@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 04:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_render_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='renderjob',
+            name='kind',
+            field=models.CharField(choices=[('image_variants', 'Image variants'), ('course_pdf', 'Course outline PDF')], max_length=30),
+        ),
+    ]
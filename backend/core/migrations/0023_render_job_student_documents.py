@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 05:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_content_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='renderjob',
+            name='kind',
+            field=models.CharField(choices=[('image_variants', 'Image variants'), ('course_pdf', 'Course outline PDF'), ('acceptance_letter', 'Student acceptance letter'), ('certificate', 'Student completion certificate')], max_length=30),
+        ),
+    ]
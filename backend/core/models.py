@@ -1,8 +1,10 @@
 import os
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator, FileExtensionValidator
+from django.core.exceptions import ValidationError
 from django.utils import timezone
+from .utils.phone_numbers import DEFAULT_COUNTRY, normalize_phone
 
 # ========== FILE UPLOAD PATHS ==========
 def id_document_upload_path(instance, filename):
@@ -21,8 +23,64 @@ def additional_document_upload_path(instance, filename):
     """Upload path for additional documents"""
     return f'applications/additional/{instance.document_type}/{timezone.now().year}/{timezone.now().month:02d}/{timezone.now().day:02d}/{filename}'
 
+# ========== STATS COUNTERS ==========
+class CountedModel(models.Model):
+    """
+    A model whose rows feed the StatCounter totals. save() moves them in the
+    same transaction, from the counted fields as loaded to the saved ones;
+    deletes are handled by core.signals.
+    """
+    
+    class Meta:
+        abstract = True
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        from .services.stats import counted_values
+        
+        instance = super().from_db(db, field_names, values)
+        instance._counted_values = counted_values(instance)
+        return instance
+    
+    def refresh_from_db(self, *args, **kwargs):
+        from .services.stats import counted_values
+        
+        super().refresh_from_db(*args, **kwargs)
+        self._counted_values = counted_values(self)
+    
+    def save(self, *args, **kwargs):
+        from .services.stats import COUNTED_MODELS, record_save
+        
+        fields, _ = COUNTED_MODELS[self._meta.label_lower]
+        with transaction.atomic():
+            old_values = None if self._state.adding else getattr(self, '_counted_values', None)
+            if old_values is None and self.pk is not None:
+                # Built by hand with a pk, or loaded with the fields deferred: read what is stored
+                old_values = type(self).objects.filter(pk=self.pk).values('pk', *fields).first()
+            super().save(*args, **kwargs)
+            self._counted_values = record_save(self, old_values, kwargs.get('update_fields'))
+
+
+class StatCounter(models.Model):
+    """A running total behind the stats endpoints, kept by core.services.stats"""
+    name = models.CharField(max_length=40, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class ModelVersion(models.Model):
+    """Version of a model's cached API responses, bumped by core.utils.response_cache on every change"""
+    label = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField()
+    
+    def __str__(self):
+        return f"{self.label}: {self.version}"
+
+
 # ========== COURSE MODELS ==========
-class Course(models.Model):
+class Course(CountedModel):
     LEVEL_CHOICES = [
         ('beginner', 'Beginner'),
         ('intermediate', 'Intermediate'),
@@ -57,6 +115,8 @@ class Course(models.Model):
     # PDF download for course outline
     course_pdf = models.FileField(upload_to='course_pdfs/', blank=True, null=True, help_text="PDF file with full course details")
     course_pdf_url = models.CharField(max_length=500, blank=True, help_text="External PDF URL or static file path")
+    # Hash of the fields rendered into a generated course_pdf (core.services.course_pdfs)
+    course_pdf_hash = models.CharField(max_length=64, blank=True, editable=False)
     
     # Status and display
     is_featured = models.BooleanField(default=False)
@@ -66,6 +126,8 @@ class Course(models.Model):
     # Images
     image = models.ImageField(upload_to='courses/', blank=True, null=True)
     image_url = models.URLField(blank=True, help_text="External image URL if not uploading")
+    # Resized WebP/JPEG renditions of image, recorded by core.services.image_variants
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     # Metadata
     display_order = models.IntegerField(default=0, help_text="Order in which courses are displayed")
@@ -89,10 +151,14 @@ class Course(models.Model):
     def get_course_pdf_url(self):
         """Get course PDF URL - prefer uploaded file over URL"""
         if self.course_pdf:
+            # Generated outlines are named by content hash, so this is always the current one
             return self.course_pdf.url
         elif self.course_pdf_url:
             if self.course_pdf_url.startswith('/'):
-                return f'http://localhost:8000{self.course_pdf_url}'
+                from .utils.static_files import static_url
+                
+                # Content-hashed URL, served by the static layer with an immutable Cache-Control
+                return f'http://localhost:8000{static_url(self.course_pdf_url)}'
             return self.course_pdf_url
         return None
 
@@ -119,7 +185,7 @@ class CourseRequirement(models.Model):
         ordering = ['order']
 
 # ========== APPLICATION MODEL ==========
-class Application(models.Model):
+class Application(CountedModel):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('approved', 'Approved'),
@@ -160,6 +226,7 @@ class Application(models.Model):
     age = models.IntegerField()
     country = models.CharField(max_length=100, choices=COUNTRIES, default='South Africa')
     mobile = models.CharField(max_length=20)
+    mobile_e164 = models.CharField(max_length=16, blank=True, editable=False, help_text="Mobile in E.164 form, set on save")
     email = models.EmailField()
     id_number = models.CharField(max_length=50, blank=True, null=True, help_text="ID or Passport number")
     address = models.TextField(blank=True, help_text="Physical address")
@@ -215,54 +282,37 @@ class Application(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     fee_verified = models.BooleanField(default=False)
     applied_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     notes = models.TextField(blank=True, help_text="Admin notes")
     
+    # Per-document size, content type, SHA-256 and original filename, recorded when stored
+    document_metadata = models.JSONField(default=dict, blank=True, editable=False)
+    
     def save(self, *args, **kwargs):
         """Save application with course mapping - FIXED"""
-        print(f"🔍 Application.save() - Course: {self.course}, form_course_id: {self.form_course_id}")
+        print(f"🔍 Application.save() - Course ID: {self.course_id}, form_course_id: {self.form_course_id}")
         
         # Try to find course by form_course_id if course is not set
-        if not self.course and self.form_course_id:
-            try:
-                # Map form course IDs to actual Course objects
-                course_mapping = {
-                    'automotive_engine_repairer': 'Automotive Engine Repairer',
-                    'automotive_clutch_brake_repairer': 'Automotive Clutch and Brake Repairer',
-                    'automotive_suspension_fitter': 'Automotive Suspension Fitter',
-                    'automotive_workshop_assistant': 'Automotive Workshop Assistant',
-                }
-                
-                if self.form_course_id in course_mapping:
-                    course_title = course_mapping[self.form_course_id]
-                    print(f"🔍 Looking for course with title containing: {course_title}")
-                    
-                    # Try contains first
-                    course = Course.objects.filter(title__icontains=course_title).first()
-                    
-                    # If not found, try exact match
-                    if not course:
-                        course = Course.objects.filter(title=course_title).first()
-                    
-                    if course:
-                        self.course = course
-                        self.course_title = course.title
-                        print(f"✅ SUCCESS: Set course to: {course.title} (ID: {course.id})")
-                    else:
-                        print(f"⚠️ WARNING: No course found for: {course_title}")
-                        
-                        # List all available courses for debugging
-                        all_courses = Course.objects.all()
-                        print(f"📚 Available courses: {[c.title for c in all_courses]}")
-            except Exception as e:
-                print(f"❌ Error in save method: {e}")
+        if not self.course_id and self.form_course_id:
+            from .services.course_resolver import course_resolver
+            
+            course = course_resolver.resolve(self.form_course_id)
+            if course:
+                self.course = course
+                self.course_title = course.title
+                print(f"✅ SUCCESS: Set course to: {course.title} (ID: {course.id})")
+            else:
+                print(f"⚠️ WARNING: No course found for: {self.form_course_id}")
         
         # Automatically set course_title from course if not set
-        if not self.course_title and self.course:
+        if not self.course_title and self.course_id:
             self.course_title = self.course.title
             print(f"📝 Set course_title from course: {self.course_title}")
         
+        self.mobile_e164 = normalize_phone(self.mobile, self.country)
+        self.sync_document_metadata()
         super().save(*args, **kwargs)
-        print(f"✅ Application {self.id} saved with course: {self.course}")
+        print(f"✅ Application {self.id} saved with course: {self.course_title}")
     
     @property
     def documents_status(self):
@@ -287,22 +337,45 @@ class Application(models.Model):
             return doc.url
         return None
     
+    def sync_document_metadata(self):
+        """
+        Record metadata for documents uploaded with this save. Stored files are
+        never read here: one whose name no longer matches its metadata (assigned
+        directly, or from before metadata was kept) loses the stale entry, and
+        backfill_document_metadata describes it.
+        """
+        from .utils.uploads import APPLICATION_DOCUMENT_FIELDS, document_metadata
+        
+        metadata = dict(self.document_metadata or {})
+        for field in APPLICATION_DOCUMENT_FIELDS:
+            doc = getattr(self, field)
+            if not doc:
+                metadata.pop(field, None)
+            elif not doc._committed:
+                # Regular (non-streamed) upload, e.g. from the admin: store it now so the final name is known
+                upload = doc.file
+                info = document_metadata(upload, upload.name)
+                doc.save(upload.name, upload, save=False)
+                info['name'] = doc.name
+                metadata[field] = info
+            elif metadata.get(field, {}).get('name') != doc.name:
+                metadata.pop(field, None)
+        self.document_metadata = metadata
+    
     def get_document_info(self, document_field, request=None):
-        """Get document information with full URL"""
+        """Get document information with full URL, read from the recorded metadata"""
         doc = getattr(self, document_field, None)
-        if doc and hasattr(doc, 'name'):
-            info = {
+        if doc:
+            metadata = self.document_metadata.get(document_field, {})
+            return {
+                'url': request.build_absolute_uri(doc.url) if request else doc.url,
                 'name': os.path.basename(doc.name),
-                'size': doc.size if hasattr(doc, 'size') else 0,
+                'original_name': metadata.get('original_name', os.path.basename(doc.name)),
+                'size': metadata.get('size', 0),
+                'content_type': metadata.get('content_type'),
+                'sha256': metadata.get('sha256'),
                 'uploaded_at': self.applied_date,
             }
-            
-            if hasattr(doc, 'url'):
-                if request:
-                    info['url'] = request.build_absolute_uri(doc.url)
-                else:
-                    info['url'] = doc.url
-            return info
         return None
     
     def __str__(self):
@@ -310,8 +383,27 @@ class Application(models.Model):
     
     class Meta:
         ordering = ['-applied_date']
+        indexes = [
+            # Keyset pagination of the applications list (core.pagination)
+            models.Index(fields=['-applied_date', '-id'], name='core_app_applied_id_idx'),
+            # Status / fee filters on the API and admin, already in list order
+            models.Index(fields=['status', '-applied_date', '-id'], name='core_app_status_applied_idx'),
+            models.Index(fields=['fee_verified', '-applied_date', '-id'], name='core_app_fee_applied_idx'),
+            # Review queue: only pending rows, so it stays small as the table grows
+            models.Index(
+                fields=['-applied_date', '-id'],
+                name='core_app_pending_idx',
+                condition=models.Q(status='pending'),
+            ),
+            # Per-course counts (CourseAdmin) and the admin course filter
+            models.Index(fields=['course', 'status'], name='core_app_course_status_idx'),
+            # Duplicate-applicant checks
+            models.Index(fields=['email'], name='core_app_email_idx'),
+            models.Index(fields=['mobile'], name='core_app_mobile_idx'),
+            models.Index(fields=['mobile_e164'], name='core_app_mobile_e164_idx'),
+        ]
 
-class Student(models.Model):
+class Student(CountedModel):
     STATUS_CHOICES = [
         ('enrolled', 'Enrolled'),
         ('completed', 'Completed'),
@@ -328,6 +420,7 @@ class Student(models.Model):
     surname = models.CharField(max_length=100)
     email = models.EmailField()
     phone = models.CharField(max_length=20, blank=True)
+    phone_e164 = models.CharField(max_length=16, blank=True, editable=False, db_index=True, help_text="Phone in E.164 form, set on save")
     course = models.ForeignKey(Course, on_delete=models.SET_NULL, null=True, related_name='students')
     
     # Enrollment details
@@ -338,10 +431,26 @@ class Student(models.Model):
     address = models.TextField(blank=True)
     
     def save(self, *args, **kwargs):
-        if not self.student_id and self.application:
-            self.student_id = f'STU{self.application.id:04d}'
+        if not self.student_id and self.application_id:
+            self.student_id = f'STU{self.application_id:04d}'
+        self.phone_e164 = normalize_phone(self.phone, self.phone_country) if self.phone else ''
         super().save(*args, **kwargs)
     
+    @property
+    def phone_country(self):
+        """
+        Country used to read a local phone number: the one given on the
+        application. Taken from the application if it is loaded (use
+        select_related('application') when saving many); otherwise only that
+        column is read.
+        """
+        if not self.application_id:
+            return DEFAULT_COUNTRY
+        if Student.application.is_cached(self):
+            return self.application.country
+        country = Application.objects.filter(pk=self.application_id).values_list('country', flat=True).first()
+        return country or DEFAULT_COUNTRY
+    
     def __str__(self):
         return f"{self.name} {self.surname} - {self.course.title if self.course else 'No Course'}"
     
@@ -356,11 +465,14 @@ class TeamMember(models.Model):
     email = models.EmailField(blank=True)
     phone = models.CharField(max_length=20, blank=True)
     image = models.ImageField(upload_to='team/')
+    # Resized WebP/JPEG renditions of image, recorded by core.services.image_variants
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     order = models.IntegerField(default=0, help_text="Display order")
     is_active = models.BooleanField(default=True)
     facebook = models.URLField(blank=True)
     twitter = models.URLField(blank=True)
     linkedin = models.URLField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.name} - {self.position}"
@@ -380,8 +492,11 @@ class GalleryImage(models.Model):
     title = models.CharField(max_length=200, default='Untitled')
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='gallery/')
+    # Resized WebP/JPEG renditions of image, recorded by core.services.image_variants
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, default='event')
     upload_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
     
     def __str__(self):
@@ -408,6 +523,8 @@ class NewsPost(models.Model):
     preview_text = models.CharField(max_length=300, blank=True)
     content = models.TextField()
     image = models.ImageField(upload_to='news/', blank=True, null=True)
+    # Resized WebP/JPEG renditions of image, recorded by core.services.image_variants
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_published = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -451,6 +568,7 @@ class Testimonial(models.Model):
     )
     is_featured = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.student_name} - {self.rating} stars"
@@ -464,11 +582,227 @@ class Video(models.Model):
     video_file = models.FileField(upload_to='videos/', blank=True, null=True, help_text="Upload video file")
     video_url = models.URLField(blank=True, help_text="YouTube or other video URL")
     thumbnail = models.ImageField(upload_to='videos/thumbnails/', blank=True, null=True)
+    # Resized WebP/JPEG renditions of thumbnail, recorded by core.services.image_variants
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.title
     
     class Meta:
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+
+# ========== WHATSAPP OUTBOX ==========
+class WhatsAppMessage(models.Model):
+    """A queued WhatsApp message, written with the change that caused it and sent by run_whatsapp_worker"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    KIND_CHOICES = [
+        ('approval', 'Approval'),
+        ('approval_followup', 'Approval follow-up'),
+        ('rejection', 'Rejection'),
+        ('rejection_followup', 'Rejection follow-up'),
+    ]
+    
+    application = models.ForeignKey(Application, on_delete=models.SET_NULL, null=True, blank=True, related_name='whatsapp_messages')
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    to_number = models.CharField(max_length=40)
+    body = models.TextField(blank=True)
+    content_sid = models.CharField(max_length=64, blank=True, help_text="Pre-approved template, sent instead of body")
+    content_variables = models.JSONField(default=dict, blank=True)
+    # Only sent once this message has been sent; failed with it otherwise
+    depends_on = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='dependents')
+    
+    # Delivery state
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True, help_text="When a worker claimed it")
+    twilio_sid = models.CharField(max_length=64, blank=True, db_index=True)
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} to {self.to_number} ({self.status})"
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='core_wa_due_idx'),
+        ]
+
+
+class MessageDelivery(models.Model):
+    """The latest delivery status Twilio reported for a message SID, upserted in batches (core.services.delivery_status)"""
+    sid = models.CharField(max_length=64, unique=True)
+    status = models.CharField(max_length=20)
+    error_code = models.CharField(max_length=10, blank=True)
+    to_number = models.CharField(max_length=40, blank=True)
+    reported_at = models.DateTimeField()
+    
+    def __str__(self):
+        return f"{self.sid}: {self.status}"
+    
+    class Meta:
+        ordering = ['-reported_at']
+        verbose_name_plural = 'Message deliveries'
+
+
+# ========== NOTIFICATION TEMPLATES ==========
+class MessageTemplate(models.Model):
+    """Edited text of a notification; overrides the default in core.services.notification_templates"""
+    KEY_CHOICES = [
+        ('whatsapp_approval', 'WhatsApp approval follow-up'),
+        ('whatsapp_rejection', 'WhatsApp rejection follow-up'),
+        ('broadcast_whatsapp', 'Broadcast (WhatsApp)'),
+        ('broadcast_email', 'Broadcast (email)'),
+    ]
+    
+    key = models.CharField(max_length=40, choices=KEY_CHOICES, unique=True)
+    body = models.TextField(help_text="Placeholders like {course_name} are filled in when sending")
+    is_active = models.BooleanField(default=True, help_text="Untick to fall back to the default text")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return self.get_key_display()
+    
+    def clean(self):
+        from core.services.notification_templates import CompiledTemplate, TemplateError
+        try:
+            CompiledTemplate.compile(self.key, self.body)
+        except TemplateError as e:
+            raise ValidationError({'body': str(e)})
+    
+    class Meta:
+        ordering = ['key']
+
+
+# ========== BROADCASTS ==========
+class Broadcast(models.Model):
+    """A message sent once to a whole audience over WhatsApp and/or email, by run_broadcasts"""
+    AUDIENCE_CHOICES = [
+        ('newsletter', 'Newsletter subscribers'),
+        ('students', 'Students'),
+        ('pending_applicants', 'Pending applicants'),
+    ]
+    STATUS_CHOICES = [
+        ('draft', 'Draft'),
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('cancelled', 'Cancelled'),
+    ]
+    
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    sender = models.CharField(max_length=100, default='Admin')
+    
+    # Audience
+    audience = models.CharField(max_length=30, choices=AUDIENCE_CHOICES)
+    course = models.ForeignKey(Course, on_delete=models.SET_NULL, null=True, blank=True, related_name='broadcasts',
+                               help_text="Only students/applicants of this course")
+    student_status = models.CharField(max_length=20, choices=Student.STATUS_CHOICES, blank=True,
+                                      help_text="Only students with this status")
+    send_whatsapp = models.BooleanField(default=True)
+    send_email = models.BooleanField(default=True)
+    
+    # Progress
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
+    recipient_count = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last progress from the dispatcher")
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True, help_text="When sending started")
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.title} ({self.get_audience_display()})"
+    
+    class Meta:
+        ordering = ['-created_at']
+
+
+class BroadcastRecipient(models.Model):
+    """One address a broadcast goes to; the audience is snapshotted when sending starts"""
+    CHANNEL_CHOICES = [
+        ('whatsapp', 'WhatsApp'),
+        ('email', 'Email'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+        ('skipped', 'Skipped'),
+    ]
+    
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name='deliveries')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES)
+    address = models.CharField(max_length=254)
+    name = models.CharField(max_length=200, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    twilio_sid = models.CharField(max_length=64, blank=True, db_index=True)
+    error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.get_channel_display()} to {self.address} ({self.status})"
+    
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['broadcast', 'channel', 'address'], name='core_broadcast_recipient_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['broadcast', 'status'], name='core_broadcast_status_idx'),
+        ]
+
+
+# ========== RENDER JOBS ==========
+class RenderJob(models.Model):
+    """Rendering queued by the save that needs it (see core.services.render_jobs) and done by run_render_worker"""
+    KIND_CHOICES = [
+        ('image_variants', 'Image variants'),
+        ('course_pdf', 'Course outline PDF'),
+        ('acceptance_letter', 'Student acceptance letter'),
+        ('certificate', 'Student completion certificate'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    label = models.CharField(max_length=100, help_text="Model of the row to render, e.g. core.course")
+    object_id = models.BigIntegerField()
+    
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True, help_text="When a worker claimed it")
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.label} #{self.object_id} ({self.status})"
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='core_render_due_idx'),
+        ]
@@ -0,0 +1,166 @@
+import base64
+from urllib import parse
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset (seek) pagination on a (timestamp, id) pair, newest first.
+
+    Each page is a single indexed range scan of ``page_size + 1`` rows, so the
+    cost doesn't grow with the table, and there is no COUNT. Rows inserted while
+    a client is paging land in front of the first page and never shift or
+    duplicate the rows behind an existing cursor.
+
+    Querysets annotated with ``search_rank`` (core.services.search) are ordered
+    by relevance instead and paged by offset; search result sets are small.
+    """
+    timestamp_field = 'applied_date'
+    rank_field = 'search_rank'
+    page_size = getattr(settings, 'APPLICATIONS_PAGE_SIZE', 50)
+    max_page_size = getattr(settings, 'APPLICATIONS_MAX_PAGE_SIZE', 200)
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if value:
+            try:
+                size = int(value)
+            except ValueError:
+                size = 0
+            if size > 0:
+                return min(size, self.max_page_size)
+        return self.page_size
+
+    # ----- cursor encoding -----
+    def encode_tokens(self, tokens):
+        querystring = parse.urlencode(tokens)
+        encoded = base64.urlsafe_b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_tokens(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            querystring = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('ascii')
+            return parse.parse_qs(querystring, keep_blank_values=True)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse):
+        timestamp = getattr(row, self.timestamp_field)
+        return self.encode_tokens({'t': timestamp.isoformat(), 'i': row.pk, 'r': int(reverse)})
+
+    def decode_cursor(self, request):
+        tokens = self.decode_tokens(request)
+        if tokens is None:
+            return None
+        try:
+            timestamp = parse_datetime(tokens['t'][0])
+            pk = int(tokens['i'][0])
+            reverse = bool(int(tokens['r'][0]))
+        except (TypeError, ValueError, KeyError, IndexError):
+            raise NotFound(self.invalid_cursor_message)
+        if timestamp is None:
+            raise NotFound(self.invalid_cursor_message)
+        return timestamp, pk, reverse
+
+    # ----- pagination -----
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = remove_query_param(request.build_absolute_uri(), self.cursor_query_param)
+        self.page_size = self.get_page_size(request)
+        if self.rank_field in queryset.query.annotations:
+            return self.paginate_ranked(queryset, request)
+        self.offset = None
+        field = self.timestamp_field
+        cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            reverse = False
+            queryset = queryset.order_by(f'-{field}', '-pk')
+        else:
+            timestamp, pk, reverse = cursor
+            if reverse:
+                # Walking back towards newer rows
+                queryset = queryset.filter(
+                    Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'pk__gt': pk})
+                ).order_by(field, 'pk')
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'pk__lt': pk})
+                ).order_by(f'-{field}', '-pk')
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = rows
+        return rows
+
+    def paginate_ranked(self, queryset, request):
+        tokens = self.decode_tokens(request) or {}
+        try:
+            self.offset = max(int(tokens.get('o', ['0'])[0]), 0)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        queryset = queryset.order_by(f'-{self.rank_field}', f'-{self.timestamp_field}', '-pk')
+        rows = list(queryset[self.offset:self.offset + self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.has_previous = self.offset > 0
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        if self.offset is not None:
+            return self.encode_tokens({'o': self.offset + self.page_size})
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.offset is not None:
+            return self.encode_tokens({'o': max(self.offset - self.page_size, 0)})
+        if not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'page_size': self.page_size,
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+
+class ApplicationCursorPagination(KeysetCursorPagination):
+    """Newest applications first, keyed on (applied_date, id)"""
+    timestamp_field = 'applied_date'
@@ -1,14 +1,35 @@
+from django.core.files.storage import default_storage
 from rest_framework import serializers
 from .models import (
     Course, CourseRequirement, Application, Student, 
     TeamMember, GalleryImage, Newsletter, NewsPost,
-    DirectorMessage, Testimonial, Video
+    DirectorMessage, Testimonial, Video, Broadcast
 )
-import os
+from .services.course_resolver import course_resolver
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Responsive renditions recorded in ``image_variants`` as srcset strings and per-width URLs"""
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        representation = {}
+        for fmt, renditions in (value or {}).get('variants', {}).items():
+            urls = {}
+            for width, name in renditions:
+                url = default_storage.url(name)
+                urls[width] = request.build_absolute_uri(url) if request else url
+            representation[fmt] = {
+                'srcset': ', '.join(f'{url} {width}w' for width, url in urls.items()),
+                'urls': urls,
+            }
+        return representation
+
 
 class CourseSerializer(serializers.ModelSerializer):
     course_pdf_url = serializers.SerializerMethodField()
     image_url = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = Course
@@ -34,6 +55,7 @@ class CourseSerializer(serializers.ModelSerializer):
             'course_pdf_url',
             'image',
             'image_url',
+            'image_variants',
             'is_math_required',
             'is_featured',
             'is_active',
@@ -64,7 +86,10 @@ class DocumentInfoSerializer(serializers.Serializer):
     """Serializer for document information"""
     url = serializers.CharField()
     name = serializers.CharField()
+    original_name = serializers.CharField()
     size = serializers.IntegerField()
+    content_type = serializers.CharField(allow_null=True)
+    sha256 = serializers.CharField(allow_null=True)
     uploaded_at = serializers.DateTimeField()
 
 class ApplicationDocumentsSerializer(serializers.ModelSerializer):
@@ -84,17 +109,8 @@ class ApplicationDocumentsSerializer(serializers.ModelSerializer):
         ]
     
     def get_document_info(self, obj, field_name):
-        """Helper method to get document information"""
-        doc = getattr(obj, field_name, None)
-        if doc and hasattr(doc, 'url'):
-            request = self.context.get('request')
-            return {
-                'url': request.build_absolute_uri(doc.url) if request else doc.url,
-                'name': os.path.basename(doc.name),
-                'size': doc.size if hasattr(doc, 'size') else 0,
-                'uploaded_at': obj.applied_date
-            }
-        return None
+        """Helper method to get document information (no storage access)"""
+        return obj.get_document_info(field_name, self.context.get('request'))
     
     def get_id_document(self, obj):
         return self.get_document_info(obj, 'id_document')
@@ -119,7 +135,7 @@ class ApplicationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Application
         fields = [
-            'id', 'name', 'surname', 'age', 'country', 'mobile', 'email',
+            'id', 'name', 'surname', 'age', 'country', 'mobile', 'mobile_e164', 'email',
             'id_number', 'address', 'education_level', 'previous_school', 
             'course', 'form_course_id', 'course_title', 'qualification', 'experience', 
             'message', 'id_document', 'matric_certificate', 'proof_of_payment',
@@ -144,36 +160,13 @@ class ApplicationSerializer(serializers.ModelSerializer):
         if form_course_id:
             print(f"🔍 Found form_course_id: {form_course_id}")
             
-            # Map form course IDs to actual Course titles
-            course_mapping = {
-                'automotive_engine_repairer': 'Automotive Engine Repairer',
-                'automotive_clutch_brake_repairer': 'Automotive Clutch and Brake Repairer',
-                'automotive_suspension_fitter': 'Automotive Suspension Fitter',
-                'automotive_workshop_assistant': 'Automotive Workshop Assistant',
-            }
-            
-            if form_course_id in course_mapping:
-                course_title = course_mapping[form_course_id]
-                try:
-                    # Try contains first
-                    course = Course.objects.filter(title__icontains=course_title).first()
-                    
-                    # If not found, try exact match
-                    if not course:
-                        course = Course.objects.filter(title=course_title).first()
-                    
-                    if course:
-                        data['course'] = course
-                        data['course_title'] = course.title
-                        print(f"✅ SUCCESS: Mapped to course: {course.title} (ID: {course.id})")
-                    else:
-                        print(f"⚠️ WARNING: No course found matching: {course_title}")
-                        
-                        # List all available courses for debugging
-                        all_courses = Course.objects.all()
-                        print(f"📚 Available courses: {[c.title for c in all_courses]}")
-                except Exception as e:
-                    print(f"❌ Error mapping course: {e}")
+            course = course_resolver.resolve(form_course_id)
+            if course:
+                data['course'] = course
+                data['course_title'] = course.title
+                print(f"✅ SUCCESS: Mapped to course: {course.title} (ID: {course.id})")
+            else:
+                print(f"⚠️ WARNING: No course found matching: {form_course_id}")
         
         # Set default status
         data['status'] = 'pending'
@@ -203,16 +196,8 @@ class ApplicationDetailSerializer(serializers.ModelSerializer):
         return obj.documents_status
     
     def get_document_info(self, obj, field_name):
-        """Helper method to get document information"""
-        doc = getattr(obj, field_name, None)
-        if doc and hasattr(doc, 'url'):
-            request = self.context.get('request')
-            return {
-                'url': request.build_absolute_uri(doc.url) if request else doc.url,
-                'name': os.path.basename(doc.name),
-                'size': doc.size if hasattr(doc, 'size') else 0,
-            }
-        return None
+        """Helper method to get document information (no storage access)"""
+        return obj.get_document_info(field_name, self.context.get('request'))
     
     def get_id_document_info(self, obj):
         return self.get_document_info(obj, 'id_document')
@@ -236,23 +221,26 @@ class StudentSerializer(serializers.ModelSerializer):
         model = Student
         fields = [
             'id', 'application', 'user', 'student_id', 'name', 'surname',
-            'email', 'phone', 'course', 'course_title', 'enrollment_date',
+            'email', 'phone', 'phone_e164', 'course', 'course_title', 'enrollment_date',
             'completion_date', 'status', 'certificate_id', 'address'
         ]
         read_only_fields = ['enrollment_date', 'student_id']
 
 class TeamMemberSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+    
     class Meta:
         model = TeamMember
         fields = ['id', 'name', 'position', 'bio', 'email', 'phone', 
-                 'image', 'order', 'is_active', 'facebook', 'twitter', 'linkedin']
+                 'image', 'image_variants', 'order', 'is_active', 'facebook', 'twitter', 'linkedin']
 
 class GalleryImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = GalleryImage
-        fields = ['id', 'title', 'description', 'image', 'image_url', 'category', 
+        fields = ['id', 'title', 'description', 'image', 'image_url', 'image_variants', 'category', 
                  'upload_date', 'is_active']
         read_only_fields = ['upload_date']
     
@@ -272,10 +260,11 @@ class NewsletterSerializer(serializers.ModelSerializer):
 
 class NewsPostSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = NewsPost
-        fields = ['id', 'title', 'preview_text', 'content', 'image', 'image_url',
+        fields = ['id', 'title', 'preview_text', 'content', 'image', 'image_url', 'image_variants',
                  'is_published', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at', 'image_url']
     
@@ -305,8 +294,34 @@ class TestimonialSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at']
 
 class VideoSerializer(serializers.ModelSerializer):
+    thumbnail_variants = ImageVariantsField(source='image_variants')
+    
     class Meta:
         model = Video
         fields = ['id', 'title', 'description', 'video_file', 'video_url', 
-                 'thumbnail', 'is_active', 'created_at']
-        read_only_fields = ['created_at']
\ No newline at end of file
+                 'thumbnail', 'thumbnail_variants', 'is_active', 'created_at']
+        read_only_fields = ['created_at']
+
+class BroadcastSerializer(serializers.ModelSerializer):
+    course_title = serializers.CharField(source='course.title', read_only=True, allow_null=True)
+    recipients = serializers.IntegerField(source='recipient_count', read_only=True)
+    
+    class Meta:
+        model = Broadcast
+        fields = [
+            'id', 'title', 'message', 'sender', 'audience', 'course', 'course_title', 'student_status',
+            'send_whatsapp', 'send_email', 'status', 'recipients', 'sent_count', 'failed_count',
+            'created_at', 'sent_at', 'finished_at'
+        ]
+        read_only_fields = ['status', 'sent_count', 'failed_count', 'created_at', 'sent_at', 'finished_at']
+    
+    def validate(self, data):
+        audience = data.get('audience', getattr(self.instance, 'audience', None))
+        if not data.get('send_whatsapp', getattr(self.instance, 'send_whatsapp', True)) and \
+                not data.get('send_email', getattr(self.instance, 'send_email', True)):
+            raise serializers.ValidationError("Choose at least one channel (WhatsApp or email).")
+        if data.get('student_status') and audience != 'students':
+            raise serializers.ValidationError({'student_status': "Only applies to the students audience."})
+        if data.get('course') and audience == 'newsletter':
+            raise serializers.ValidationError({'course': "Newsletter subscribers aren't linked to a course."})
+        return data
@@ -0,0 +1,248 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Count, F, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from core.models import Application, Broadcast, BroadcastRecipient, Newsletter, Student
+from core.services.notification_templates import contact_context, template_registry
+from core.services.whatsapp import WhatsAppSendError, WhatsAppService, format_whatsapp_number, sandbox_allows
+from core.utils.querysets import iter_chunks
+from core.utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+
+# ========== AUDIENCES ==========
+def audience_queryset(broadcast):
+    """The rows a broadcast goes to; contact_details() turns each into (name, email, phone)"""
+    if broadcast.audience == 'newsletter':
+        return Newsletter.objects.filter(is_active=True).only('pk', 'email')
+    if broadcast.audience == 'students':
+        queryset = Student.objects.only('pk', 'name', 'surname', 'email', 'phone', 'phone_e164')
+        if broadcast.student_status:
+            queryset = queryset.filter(status=broadcast.student_status)
+    elif broadcast.audience == 'pending_applicants':
+        queryset = Application.objects.filter(status='pending').only('pk', 'name', 'surname', 'email', 'mobile', 'mobile_e164')
+    else:
+        raise ValueError(f"Unknown broadcast audience: {broadcast.audience}")
+    if broadcast.course_id:
+        queryset = queryset.filter(course_id=broadcast.course_id)
+    return queryset
+
+
+def contact_details(contact):
+    if isinstance(contact, Newsletter):
+        return '', contact.email, ''
+    if isinstance(contact, Application):
+        phone = contact.mobile_e164 or contact.mobile
+    else:
+        phone = contact.phone_e164 or contact.phone
+    return f"{contact.name} {contact.surname}", contact.email, phone
+
+
+def whatsapp_address(phone):
+    return format_whatsapp_number(phone).removeprefix('whatsapp:')
+
+
+def audience_size(broadcast):
+    """{'contacts', 'email', 'whatsapp'} counts for a broadcast that hasn't been sent yet"""
+    counts = {'email': Count('pk', filter=~Q(email=''))}
+    phone_field = {'students': 'phone', 'pending_applicants': 'mobile'}.get(broadcast.audience)
+    if phone_field:
+        counts['whatsapp'] = Count('pk', filter=~Q(**{phone_field: ''}))
+    counts = audience_queryset(broadcast).aggregate(contacts=Count('pk'), **counts)
+    return {
+        'contacts': counts['contacts'],
+        'email': counts['email'] if broadcast.send_email else 0,
+        'whatsapp': counts.get('whatsapp', 0) if broadcast.send_whatsapp else 0,
+    }
+
+
+def snapshot_recipients(broadcast, batch_size):
+    """
+    Write one BroadcastRecipient per address, reading the audience in keyset
+    batches. Duplicate addresses collapse to one row, and re-running after a
+    crash only adds what is missing.
+    """
+    for chunk in iter_chunks(audience_queryset(broadcast), batch_size):
+        rows = []
+        for contact in chunk:
+            name, email, phone = contact_details(contact)
+            if broadcast.send_email and email:
+                rows.append(BroadcastRecipient(broadcast=broadcast, channel='email', address=email.strip().lower(), name=name))
+            if broadcast.send_whatsapp and phone.strip():
+                recipient = BroadcastRecipient(broadcast=broadcast, channel='whatsapp', address=whatsapp_address(phone), name=name)
+                if not sandbox_allows(phone):
+                    recipient.status = 'skipped'
+                    recipient.error = 'Sandbox mode: number is not in WHATSAPP_TEST_NUMBERS'
+                rows.append(recipient)
+        BroadcastRecipient.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+def update_counts(broadcast, **fields):
+    counts = broadcast.deliveries.aggregate(
+        total=Count('pk'),
+        sent=Count('pk', filter=Q(status='sent')),
+        failed=Count('pk', filter=Q(status='failed')),
+    )
+    Broadcast.objects.filter(pk=broadcast.pk).update(
+        recipient_count=counts['total'], sent_count=counts['sent'], failed_count=counts['failed'],
+        heartbeat_at=timezone.now(), **fields,
+    )
+
+
+# ========== DISPATCH ==========
+def claim_broadcast(lease=None):
+    """
+    Take the oldest queued broadcast, or one whose dispatcher stopped sending
+    heartbeats, and mark it 'sending'. None when there is nothing to do.
+    """
+    lease = lease or timedelta(seconds=settings.BROADCAST_LEASE_SECONDS)
+    now = timezone.now()
+    candidates = Broadcast.objects.filter(
+        Q(status='queued') | Q(status='sending', heartbeat_at__lt=now - lease)
+    ).order_by('created_at')
+    for broadcast in candidates[:10]:
+        claimed = Broadcast.objects.filter(
+            pk=broadcast.pk, status=broadcast.status, heartbeat_at=broadcast.heartbeat_at,
+        ).update(status='sending', heartbeat_at=now, sent_at=Coalesce(F('sent_at'), now))
+        if claimed:
+            broadcast.refresh_from_db()
+            return broadcast
+    return None
+
+
+class BroadcastDispatcher:
+    """
+    Sends claimed broadcasts. Recipients are read and recorded in batches on
+    the calling thread; a bounded thread pool does the sending, and one token
+    bucket per channel keeps all threads together under the provider limits.
+    """
+
+    def __init__(self, concurrency=None, batch_size=None, stop=None):
+        self.concurrency = max(concurrency or settings.BROADCAST_CONCURRENCY, 1)
+        self.batch_size = max(batch_size or settings.BROADCAST_BATCH_SIZE, 1)
+        self.max_attempts = settings.BROADCAST_MAX_ATTEMPTS
+        self.stop = stop or threading.Event()
+        self.buckets = {
+            'whatsapp': TokenBucket(settings.BROADCAST_WHATSAPP_RATE),
+            'email': TokenBucket(settings.BROADCAST_EMAIL_RATE),
+        }
+        self.whatsapp = WhatsAppService()
+        self._local = threading.local()
+        self._email_connections = []
+        self._connections_lock = threading.Lock()
+
+    def dispatch(self, broadcast):
+        """Send every pending recipient; returns the broadcast's final status"""
+        snapshot_recipients(broadcast, self.batch_size)
+        update_counts(broadcast)
+        messages = broadcast_templates(broadcast)
+
+        pending = broadcast.deliveries.filter(status='pending')
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='broadcast') as pool:
+            for chunk in iter_chunks(pending, self.batch_size):
+                if self.stop.is_set() or self._cancelled(broadcast):
+                    break
+                list(pool.map(lambda recipient: self.deliver(broadcast, recipient, messages), chunk))
+                BroadcastRecipient.objects.bulk_update(chunk, ['status', 'attempts', 'twilio_sid', 'error', 'sent_at'])
+                update_counts(broadcast)
+                logger.info(f"Broadcast {broadcast.pk}: {len(chunk)} more recipients processed")
+        self._close_email_connections()
+
+        if self._cancelled(broadcast):
+            return 'cancelled'
+        if pending.exists():
+            # Stopped early: hand it back so the next dispatcher resumes straight away
+            Broadcast.objects.filter(pk=broadcast.pk, status='sending').update(status='queued')
+            return 'queued'
+        update_counts(broadcast, status='sent', finished_at=timezone.now())
+        return 'sent'
+
+    def _cancelled(self, broadcast):
+        return Broadcast.objects.filter(pk=broadcast.pk, status='cancelled').exists()
+
+    def deliver(self, broadcast, recipient, messages):
+        """Send to one recipient, retrying transient errors; runs in a pool thread and never touches the database"""
+        bucket = self.buckets[recipient.channel]
+        for attempt in range(1, self.max_attempts + 1):
+            if not bucket.acquire(stop=self.stop):
+                return
+            recipient.attempts += 1
+            try:
+                if recipient.channel == 'whatsapp':
+                    body = messages['whatsapp'].render({'name': recipient.name})
+                    recipient.twilio_sid = self.whatsapp.send(recipient.address, body=body)
+                else:
+                    self._send_email(broadcast, recipient, messages['email'].render({'name': recipient.name}))
+            except WhatsAppSendError as e:
+                recipient.error = str(e)
+                if not e.retryable:
+                    break
+            except Exception as e:
+                recipient.error = str(e)
+                self._reset_email_connection()
+            else:
+                recipient.status = 'sent'
+                recipient.error = ''
+                recipient.sent_at = timezone.now()
+                return
+            if attempt < self.max_attempts:
+                # Back off the whole channel, not just this thread
+                delay = min(2 ** attempt, 30) * random.uniform(0.5, 1)
+                bucket.penalize(delay)
+                time.sleep(delay)
+        recipient.status = 'failed'
+        logger.warning(f"Broadcast {broadcast.pk}: {recipient.channel} to {recipient.address} failed: {recipient.error}")
+
+    # SMTP connections aren't thread-safe, so each pool thread keeps one open
+    def _email_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = get_connection(fail_silently=False)
+            # Opened here, so send() reuses it instead of connecting per message
+            connection.open()
+            with self._connections_lock:
+                self._email_connections.append(connection)
+        return connection
+
+    def _reset_email_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _close_email_connections(self):
+        with self._connections_lock:
+            for connection in self._email_connections:
+                connection.close()
+            self._email_connections.clear()
+        self._local = threading.local()
+
+    def _send_email(self, broadcast, recipient, body):
+        EmailMessage(
+            subject=broadcast.title, body=body, from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[recipient.address], connection=self._email_connection(),
+        ).send()
+
+
+def broadcast_templates(broadcast):
+    """
+    {channel: template} with everything but the recipient's {name} filled in,
+    so each send only renders that
+    """
+    context = {
+        **contact_context(), 'title': broadcast.title, 'message': broadcast.message, 'sender': broadcast.sender,
+    }
+    return {
+        'whatsapp': template_registry.get('broadcast_whatsapp').bind(context),
+        'email': template_registry.get('broadcast_email').bind(context),
+    }
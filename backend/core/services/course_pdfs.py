@@ -0,0 +1,99 @@
+import hashlib
+import json
+import logging
+from decimal import Decimal
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import models
+from django.utils import timezone
+from django.utils.text import slugify
+
+from core.utils.pdf_generator import CoursePDFGenerator
+from core.utils.response_cache import bump_model_version
+
+logger = logging.getLogger(__name__)
+
+# Course fields rendered into the outline; a change to any of them makes the PDF stale
+COURSE_PDF_FIELDS = (
+    'title', 'duration', 'level', 'credits', 'short_description', 'description',
+    'deposit_amount', 'monthly_payment', 'total_payment', 'assessment_fee', 'registration_fee',
+    'curriculum', 'prerequisites', 'requirements', 'career_opportunities',
+)
+# Bump when CoursePDFGenerator's layout changes so every cached outline is re-rendered
+COURSE_PDF_LAYOUT_VERSION = 1
+GENERATED_PDF_DIR = 'course_pdfs/generated/'
+
+
+def _field_value(course, name):
+    value = getattr(course, name)
+    field = course._meta.get_field(name)
+    if isinstance(field, models.DecimalField) and value is not None:
+        # A fresh instance may still hold the float default; the database returns Decimal
+        return format(Decimal(str(value)), f'.{field.decimal_places}f')
+    return str(value)
+
+
+def course_pdf_hash(course):
+    """SHA-256 of everything that feeds the course outline"""
+    payload = {field: _field_value(course, field) for field in COURSE_PDF_FIELDS}
+    payload['layout'] = COURSE_PDF_LAYOUT_VERSION
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def generated_pdf_name(course, digest):
+    return f'{GENERATED_PDF_DIR}{slugify(course.title) or "course"}-{digest[:16]}.pdf'
+
+
+def has_generated_pdf(course):
+    return bool(course.course_pdf) and course.course_pdf.name.startswith(GENERATED_PDF_DIR)
+
+
+def manages_pdf(course):
+    """
+    True when the outline is ours to generate: the course already uses a
+    generated PDF, or has no PDF at all. Uploaded files and hand-made static
+    outlines (course_pdf_url) are left alone.
+    """
+    if course.course_pdf:
+        return has_generated_pdf(course)
+    return not course.course_pdf_url
+
+
+def course_pdf_is_stale(course):
+    return course.course_pdf_hash != course_pdf_hash(course) or not has_generated_pdf(course)
+
+
+def refresh_course_pdf(course, force=False, content=None):
+    """
+    Point ``course`` at the outline for its current content, rendering it only
+    if no artefact with that hash exists yet. ``content`` is an outline already
+    rendered elsewhere (the batch mode of generate_course_pdfs). Returns True if
+    a PDF was written.
+    """
+    from core.models import Course
+
+    digest = course_pdf_hash(course)
+    name = generated_pdf_name(course, digest)
+    if not force and course.course_pdf_hash == digest and course.course_pdf.name == name:
+        return False
+
+    rendered = False
+    if force or not default_storage.exists(name):
+        if content is None:
+            content = CoursePDFGenerator.generate_course_pdf(course)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        name = default_storage.save(name, ContentFile(content))
+        rendered = True
+
+    previous = course.course_pdf.name if has_generated_pdf(course) else None
+    Course.objects.filter(pk=course.pk).update(course_pdf=name, course_pdf_hash=digest, updated_at=timezone.now())
+    course.course_pdf.name = name
+    course.course_pdf_hash = digest
+    bump_model_version(Course)
+
+    if previous and previous != name and not Course.objects.filter(course_pdf=previous).exists():
+        default_storage.delete(previous)
+    logger.info(f"Course {course.pk} outline -> {name} ({'rendered' if rendered else 'cached'})")
+    return rendered
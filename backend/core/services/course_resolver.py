@@ -0,0 +1,93 @@
+import copy
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.utils.text import slugify
+
+logger = logging.getLogger(__name__)
+
+# Course IDs sent by the React application form -> title fragment of the matching Course
+FORM_COURSE_TITLES = {
+    'automotive_engine_repairer': 'Automotive Engine Repairer',
+    'automotive_clutch_brake_repairer': 'Automotive Clutch and Brake Repairer',
+    'automotive_suspension_fitter': 'Automotive Suspension Fitter',
+    'automotive_workshop_assistant': 'Automotive Workshop Assistant',
+}
+
+
+class CourseResolver:
+    """
+    In-process index of form course IDs, slugs and titles -> Course.
+
+    The index is loaded with a single query and dropped whenever a Course is
+    saved or deleted in this process (see core.signals). Other workers pick up
+    changes after COURSE_RESOLVER_TTL seconds, or sooner on a lookup miss.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._built_at = 0.0
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'COURSE_RESOLVER_TTL', 300)
+
+    @property
+    def miss_refresh(self):
+        return getattr(settings, 'COURSE_RESOLVER_MISS_REFRESH', 10)
+
+    @staticmethod
+    def _key(value):
+        return str(value).strip().lower()
+
+    def _build(self):
+        from core.models import Course
+
+        courses = list(Course.objects.all())
+        index = {}
+        for course in courses:
+            # Earlier courses in the default ordering win, matching .first()
+            index.setdefault(self._key(course.title), course)
+            index.setdefault(slugify(course.title), course)
+
+        for form_id, title in FORM_COURSE_TITLES.items():
+            fragment = self._key(title)
+            match = next((c for c in courses if fragment in self._key(c.title)), None)
+            if match:
+                index.setdefault(form_id, match)
+            else:
+                logger.debug(f"No course found for form course ID {form_id!r} ({title})")
+
+        logger.info(f"Course resolver index built: {len(courses)} courses, {len(index)} keys")
+        return index
+
+    def _get_index(self, force=False):
+        with self._lock:
+            age = time.monotonic() - self._built_at
+            if force or self._index is None or age > self.ttl:
+                self._index = self._build()
+                self._built_at = time.monotonic()
+            return self._index
+
+    def invalidate(self):
+        """Drop the index; it is rebuilt on the next lookup"""
+        with self._lock:
+            self._index = None
+
+    def resolve(self, value):
+        """Return a Course for a form course ID, slug or title, or None"""
+        if not value:
+            return None
+        key = self._key(value)
+        course = self._get_index().get(key)
+        if course is None and time.monotonic() - self._built_at > self.miss_refresh:
+            # The course may have been added by another worker
+            course = self._get_index(force=True).get(key)
+        # Hand out a copy so callers can't mutate the shared instance
+        return copy.copy(course) if course is not None else None
+
+
+course_resolver = CourseResolver()
@@ -0,0 +1,218 @@
+"""
+Twilio delivery-status callbacks, upserted into MessageDelivery keyed on SID.
+
+Callbacks are collected per process and written in batches by a background
+thread: each flush is one multi-row INSERT ... ON CONFLICT DO UPDATE per
+chunk of SIDs, whose WHERE clause compares status ranks, so a late or
+concurrent callback can never move a message backwards (delivered -> sent),
+whichever worker writes it. The buffer is flushed when the worker exits
+(gunicorn.conf.py, and atexit); callbacks acknowledged in the last flush
+interval are only lost if the worker is killed outright, and Twilio does
+not resend them. WHATSAPP_STATUS_BUFFERED=False writes each callback
+before the webhook answers instead.
+"""
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import CharField, Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from twilio.request_validator import RequestValidator
+
+from core.models import MessageDelivery
+
+logger = logging.getLogger(__name__)
+
+# Later states outrank earlier ones, so a callback that arrives late never moves a message backwards
+STATUS_RANKS = {
+    'accepted': 0, 'scheduled': 0, 'queued': 1, 'sending': 2, 'sent': 3,
+    'delivered': 4, 'undelivered': 4, 'failed': 4, 'canceled': 4, 'read': 5,
+}
+
+
+def status_rank(status):
+    return STATUS_RANKS.get(status, -1)
+
+
+def valid_signature(request):
+    """True when the X-Twilio-Signature header matches, or when validation is off (no auth token)"""
+    if not settings.TWILIO_AUTH_TOKEN or not settings.TWILIO_VALIDATE_WEBHOOKS:
+        return True
+    url = settings.TWILIO_STATUS_CALLBACK_URL or request.build_absolute_uri()
+    validator = RequestValidator(settings.TWILIO_AUTH_TOKEN)
+    return validator.validate(url, request.POST.dict(), request.headers.get('X-Twilio-Signature', ''))
+
+
+def _rank_sql(column):
+    """SQL for status_rank(column); the statuses are our own constants, not request data"""
+    cases = ' '.join(f"WHEN '{status}' THEN {rank}" for status, rank in STATUS_RANKS.items())
+    return f"CASE {column} {cases} ELSE -1 END"
+
+
+UPSERT_COLUMNS = ('sid', 'status', 'error_code', 'to_number', 'reported_at')
+# SIDs per INSERT; lowered to fit the backend's bound-parameter limit (999 on older SQLite)
+UPSERT_BATCH_SIZE = 500
+
+
+def _upsert_sql(row_count):
+    quote = connection.ops.quote_name
+    table = quote(MessageDelivery._meta.db_table)
+    updates = ', '.join(f"{quote(column)} = excluded.{quote(column)}" for column in UPSERT_COLUMNS[1:])
+    placeholders = '(' + ', '.join(['%s'] * len(UPSERT_COLUMNS)) + ')'
+    return (
+        f"INSERT INTO {table} ({', '.join(quote(column) for column in UPSERT_COLUMNS)}) "
+        f"VALUES {', '.join([placeholders] * row_count)} "
+        f"ON CONFLICT ({quote('sid')}) DO UPDATE SET {updates} "
+        # Checked by the database against the row as it is now, not as it was read earlier
+        f"WHERE {_rank_sql('excluded.' + quote('status'))} >= {_rank_sql(table + '.' + quote('status'))}"
+    )
+
+
+def _batch_size():
+    limit = connection.features.max_query_params
+    return min(UPSERT_BATCH_SIZE, limit // len(UPSERT_COLUMNS)) if limit else UPSERT_BATCH_SIZE
+
+
+def write_statuses(entries):
+    """
+    Upsert {sid: fields} into MessageDelivery with one multi-row statement per
+    batch; an entry ranked below the stored status leaves the row alone.
+    Returns the number of entries offered.
+    """
+    if not entries:
+        return 0
+    rows = [
+        (sid, fields['status'], fields['error_code'], fields['to_number'],
+         connection.ops.adapt_datetimefield_value(fields['reported_at']))
+        for sid, fields in entries.items()
+    ]
+    size = _batch_size()
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), size):
+            batch = rows[start:start + size]
+            cursor.execute(_upsert_sql(len(batch)), [value for row in batch for value in row])
+    return len(rows)
+
+
+def record_status(sid, status, error_code='', to_number=''):
+    """Hand one callback to the buffer, or store it now when WHATSAPP_STATUS_BUFFERED is off"""
+    if getattr(settings, 'WHATSAPP_STATUS_BUFFERED', True):
+        status_buffer.add(sid, status, error_code=error_code, to_number=to_number)
+        return
+    write_statuses({sid: {'status': status, 'error_code': error_code, 'to_number': to_number, 'reported_at': timezone.now()}})
+
+
+class StatusBuffer:
+    """Thread-safe per-process buffer of callbacks, flushed by size or age from a daemon thread"""
+
+    def __init__(self, flush_size=None, flush_interval=None, max_size=None):
+        self.flush_size = flush_size or settings.WHATSAPP_STATUS_FLUSH_SIZE
+        self.flush_interval = flush_interval or settings.WHATSAPP_STATUS_FLUSH_INTERVAL
+        self.max_size = max_size or settings.WHATSAPP_STATUS_BUFFER_MAX
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def add(self, sid, status, error_code='', to_number=''):
+        entry = {'status': status, 'error_code': error_code, 'to_number': to_number, 'reported_at': timezone.now()}
+        with self._lock:
+            self._merge(sid, entry)
+            size = len(self.entries)
+        self._ensure_thread()
+        if size >= self.max_size:
+            # The flusher can't keep up (or the database is down): make the caller wait
+            self.flush()
+        elif size >= self.flush_size:
+            self._wake.set()
+
+    def _merge(self, sid, entry):
+        current = self.entries.get(sid)
+        if current is None or status_rank(entry['status']) >= status_rank(current['status']):
+            self.entries[sid] = entry
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                entries, self.entries = self.entries, {}
+            if not entries:
+                return 0
+            try:
+                return write_statuses(entries)
+            except Exception:
+                with self._lock:
+                    # Put them back (newer callbacks win) and try again on the next flush
+                    for sid, entry in entries.items():
+                        if sid not in self.entries:
+                            self._merge(sid, entry)
+                connection.close()
+                raise
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='status-flusher', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                written = self.flush()
+                if written:
+                    logger.debug(f"Flushed {written} delivery statuses")
+            except Exception:
+                logger.exception("Could not write delivery statuses; keeping them for the next flush")
+
+
+status_buffer = StatusBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        status_buffer.flush()
+    except Exception:
+        logger.exception("Lost buffered delivery statuses at exit")
+
+
+def _after_fork():
+    # The parent's buffered callbacks are its own to write; its locks and flusher thread aren't usable here
+    status_buffer.__init__()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+# ========== REPORTING ==========
+def with_delivery_status(queryset, sid_field='twilio_sid'):
+    """Annotate rows that carry a Twilio SID with the latest reported delivery status and error code"""
+    latest = MessageDelivery.objects.filter(sid=OuterRef(sid_field))
+    return queryset.annotate(
+        delivery_status=Subquery(latest.values('status')[:1]),
+        delivery_error=Subquery(latest.values('error_code')[:1]),
+    )
+
+
+def broadcast_delivery(broadcast):
+    """{channel: {state: count}}: Twilio's latest status for WhatsApp sends, the dispatcher's status otherwise"""
+    latest = MessageDelivery.objects.filter(sid=OuterRef('twilio_sid')).values('status')[:1]
+    rows = (
+        broadcast.deliveries
+        .annotate(state=Coalesce(Subquery(latest), F('status'), output_field=CharField()))
+        .values('channel', 'state')
+        .annotate(count=Count('pk'))
+        .order_by()
+    )
+    summary = {}
+    for row in rows:
+        summary.setdefault(row['channel'], {})[row['state']] = row['count']
+    return summary
@@ -0,0 +1,255 @@
+import logging
+import os
+from collections import deque
+from io import BytesIO
+
+from PIL import Image, ImageOps
+from pypdf import PdfReader
+from pypdf.errors import PdfReadError
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NullObject, StreamObject
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from core.utils.pdf_generator import ApplicationPDFGenerator
+
+logger = logging.getLogger(__name__)
+
+# Documents merged after the summary, in order
+DOSSIER_DOCUMENTS = [
+    ('id_document', 'ID Document'),
+    ('matric_certificate', 'Matric Certificate'),
+    ('proof_of_payment', 'Proof of Payment'),
+]
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+# Scans are downsampled to roughly A4 at 200 dpi before they are embedded
+MAX_IMAGE_SIDE = 2339
+CHUNK_SIZE = 64 * 2 ** 10
+PAGES_ID = 1
+CATALOG_ID = 2
+
+
+def encoded_stream_data(stream):
+    """
+    A stream's bytes as stored in the source file, still compressed.
+
+    pypdf has no public accessor for these (get_data() decodes), so this reads
+    StreamObject._data; requirements.txt pins pypdf to majors that keep it.
+    """
+    data = getattr(stream, '_data', None)
+    if not isinstance(data, bytes):
+        raise RuntimeError('This pypdf version no longer exposes encoded stream data; check the pypdf pin')
+    return data
+
+
+class PDFStreamWriter:
+    """
+    Writes one PDF front to back from the pages of several source PDFs.
+
+    Objects are serialised and handed out as soon as they are reached, so only
+    the document being copied is held in memory. The page tree, catalog and
+    cross-reference table need nothing but object numbers and byte offsets and
+    go out last.
+    """
+
+    def __init__(self):
+        self.position = 0
+        self.offsets = {}
+        self.next_id = CATALOG_ID + 1
+        self.page_ids = []
+
+    def _emit(self, data):
+        self.position += len(data)
+        return data
+
+    def header(self):
+        return self._emit(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+
+    def _object(self, object_id, body):
+        self.offsets[object_id] = self.position
+        return self._emit(b'%d 0 obj\n%s\nendobj\n' % (object_id, body))
+
+    def _serialize(self, obj, base, refs):
+        if isinstance(obj, IndirectObject):
+            refs.append(obj)
+            return b'%d 0 R' % (base + obj.idnum)
+        if isinstance(obj, StreamObject):
+            entries = {key: value for key, value in obj.items() if key != '/Length'}
+            data = encoded_stream_data(obj)
+            return b'%s\nstream\n%s\nendstream' % (
+                self._dictionary(entries, base, refs, b'/Length %d' % len(data)), data,
+            )
+        if isinstance(obj, DictionaryObject):
+            return self._dictionary(obj, base, refs)
+        if isinstance(obj, ArrayObject):
+            return b'[' + b' '.join(self._serialize(item, base, refs) for item in obj) + b']'
+        buffer = BytesIO()
+        obj.write_to_stream(buffer)
+        return buffer.getvalue()
+
+    def _dictionary(self, entries, base, refs, extra=b''):
+        parts = []
+        for key, value in entries.items():
+            name = BytesIO()
+            key.write_to_stream(name)
+            parts.append(name.getvalue() + b' ' + self._serialize(value, base, refs))
+        if extra:
+            parts.append(extra)
+        return b'<<' + b' '.join(parts) + b'>>'
+
+    def add_document(self, reader):
+        """Yield every page of ``reader`` and the objects they use, renumbered into this file"""
+        base = self.next_id
+        highest = 0
+        written = set()
+        refs = deque()
+
+        # Pages come with inherited attributes (Resources, MediaBox...) already copied in by pypdf
+        for page in reader.pages:
+            source = page.indirect_reference
+            entries = {key: value for key, value in page.items() if key != '/Parent'}
+            body = self._dictionary(entries, base, refs, b'/Parent %d 0 R' % PAGES_ID)
+            written.add(source.idnum)
+            highest = max(highest, source.idnum)
+            self.page_ids.append(base + source.idnum)
+            yield self._object(base + source.idnum, body)
+
+        while refs:
+            ref = refs.popleft()
+            if ref.idnum in written:
+                continue
+            written.add(ref.idnum)
+            highest = max(highest, ref.idnum)
+            try:
+                obj = ref.get_object()
+                if obj is None:
+                    obj = NullObject()
+            except (PdfReadError, ValueError, KeyError) as e:
+                logger.warning(f"Unreadable object {ref.idnum} in dossier document: {e}")
+                obj = NullObject()
+            yield self._object(base + ref.idnum, self._serialize(obj, base, refs))
+
+        self.next_id = base + highest + 1
+
+    def trailer(self):
+        """Page tree, catalog, cross-reference table and trailer"""
+        kids = b' '.join(b'%d 0 R' % page_id for page_id in self.page_ids)
+        yield self._object(PAGES_ID, b'<</Type /Pages /Kids [%s] /Count %d>>' % (kids, len(self.page_ids)))
+        yield self._object(CATALOG_ID, b'<</Type /Catalog /Pages %d 0 R>>' % PAGES_ID)
+
+        xref = self.position
+        lines = [b'xref\n0 %d\n' % self.next_id, b'0000000000 65535 f\r\n']
+        for object_id in range(1, self.next_id):
+            offset = self.offsets.get(object_id)
+            lines.append(b'%010d 00000 n\r\n' % offset if offset is not None else b'0000000000 65535 f\r\n')
+        yield self._emit(b''.join(lines))
+        yield self._emit(
+            b'trailer\n<</Size %d /Root %d 0 R>>\nstartxref\n%d\n%%%%EOF\n' % (self.next_id, CATALOG_ID, xref)
+        )
+
+
+def image_page(file_obj, title):
+    """One A4 page with the scan scaled to fit, as PDF bytes"""
+    image = Image.open(file_obj)
+    # JPEG scans are decoded at reduced size straight away
+    image.draft('RGB', (MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+    scan = BytesIO()
+    image.save(scan, 'JPEG', quality=85)
+    width, height = image.size
+    image.close()
+
+    page_size = landscape(A4) if width > height else A4
+    margin, heading = 36, 24
+    scale = min((page_size[0] - 2 * margin) / width, (page_size[1] - 2 * margin - heading) / height)
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=page_size)
+    pdf.setFont('Helvetica-Bold', 12)
+    pdf.drawString(margin, page_size[1] - margin - 12, title)
+    pdf.drawImage(
+        ImageReader(scan), margin, page_size[1] - margin - heading - height * scale,
+        width=width * scale, height=height * scale,
+    )
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def notice_page(title, text):
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    pdf.setFont('Helvetica-Bold', 14)
+    pdf.drawString(72, A4[1] - 96, title)
+    pdf.setFont('Helvetica', 11)
+    pdf.drawString(72, A4[1] - 120, text)
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def _document_reader(field_file, title):
+    """A PdfReader for one uploaded document, or for a notice page when it can't be merged"""
+    name = os.path.basename(field_file.name)
+    extension = os.path.splitext(name)[1].lower()
+    try:
+        field_file.open('rb')
+        if extension in IMAGE_EXTENSIONS:
+            with field_file:
+                return PdfReader(BytesIO(image_page(field_file, title)))
+        if extension == '.pdf':
+            # Read lazily from the file; it is closed once its pages have been copied
+            reader = PdfReader(field_file)
+            if reader.is_encrypted and not reader.decrypt(''):
+                raise PdfReadError('encrypted')
+            len(reader.pages)
+            return reader
+        field_file.close()
+        return PdfReader(BytesIO(notice_page(title, f'{name} is not a PDF or image; open it from the admin.')))
+    except (OSError, ValueError, PdfReadError, Image.DecompressionBombError) as e:
+        logger.warning(f"Could not add {field_file.name} to the dossier: {e}")
+        field_file.close()
+        return PdfReader(BytesIO(notice_page(title, f'{name} could not be included: {e}')))
+
+
+def dossier_stream(application):
+    """
+    The applicant's dossier PDF as an iterator of chunks: the application
+    summary, then each uploaded document (scans become pages, PDFs are copied
+    page by page).
+
+    The summary is rendered before this returns, so a failure raises here,
+    before any response has started, rather than truncating the download.
+    Documents that can't be read become notice pages.
+    """
+    summary = PdfReader(BytesIO(ApplicationPDFGenerator.generate_application_pdf(application)))
+    return _dossier_chunks(application, summary)
+
+
+def _dossier_chunks(application, summary):
+    writer = PDFStreamWriter()
+    pending = [writer.header()]
+    size = len(pending[0])
+
+    sources = [lambda: summary]
+    for field, title in DOSSIER_DOCUMENTS:
+        field_file = getattr(application, field)
+        if field_file:
+            sources.append(lambda field_file=field_file, title=title: _document_reader(field_file, title))
+
+    for open_reader in sources:
+        reader = open_reader()
+        try:
+            for data in writer.add_document(reader):
+                pending.append(data)
+                size += len(data)
+                if size >= CHUNK_SIZE:
+                    yield b''.join(pending)
+                    pending, size = [], 0
+        finally:
+            stream = getattr(reader, 'stream', None)
+            if stream is not None:
+                stream.close()
+
+    pending.extend(writer.trailer())
+    yield b''.join(pending)
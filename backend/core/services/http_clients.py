@@ -0,0 +1,103 @@
+"""
+Process-wide HTTP clients for outbound providers. Each provider gets one
+keep-alive requests.Session with a bounded connection pool, shared by every
+thread, so a send reuses an open (TLS) connection instead of dialing Twilio
+again. WhatsAppService uses twilio_client(); other senders use pooled_session().
+"""
+import logging
+import os
+import threading
+
+from django.conf import settings
+from requests import Session
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
+from twilio.rest import Client
+
+logger = logging.getLogger(__name__)
+
+TWILIO_API_URL = 'https://api.twilio.com'
+
+_lock = threading.RLock()
+_sessions = {}
+_twilio_clients = {}
+
+
+def http_timeout():
+    """(connect, read) timeout in seconds for outbound provider calls"""
+    return (settings.OUTBOUND_HTTP_CONNECT_TIMEOUT, settings.OUTBOUND_HTTP_READ_TIMEOUT)
+
+
+def new_session(pool_size=None):
+    """A keep-alive session whose pool holds ``pool_size`` connections per host; requests never retries by itself"""
+    adapter = HTTPAdapter(pool_maxsize=pool_size or settings.OUTBOUND_HTTP_POOL_SIZE, max_retries=0)
+    session = Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def pooled_session(name, pool_size=None):
+    """The shared session for provider ``name``, created on first use; safe to use from many threads"""
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = _sessions[name] = new_session(pool_size)
+        return session
+
+
+class PooledTwilioHttpClient(TwilioHttpClient):
+    """TwilioHttpClient on a given session, optionally pointed at another base URL (e.g. a local fake server)"""
+
+    def __init__(self, session, timeout=None, base_url=''):
+        super().__init__(pool_connections=False)
+        self.session = session
+        # requests takes a (connect, read) tuple, which the Twilio base class refuses to validate
+        self.timeout = timeout
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, url, *args, **kwargs):
+        if self.base_url and url.startswith(TWILIO_API_URL):
+            url = self.base_url + url[len(TWILIO_API_URL):]
+        return super().request(method, url, *args, **kwargs)
+
+
+def twilio_client(account_sid=None, auth_token=None, base_url=None):
+    """
+    The process-wide Twilio Client for these credentials (the TWILIO_* settings
+    by default), or None when no account SID is configured.
+    """
+    account_sid = settings.TWILIO_ACCOUNT_SID if account_sid is None else account_sid
+    auth_token = settings.TWILIO_AUTH_TOKEN if auth_token is None else auth_token
+    base_url = settings.TWILIO_API_BASE_URL if base_url is None else base_url
+    if not account_sid:
+        return None
+
+    key = (account_sid, auth_token, base_url)
+    with _lock:
+        client = _twilio_clients.get(key)
+        if client is None:
+            http_client = PooledTwilioHttpClient(pooled_session('twilio'), http_timeout(), base_url)
+            client = _twilio_clients[key] = Client(account_sid, auth_token, http_client=http_client)
+            logger.info(f"Created shared Twilio client for {account_sid[:8]}… ({base_url or TWILIO_API_URL})")
+        return client
+
+
+def close_clients():
+    """Close every pooled connection; the next call builds fresh clients"""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _twilio_clients.clear()
+
+
+def _after_fork():
+    # A forked child (gunicorn worker, pdf_batch process) must not share the parent's sockets
+    global _lock
+    _lock = threading.RLock()
+    _sessions.clear()
+    _twilio_clients.clear()
+
+
+os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,115 @@
+import logging
+import os
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.utils.response_cache import bump_model_version
+
+logger = logging.getLogger(__name__)
+
+# Model label -> image field whose renditions are recorded in the model's image_variants column
+IMAGE_VARIANT_FIELDS = {
+    'core.course': 'image',
+    'core.teammember': 'image',
+    'core.galleryimage': 'image',
+    'core.newspost': 'image',
+    'core.video': 'thumbnail',
+}
+
+# Format key -> (Pillow format, file extension, save options)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'optimize': True, 'progressive': True}),
+}
+
+VARIANTS_DIR = 'variants'
+
+
+def variant_widths():
+    return sorted(getattr(settings, 'IMAGE_VARIANT_WIDTHS', [320, 640, 1024, 1600]))
+
+
+def target_widths(source_width):
+    """Configured widths below the source width, plus the source width itself if it's under the largest"""
+    widths = variant_widths()
+    targets = [width for width in widths if width < source_width]
+    if source_width < widths[-1]:
+        targets.append(source_width)
+    return targets
+
+
+def variant_name(source_name, width, extension):
+    root, _ = os.path.splitext(source_name)
+    return f'{VARIANTS_DIR}/{root}-{width}w.{extension}'
+
+
+def render_variants(source_name, storage=None):
+    """
+    Write every rendition of ``source_name`` that isn't already on disk and
+    describe them all. Files already in storage are reused, so re-running
+    after a crash or for another row with the same image is cheap.
+    """
+    storage = storage or default_storage
+    quality = getattr(settings, 'IMAGE_VARIANT_QUALITY', 80)
+    with storage.open(source_name, 'rb') as handle:
+        image = ImageOps.exif_transpose(Image.open(handle))
+        image.load()
+    has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    width, height = image.size
+
+    variants = {key: [] for key in VARIANT_FORMATS}
+    for target in target_widths(width):
+        resized = None
+        for key, (pil_format, extension, options) in VARIANT_FORMATS.items():
+            name = variant_name(source_name, target, extension)
+            if not storage.exists(name):
+                if resized is None:
+                    size = (target, max(1, round(height * target / width)))
+                    resized = image if target == width else image.resize(size, Image.LANCZOS)
+                rendition = resized.convert('RGB') if pil_format == 'JPEG' else resized
+                buffer = BytesIO()
+                rendition.save(buffer, pil_format, quality=quality, **options)
+                name = storage.save(name, ContentFile(buffer.getvalue()))
+            variants[key].append([target, name])
+    return {'source': source_name, 'width': width, 'height': height, 'variants': variants}
+
+
+def generate_image_variants(label, pk, force=False):
+    """Render and record the variants of one row's image"""
+    model = apps.get_model(label)
+    field = IMAGE_VARIANT_FIELDS[label]
+    instance = model.objects.filter(pk=pk).first()
+    source = getattr(instance, field).name if instance else None
+    if not source or (not force and instance.image_variants.get('source') == source):
+        return False
+    try:
+        recorded = render_variants(source)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning(f"Could not render variants of {source}: {e}")
+        return False
+
+    changes = {'image_variants': recorded}
+    if any(f.name == 'updated_at' for f in model._meta.fields):
+        changes['updated_at'] = timezone.now()
+    # Only record them if the image wasn't replaced while rendering
+    if model.objects.filter(pk=pk, **{field: source}).update(**changes):
+        bump_model_version(model)
+        logger.info(f"Rendered {sum(len(v) for v in recorded['variants'].values())} variants of {source}")
+        return True
+    return False
+
+
+def needs_variants(instance):
+    """True when the instance's image has no recorded variants yet"""
+    field = IMAGE_VARIANT_FIELDS.get(instance._meta.label_lower)
+    if field is None:
+        return False
+    source = getattr(instance, field).name or ''
+    return bool(source) and source != (instance.image_variants or {}).get('source')
@@ -0,0 +1,229 @@
+"""
+Message templates shared by the WhatsApp, email and broadcast senders.
+
+Templates use str.format placeholders ({course_name}, {registration_fee}...).
+Each one is parsed and checked once, against the variables its key allows,
+when the registry loads; rendering is then a single format_map() over
+cleaned values. An active MessageTemplate row overrides the default, which
+comes from settings (WHATSAPP_APPROVAL_MESSAGE...) or DEFAULT_TEXTS below.
+"""
+import logging
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from string import Formatter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateError(ValueError):
+    """A template that doesn't parse, uses unknown placeholders, or was rendered without its variables"""
+
+
+# ========== VARIABLES ==========
+def _text(value):
+    if value is None:
+        return ''
+    if not isinstance(value, (str, int, float, Decimal)):
+        raise TemplateError(f"Expected text, got {type(value).__name__}")
+    return str(value)
+
+
+def _money(value):
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise TemplateError(f"Not an amount: {value!r}")
+    if not amount.is_finite() or amount < 0:
+        raise TemplateError(f"Not an amount: {value!r}")
+    return f"{amount:.2f}"
+
+
+# Variable -> cleaner turning the value passed to render() into the text inserted
+VARIABLES = {
+    'student_name': _text,
+    'course_name': _text,
+    'registration_fee': _money,
+    'reason_text': _text,
+    'name': _text,
+    'title': _text,
+    'message': _text,
+    'sender': _text,
+    'address': _text,
+    'phone': _text,
+    'email': _text,
+    'website': _text,
+}
+
+CONTACT_VARIABLES = ('address', 'phone', 'email', 'website')
+
+
+def contact_context():
+    """The centre's contact details, available to every template"""
+    return {
+        'address': settings.BATHUDI_ADDRESS,
+        'phone': settings.BATHUDI_PHONE_NUMBER,
+        'email': settings.BATHUDI_EMAIL,
+        'website': settings.BATHUDI_WEBSITE,
+    }
+
+
+# ========== TEMPLATES ==========
+# Key (MessageTemplate.KEY_CHOICES) -> variables its template may use
+TEMPLATES = {
+    'whatsapp_approval': ('student_name', 'course_name', 'registration_fee', *CONTACT_VARIABLES),
+    'whatsapp_rejection': ('student_name', 'course_name', 'reason_text', *CONTACT_VARIABLES),
+    'broadcast_whatsapp': ('name', 'title', 'message', 'sender', *CONTACT_VARIABLES),
+    'broadcast_email': ('name', 'title', 'message', 'sender', *CONTACT_VARIABLES),
+}
+
+# Templates used when no MessageTemplate overrides them: a setting's value, or the text here
+DEFAULT_SETTINGS = {
+    'whatsapp_approval': 'WHATSAPP_APPROVAL_MESSAGE',
+    'whatsapp_rejection': 'WHATSAPP_REJECTION_MESSAGE',
+}
+DEFAULT_TEXTS = {
+    'broadcast_whatsapp': "*{title}*\n\n{message}\n\n- {sender}, Bathudi Automotive Training Center",
+    'broadcast_email': "{message}\n\n{sender}\nBathudi Automotive Training Center\n{website}",
+}
+
+
+def default_source(key):
+    if key in DEFAULT_SETTINGS:
+        return getattr(settings, DEFAULT_SETTINGS[key])
+    return DEFAULT_TEXTS[key]
+
+
+def _escape(text):
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+class CompiledTemplate:
+    """
+    A parsed template. ``fields`` are the variables it uses; render() needs
+    each of them and ignores anything else it is given.
+    """
+    __slots__ = ('key', 'fields', '_segments', '_format', '_text')
+
+    def __init__(self, key, segments):
+        self.key = key
+        self._segments = segments
+        self.fields = tuple(dict.fromkeys(field for _, field in segments if field))
+        self._format = ''.join(_escape(literal) + (f'{{{field}}}' if field else '') for literal, field in segments)
+        # Nothing left to fill in: render() returns this as is
+        self._text = None if self.fields else ''.join(literal for literal, _ in segments)
+
+    @classmethod
+    def compile(cls, key, source, allowed=None):
+        """Parse ``source``; raises TemplateError naming any placeholder outside ``allowed``"""
+        allowed = set(TEMPLATES[key] if allowed is None else allowed)
+        try:
+            parsed = list(Formatter().parse(source))
+        except ValueError as e:
+            raise TemplateError(f"{key}: {e}")
+
+        segments, unknown = [], []
+        for literal, field, spec, conversion in parsed:
+            if field is not None and (field not in allowed or spec or conversion):
+                unknown.append('{' + field + (f'!{conversion}' if conversion else '') + (f':{spec}' if spec else '') + '}')
+            segments.append((literal, field))
+        if unknown:
+            raise TemplateError(
+                f"{key}: unknown placeholders {', '.join(unknown)}; "
+                f"use {', '.join('{' + name + '}' for name in sorted(allowed))}"
+            )
+        return cls(key, segments)
+
+    def render(self, values):
+        if self._text is not None:
+            return self._text
+        try:
+            context = {field: VARIABLES[field](values[field]) for field in self.fields}
+        except KeyError as e:
+            raise TemplateError(f"{self.key} needs {{{e.args[0]}}}")
+        return self._format.format_map(context)
+
+    def bind(self, values):
+        """A copy with the variables in ``values`` filled in, for text shared by many renders"""
+        segments = []
+        for literal, field in self._segments:
+            if field in values:
+                literal, field = literal + VARIABLES[field](values[field]), None
+            if segments and segments[-1][1] is None:
+                literal = segments.pop()[0] + literal
+            segments.append((literal, field))
+        return CompiledTemplate(self.key, segments)
+
+
+class TemplateRegistry:
+    """
+    In-process cache of compiled templates, loaded with a single query.
+
+    Dropped whenever a MessageTemplate is saved or deleted in this process
+    (see core.signals); other workers pick up edits after
+    NOTIFICATION_TEMPLATE_TTL seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._templates = None
+        self._built_at = 0.0
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'NOTIFICATION_TEMPLATE_TTL', 300)
+
+    def _build(self):
+        from core.models import MessageTemplate
+
+        overrides = dict(MessageTemplate.objects.filter(is_active=True).values_list('key', 'body'))
+        templates = {}
+        saved = 0
+        for key in TEMPLATES:
+            if key in overrides:
+                try:
+                    templates[key] = CompiledTemplate.compile(key, overrides[key])
+                    saved += 1
+                    continue
+                except TemplateError as e:
+                    logger.error(f"Ignoring the saved {key} template, using the default: {e}")
+            templates[key] = CompiledTemplate.compile(key, default_source(key))
+        logger.info(f"Notification templates compiled: {len(templates)} ({saved} from the database)")
+        return templates
+
+    def get(self, key):
+        templates = self._templates
+        if templates is None or time.monotonic() - self._built_at > self.ttl:
+            with self._lock:
+                if self._templates is None or time.monotonic() - self._built_at > self.ttl:
+                    self._templates = self._build()
+                    self._built_at = time.monotonic()
+                templates = self._templates
+        return templates[key]
+
+    def render(self, key, **values):
+        """Render ``key`` with ``values``; the contact details are filled in unless given"""
+        return self.get(key).render({**contact_context(), **values})
+
+    def invalidate(self):
+        """Drop the compiled templates; they are rebuilt on the next render"""
+        with self._lock:
+            self._templates = None
+
+
+template_registry = TemplateRegistry()
+
+
+# ========== CONTEXTS ==========
+def application_context(application):
+    """The variables for an application's approval or rejection messages"""
+    course = application.course
+    return {
+        'student_name': application.name,
+        'course_name': course.title if course else application.course_title,
+        # The course's own fee; the configured default when it has no course
+        'registration_fee': course.registration_fee if course else settings.REGISTRATION_FEE_AMOUNT,
+        'reason_text': f"\n\nReason: {application.rejection_reason}" if application.rejection_reason else '',
+    }
@@ -0,0 +1,115 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.db import connections
+
+from core.utils.pdf_generator import ApplicationPDFGenerator, CoursePDFGenerator
+
+DEFAULT_CHUNK_SIZE = 100
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+# Chunk renderers run in the worker processes. They get model instances that
+# were read (and pickled) by the parent, so workers never open a database connection.
+
+def render_course_chunk(courses):
+    """[(pk, pdf bytes or None, error)] for a chunk of courses"""
+    results = []
+    for course in courses:
+        try:
+            results.append((course.pk, CoursePDFGenerator.generate_course_pdf(course), None))
+        except Exception as e:
+            results.append((course.pk, None, str(e)))
+    return results
+
+
+def application_pdf_path(output_dir, application):
+    return os.path.join(output_dir, f'application-{application.pk}.pdf')
+
+
+def render_application_chunk(applications, output_dir):
+    """Write each application form to ``output_dir``; [(pk, bytes written or None, error)]"""
+    results = []
+    for application in applications:
+        try:
+            content = ApplicationPDFGenerator.generate_application_pdf(application)
+            path = application_pdf_path(output_dir, application)
+            partial = f'{path}.{os.getpid()}.tmp'
+            with open(partial, 'wb') as handle:
+                handle.write(content)
+            os.replace(partial, path)
+            results.append((application.pk, len(content), None))
+        except Exception as e:
+            results.append((application.pk, None, str(e)))
+    return results
+
+
+def _init_worker():
+    # A no-op after fork; needed where workers are spawned (macOS, Windows)
+    django.setup()
+
+
+class BatchProgress:
+    """Running totals for a batch, with throughput"""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+
+    def update(self, results):
+        for _, output, error in results:
+            self.done += 1
+            if error:
+                self.failed += 1
+            else:
+                self.bytes += output if isinstance(output, int) else len(output)
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        return self.done / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f'{self.done}/{self.total} rendered ({self.failed} failed), '
+            f'{self.rate:.1f} PDFs/s, {self.bytes / 1024:.0f} KB in {self.elapsed:.1f}s'
+        )
+
+
+def run_batch(chunks, render_chunk, workers=1, *args):
+    """
+    Render ``chunks`` with ``render_chunk(chunk, *args)``, yielding (chunk, results) pairs.
+
+    With more than one worker the chunks fan out over a process pool (ReportLab
+    is CPU-bound and holds the GIL). At most two chunks per worker are in
+    flight, so memory stays flat however large the batch is.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, render_chunk(chunk, *args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = {}
+        for chunk in chunks:
+            if not pending:
+                # Forked workers must not inherit the parent's database sockets
+                connections.close_all()
+            pending[pool.submit(render_chunk, chunk, *args)] = chunk
+            if len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+        for future in list(pending):
+            yield pending.pop(future), future.result()
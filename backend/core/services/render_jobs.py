@@ -0,0 +1,129 @@
+"""
+Outbox for rendering work that shouldn't run in a web request.
+
+A save that needs something rendered writes a RenderJob in its own
+transaction (queue_render); run_render_worker claims due jobs, runs the
+handler for their kind and retries failures with backoff, the same way
+run_whatsapp_worker drains the WhatsApp outbox.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import Course, RenderJob, Student
+
+logger = logging.getLogger(__name__)
+
+
+def _render_image_variants(job):
+    from core.services.image_variants import generate_image_variants
+
+    generate_image_variants(job.label, job.object_id)
+
+
+def _render_course_pdf(job):
+    from core.services.course_pdfs import course_pdf_is_stale, manages_pdf, refresh_course_pdf
+
+    # The course as it is now: later edits may have already been rendered, or uploaded over
+    course = Course.objects.filter(pk=job.object_id).first()
+    if course and manages_pdf(course) and course_pdf_is_stale(course):
+        refresh_course_pdf(course)
+
+
+def _student_document_renderer(document):
+    def render(job):
+        from core.services.student_documents import generate_student_documents
+
+        progress, _ = generate_student_documents(Student.objects.filter(pk=job.object_id), document)
+        if progress.failed:
+            raise RuntimeError(f"Could not render the {document} for student {job.object_id}")
+    return render
+
+
+# Job kind -> handler(job); raising schedules a retry
+HANDLERS = {
+    'image_variants': _render_image_variants,
+    'course_pdf': _render_course_pdf,
+    'acceptance_letter': _student_document_renderer('acceptance'),
+    'certificate': _student_document_renderer('certificate'),
+}
+
+
+def queue_render(kind, instance):
+    """Queue ``kind`` for ``instance`` unless it is already waiting; call it inside the transaction that saved it"""
+    label = instance._meta.label_lower
+    waiting = RenderJob.objects.filter(kind=kind, label=label, object_id=instance.pk, status='pending')
+    if waiting.exists():
+        return None
+    return RenderJob.objects.create(kind=kind, label=label, object_id=instance.pk)
+
+
+def queue_renders(kind, queryset):
+    """queue_render for every row of ``queryset`` in a few queries; returns how many jobs were added"""
+    label = queryset.model._meta.label_lower
+    pks = list(queryset.values_list('pk', flat=True))
+    waiting = set(RenderJob.objects.filter(
+        kind=kind, label=label, object_id__in=pks, status='pending',
+    ).values_list('object_id', flat=True))
+    jobs = RenderJob.objects.bulk_create([
+        RenderJob(kind=kind, label=label, object_id=pk) for pk in pks if pk not in waiting
+    ])
+    return len(jobs)
+
+
+# ========== WORKER SIDE ==========
+def _claimable(now, lease):
+    return RenderJob.objects.filter(
+        Q(status='pending', next_attempt_at__lte=now) | Q(status='running', locked_at__lt=now - lease)
+    )
+
+
+def claim_jobs(limit, lease=None):
+    """Mark up to ``limit`` due jobs as 'running' and return them; jobs of a dead worker come back after the lease"""
+    lease = lease or timedelta(seconds=getattr(settings, 'RENDER_CLAIM_LEASE_SECONDS', 600))
+    now = timezone.now()
+    candidates = _claimable(now, lease).order_by('next_attempt_at', 'pk')
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            pks = list(candidates.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+            RenderJob.objects.filter(pk__in=pks).update(status='running', locked_at=now)
+    else:
+        pks = []
+        for pk in candidates.values_list('pk', flat=True)[:limit]:
+            if _claimable(now, lease).filter(pk=pk).update(status='running', locked_at=now):
+                pks.append(pk)
+
+    return list(RenderJob.objects.filter(pk__in=pks).order_by('next_attempt_at', 'pk'))
+
+
+def run_job(job):
+    """Run one claimed job and record the outcome: 'done', 'retry' or 'failed'"""
+    now = timezone.now()
+    attempts = job.attempts + 1
+    try:
+        HANDLERS[job.kind](job)
+    except Exception as e:
+        max_attempts = getattr(settings, 'RENDER_MAX_ATTEMPTS', 3)
+        if attempts < max_attempts:
+            delay = getattr(settings, 'RENDER_RETRY_SECONDS', 60) * 2 ** (attempts - 1)
+            RenderJob.objects.filter(pk=job.pk).update(
+                status='pending', attempts=attempts, next_attempt_at=now + timedelta(seconds=delay),
+                locked_at=None, last_error=str(e), updated_at=now,
+            )
+            logger.warning(f"Render job {job.pk} failed (attempt {attempts}), retrying in {delay:.0f}s: {e}")
+            return 'retry'
+        RenderJob.objects.filter(pk=job.pk).update(
+            status='failed', attempts=attempts, locked_at=None, last_error=str(e), updated_at=now,
+        )
+        logger.exception(f"Render job {job.pk} failed permanently after {attempts} attempts")
+        return 'failed'
+
+    RenderJob.objects.filter(pk=job.pk).update(
+        status='done', attempts=attempts, locked_at=None, last_error='', updated_at=now,
+    )
+    return 'done'
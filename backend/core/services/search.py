@@ -0,0 +1,205 @@
+import logging
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+from core.utils.phone_numbers import normalize_phone
+
+logger = logging.getLogger(__name__)
+
+# Shadow table / column names created by migration 0009_application_search_index
+SQLITE_FTS_TABLE = 'core_application_fts'
+POSTGRES_VECTOR_COLUMN = 'search_vector'
+
+# Searches with at least this many digits are also matched as a phone number prefix
+MIN_PHONE_PREFIX_DIGITS = 3
+
+# ========== SQLITE FTS5 SHADOW TABLE ==========
+_SQLITE_MOBILE_DIGITS = (
+    "replace(replace(replace(replace(replace(coalesce({row}.mobile, ''), "
+    "' ', ''), '-', ''), '+', ''), '(', ''), ')', '')"
+)
+_SQLITE_FTS_VALUES = (
+    "{row}.id, coalesce({row}.name, ''), coalesce({row}.surname, ''), coalesce({row}.email, ''), "
+    + _SQLITE_MOBILE_DIGITS + ", coalesce({row}.id_number, ''), coalesce({row}.course_title, '')"
+)
+_SQLITE_FTS_INSERT = (
+    f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, surname, email, mobile_digits, id_number, course_title) "
+)
+
+SQLITE_FTS_TRIGGERS = {
+    'core_application_fts_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS core_application_fts_insert AFTER INSERT ON core_application BEGIN
+            {_SQLITE_FTS_INSERT} VALUES ({_SQLITE_FTS_VALUES.format(row='new')});
+        END""",
+    'core_application_fts_update': f"""
+        CREATE TRIGGER IF NOT EXISTS core_application_fts_update AFTER UPDATE ON core_application BEGIN
+            DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = old.id;
+            {_SQLITE_FTS_INSERT} VALUES ({_SQLITE_FTS_VALUES.format(row='new')});
+        END""",
+    'core_application_fts_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS core_application_fts_delete AFTER DELETE ON core_application BEGIN
+            DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = old.id;
+        END""",
+}
+
+
+def ensure_sqlite_fts(conn):
+    """
+    Create the FTS5 table and its sync triggers if they are missing, and
+    rebuild the index when they were. SQLite drops triggers whenever Django
+    remakes core_application during a migration, so this also runs on post_migrate.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if not cursor.fetchone()[0]:
+            logger.warning("SQLite was built without FTS5; application search uses icontains")
+            return False
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'core_application'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if set(SQLITE_FTS_TRIGGERS) <= existing:
+            return True
+        cursor.execute(
+            f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+                name, surname, email, mobile_digits, id_number, course_title,
+                tokenize = "unicode61 remove_diacritics 2"
+            )"""
+        )
+        for statement in SQLITE_FTS_TRIGGERS.values():
+            cursor.execute(statement)
+        cursor.execute(f"DELETE FROM {SQLITE_FTS_TABLE}")
+        cursor.execute(
+            _SQLITE_FTS_INSERT + f"SELECT {_SQLITE_FTS_VALUES.format(row='core_application')} FROM core_application"
+        )
+    logger.info("Rebuilt application search index")
+    return True
+
+
+def _tokens(term):
+    """Split a search string into word tokens that are safe to embed in FTS syntax"""
+    return re.findall(r'\w+', term or '')
+
+
+def _phone_digits(term):
+    """Return the digits of a search string that looks like a phone number, else ''"""
+    digits = re.sub(r'\D', '', term or '')
+    stripped = re.sub(r'[\s()+\-.]', '', term or '')
+    if len(digits) >= MIN_PHONE_PREFIX_DIGITS and digits == stripped:
+        return digits
+    return ''
+
+
+class ApplicationSearchBackend:
+    """Fallback search: case-insensitive substring match on the contact fields"""
+    name = 'icontains'
+
+    def search(self, queryset, term):
+        return queryset.filter(
+            Q(name__icontains=term) |
+            Q(surname__icontains=term) |
+            Q(email__icontains=term) |
+            Q(mobile__icontains=term) |
+            Q(id_number__icontains=term) |
+            Q(course_title__icontains=term)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class SQLiteApplicationSearch(ApplicationSearchBackend):
+    """FTS5 shadow table kept in sync by triggers, ranked with bm25"""
+    name = 'sqlite-fts5'
+    # Column weights: name, surname, email, mobile_digits, id_number, course_title
+    weights = '10.0, 10.0, 5.0, 5.0, 3.0, 1.0'
+
+    def match_expression(self, term):
+        clauses = []
+        tokens = _tokens(term)
+        if tokens:
+            clauses.append('(' + ' AND '.join(f'"{token}"*' for token in tokens) + ')')
+        digits = _phone_digits(term)
+        if digits:
+            clauses.append(f'(mobile_digits : "{digits}"*)')
+        return ' OR '.join(clauses)
+
+    def search(self, queryset, term):
+        match = self.match_expression(term)
+        if not match:
+            return queryset.none()
+        table = queryset.model._meta.db_table
+        matched = RawSQL(
+            f'SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s',
+            (match,),
+        )
+        rank = RawSQL(
+            f'SELECT -bm25({SQLITE_FTS_TABLE}, {self.weights}) FROM {SQLITE_FTS_TABLE} '
+            f'WHERE {SQLITE_FTS_TABLE} MATCH %s AND {SQLITE_FTS_TABLE}.rowid = "{table}"."id"',
+            (match,),
+            output_field=FloatField(),
+        )
+        return queryset.filter(id__in=matched).annotate(search_rank=rank)
+
+
+class PostgresApplicationSearch(ApplicationSearchBackend):
+    """Generated tsvector column with a GIN index, plus a trigram index for phone prefixes"""
+    name = 'postgres-tsvector'
+
+    def search(self, queryset, term):
+        tokens = _tokens(term)
+        digits = _phone_digits(term)
+        if not tokens and not digits:
+            return queryset.none()
+        table = queryset.model._meta.db_table
+        column = f'"{table}"."{POSTGRES_VECTOR_COLUMN}"'
+        tsquery = ' & '.join(f'{token}:*' for token in tokens) or digits
+        conditions = [f"{column} @@ to_tsquery('simple', %s)"]
+        params = [tsquery]
+        if digits:
+            # Must match the indexed expression in migration 0009 exactly
+            conditions.append(f"""regexp_replace("{table}"."mobile", '\\D', '', 'g') LIKE %s""")
+            params.append(digits + '%')
+        matched = RawSQL('(' + ' OR '.join(conditions) + ')', params, output_field=BooleanField())
+        rank = RawSQL(
+            f"ts_rank({column}, to_tsquery('simple', %s))" + (
+                f""" + CASE WHEN regexp_replace("{table}"."mobile", '\\D', '', 'g') LIKE %s THEN 1.0 ELSE 0.0 END"""
+                if digits else ''
+            ),
+            [tsquery] + ([digits + '%'] if digits else []),
+            output_field=FloatField(),
+        )
+        return queryset.filter(matched).annotate(search_rank=rank)
+
+
+_backend = None
+
+
+def get_search_backend():
+    """Pick the search backend for the default database, once per process"""
+    global _backend
+    if _backend is None:
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                columns = [c.name for c in connection.introspection.get_table_description(cursor, 'core_application')]
+            _backend = PostgresApplicationSearch() if POSTGRES_VECTOR_COLUMN in columns else ApplicationSearchBackend()
+        elif connection.vendor == 'sqlite' and SQLITE_FTS_TABLE in connection.introspection.table_names():
+            _backend = SQLiteApplicationSearch()
+        else:
+            _backend = ApplicationSearchBackend()
+        logger.info(f"Application search backend: {_backend.name}")
+    return _backend
+
+
+def search_applications(queryset, term):
+    """Filter applications matching ``term`` and annotate each with ``search_rank`` (higher is better)"""
+    term = (term or '').strip()
+    if not term:
+        return queryset
+    phone = normalize_phone(term) if _phone_digits(term) else ''
+    if phone:
+        # A complete number, however it was typed: indexed match on the normalised column first
+        matches = queryset.filter(mobile_e164=phone)
+        if matches.exists():
+            return matches.annotate(search_rank=Value(1.0, output_field=FloatField()))
+    return get_search_backend().search(queryset, term)
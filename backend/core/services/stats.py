@@ -0,0 +1,160 @@
+"""
+Counters behind the stats and dashboard_stats endpoints.
+
+Each counter is a StatCounter row. Saves and deletes of Application, Student
+and Course (see CountedModel) and the admin bulk actions (update_counted)
+move them with ``value = value + delta`` in the same transaction as the
+write, so reading them is one small query and never a table scan.
+``recount_stats`` rebuilds them from the tables after writes that bypass
+both, such as raw SQL or bulk_create.
+"""
+import logging
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+COUNTER_NAMES = (
+    'total', 'pending', 'approved', 'rejected', 'fee_verified',
+    'students', 'active_courses',
+)
+
+
+# ========== WHAT A ROW COUNTS TOWARDS ==========
+def _application_counters(status, fee_verified):
+    return ['total', status] + (['fee_verified'] if fee_verified else [])
+
+
+def _course_counters(is_active):
+    return ['active_courses'] if is_active else []
+
+
+# Model label -> (fields the counters depend on, counters a row with those values adds to)
+COUNTED_MODELS = {
+    'core.application': (('status', 'fee_verified'), _application_counters),
+    'core.student': ((), lambda: ['students']),
+    'core.course': (('is_active',), _course_counters),
+}
+
+
+def counted_values(instance):
+    """The counted fields of ``instance`` as loaded, or None if any of them was deferred"""
+    fields, _ = COUNTED_MODELS[instance._meta.label_lower]
+    if instance.get_deferred_fields() & set(fields):
+        return None
+    return {field: getattr(instance, field) for field in fields}
+
+
+def counters_for(label, values):
+    fields, counters = COUNTED_MODELS[label]
+    return [name for name in counters(*(values[field] for field in fields)) if name in COUNTER_NAMES]
+
+
+def adjust_counters(deltas):
+    """Add ``deltas`` (name -> change) to the counter rows in one UPDATE, creating missing rows at 0 first"""
+    from core.models import StatCounter
+
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if deltas:
+        StatCounter.objects.bulk_create([StatCounter(name=name) for name in deltas], ignore_conflicts=True)
+        StatCounter.objects.filter(name__in=deltas).update(value=F('value') + Case(
+            *(When(name=name, then=Value(delta)) for name, delta in deltas.items()),
+        ))
+
+
+def record_save(instance, old_values, update_fields=None):
+    """Move the counters from the row's ``old_values`` (None for a new row) to what was just saved"""
+    label = instance._meta.label_lower
+    new_values = dict(old_values or {})
+    for field in COUNTED_MODELS[label][0]:
+        if old_values is None or update_fields is None or field in update_fields:
+            new_values[field] = getattr(instance, field)
+    deltas = Counter(counters_for(label, new_values))
+    if old_values is not None:
+        deltas.subtract(counters_for(label, old_values))
+    adjust_counters(deltas)
+    return new_values
+
+
+def record_delete(instance, values):
+    deltas = Counter(counters_for(instance._meta.label_lower, values))
+    adjust_counters({name: -delta for name, delta in deltas.items()})
+
+
+def update_counted(queryset, **changes):
+    """``queryset.update(**changes)``, moving the counters in the same transaction"""
+    model = queryset.model
+    label = model._meta.label_lower
+    fields, _ = COUNTED_MODELS[label]
+    # update() skips auto_now, and the conditional GET validators read updated_at
+    stamp = {'updated_at': timezone.now()} if any(f.name == 'updated_at' for f in model._meta.fields) else {}
+    with transaction.atomic():
+        pks = list(queryset.values_list('pk', flat=True))
+        rows = model.objects.filter(pk__in=pks)
+        before = Counter(rows.select_for_update().values_list(*fields))
+        updated = rows.update(**stamp, **changes)
+        deltas = Counter()
+        for key, count in before.items():
+            values = dict(zip(fields, key))
+            for name in counters_for(label, values):
+                deltas[name] -= count
+            for name in counters_for(label, {**values, **changes}):
+                deltas[name] += count
+        adjust_counters(deltas)
+    return updated
+
+
+# ========== READING AND REBUILDING ==========
+def _counts_query():
+    """One statement: conditional aggregates over applications plus scalar subqueries for the rest"""
+    from core.models import Application, Course, Student
+
+    qn = connection.ops.quote_name
+    sql = f"""
+        SELECT
+            COUNT(*),
+            COALESCE(SUM(CASE WHEN {qn('status')} = %s THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN {qn('status')} = %s THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN {qn('status')} = %s THEN 1 ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN {qn('fee_verified')} = %s THEN 1 ELSE 0 END), 0),
+            (SELECT COUNT(*) FROM {qn(Student._meta.db_table)}),
+            (SELECT COUNT(*) FROM {qn(Course._meta.db_table)} WHERE {qn('is_active')} = %s)
+        FROM {qn(Application._meta.db_table)}
+    """
+    return sql, ['pending', 'approved', 'rejected', True, True]
+
+
+def compute_counters():
+    """Count everything the stats endpoints report, straight from the tables"""
+    sql, params = _counts_query()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return dict(zip(COUNTER_NAMES, (int(value) for value in row)))
+
+
+def get_counters():
+    """The counters shared by the stats and dashboard_stats endpoints"""
+    from core.models import StatCounter
+
+    counters = dict.fromkeys(COUNTER_NAMES, 0)
+    counters.update(StatCounter.objects.filter(name__in=COUNTER_NAMES).values_list('name', 'value'))
+    return counters
+
+
+def recount_counters():
+    """Overwrite the counter rows with fresh counts; returns {name: (stored, counted)} for those that drifted"""
+    from core.models import StatCounter
+
+    with transaction.atomic():
+        stored = dict(StatCounter.objects.select_for_update().values_list('name', 'value'))
+        counted = compute_counters()
+        for name, value in counted.items():
+            StatCounter.objects.update_or_create(name=name, defaults={'value': value})
+    drift = {name: (stored.get(name), value) for name, value in counted.items() if stored.get(name) != value}
+    if drift:
+        logger.warning(f"Stats counters drifted and were recounted: {drift}")
+    return drift
@@ -0,0 +1,83 @@
+import logging
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from core.services.pdf_batch import BatchProgress, run_batch
+from core.utils.pdf_generator import get_template
+from core.utils.querysets import iter_chunks
+
+logger = logging.getLogger(__name__)
+
+# Kind -> (template name, storage directory, file suffix)
+STUDENT_DOCUMENTS = {
+    'acceptance': ('acceptance_letter', 'students/letters', 'acceptance-letter'),
+    'certificate': ('completion_certificate', 'students/certificates', 'certificate'),
+}
+
+
+def student_document_name(student, kind):
+    """Deterministic storage name, so regenerating replaces the previous file"""
+    _, directory, suffix = STUDENT_DOCUMENTS[kind]
+    return f'{directory}/{student.student_id or f"student-{student.pk}"}-{suffix}.pdf'
+
+
+def certificate_id(student):
+    year = (student.completion_date or student.enrollment_date).year
+    return f'BTC-{year}-{student.pk:05d}'
+
+
+def render_student_chunk(students, kind):
+    """[(pk, pdf bytes or None, error)]; runs in a pdf_batch worker"""
+    template = get_template(STUDENT_DOCUMENTS[kind][0])
+    results = []
+    for student in students:
+        try:
+            results.append((student.pk, template.render(student), None))
+        except Exception as e:
+            results.append((student.pk, None, str(e)))
+    return results
+
+
+def _with_certificate_ids(chunks):
+    from core.models import Student
+
+    for chunk in chunks:
+        missing = [student for student in chunk if not student.certificate_id]
+        for student in missing:
+            student.certificate_id = certificate_id(student)
+        Student.objects.bulk_update(missing, ['certificate_id'])
+        yield chunk
+
+
+def generate_student_documents(queryset, kind, workers=1, chunk_size=100, on_progress=None):
+    """
+    Render acceptance letters or completion certificates for ``queryset`` and
+    write them to media storage. Certificates are only issued to completed
+    students; those without a certificate_id get one. Returns the BatchProgress
+    and the number of students skipped.
+    """
+    queryset = queryset.select_related('course')
+    skipped = 0
+    if kind == 'certificate':
+        skipped = queryset.exclude(status='completed').count()
+        queryset = queryset.filter(status='completed')
+
+    progress = BatchProgress(queryset.count())
+    chunks = iter_chunks(queryset, chunk_size)
+    if kind == 'certificate':
+        chunks = _with_certificate_ids(chunks)
+    for chunk, results in run_batch(chunks, render_student_chunk, workers, kind):
+        students = {student.pk: student for student in chunk}
+        for pk, content, error in results:
+            if error:
+                logger.warning(f"Could not render {kind} for student {pk}: {error}")
+                continue
+            name = student_document_name(students[pk], kind)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(name, ContentFile(content))
+        progress.update(results)
+        if on_progress:
+            on_progress(progress)
+    return progress, skipped
@@ -1,160 +1,115 @@
 # core/services/whatsapp.py
-import os
 from django.conf import settings
-from twilio.rest import Client
+from twilio.base.exceptions import TwilioException, TwilioRestException
 import logging
 
+from core.services.http_clients import twilio_client
+from core.services.notification_templates import application_context, template_registry
+from core.utils.phone_numbers import DEFAULT_COUNTRY, normalize_phone
+
 logger = logging.getLogger(__name__)
 
+
+class WhatsAppSendError(Exception):
+    """A send that failed; ``retryable`` is False when trying again can't help (bad number, bad template...)"""
+
+    def __init__(self, message, retryable=True, code=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.code = code
+
+
+def format_whatsapp_number(phone_number, country=DEFAULT_COUNTRY):
+    """Format ANY phone number for WhatsApp"""
+    number = normalize_phone(phone_number, country) or '+' + ''.join(filter(str.isdigit, phone_number))
+    return f"whatsapp:{number}"
+
+
+def sandbox_allows(number):
+    """The Twilio sandbox only delivers to numbers that joined it (WHATSAPP_TEST_NUMBERS)"""
+    if not getattr(settings, 'WHATSAPP_SANDBOX_MODE', False):
+        return True
+    allowed = {format_whatsapp_number(test) for test in getattr(settings, 'WHATSAPP_TEST_NUMBERS', []) if test.strip()}
+    return format_whatsapp_number(number) in allowed
+
+
 class WhatsAppService:
     """WhatsApp messaging service using Twilio"""
-    
+
     def __init__(self):
         self.account_sid = settings.TWILIO_ACCOUNT_SID
         self.auth_token = settings.TWILIO_AUTH_TOKEN
         self.from_number = settings.TWILIO_WHATSAPP_NUMBER
-        self.client = Client(self.account_sid, self.auth_token) if self.account_sid else None
-    
+        # Shared per process, so every instance reuses the same keep-alive connections
+        self.client = twilio_client(self.account_sid, self.auth_token)
+
     def _format_phone_number(self, phone_number):
-        """Format ANY phone number for WhatsApp"""
-        cleaned = ''.join(filter(str.isdigit, phone_number))
-        
-        if cleaned.startswith('263'):
-            formatted = '+' + cleaned
-        elif cleaned.startswith('0'):
-            formatted = '+27' + cleaned[1:]
-        elif cleaned.startswith('27'):
-            formatted = '+' + cleaned
-        else:
-            formatted = '+' + cleaned
-        
-        return f"whatsapp:{formatted}"
-    
-    def send_approval_message(self, to_number, student_name, course_name):
-        """Send application approval notification using pre-approved template"""
+        return format_whatsapp_number(phone_number)
+
+    def send(self, to_number, body='', content_sid='', content_variables=None):
+        """
+        Make one Twilio API call and return the message SID. Raises
+        WhatsAppSendError instead of swallowing failures, so the outbox worker
+        can decide whether to retry.
+        """
         if not self.client:
-            logger.error("Twilio client not initialized")
-            return False
-        
-        try:
-            to_whatsapp = self._format_phone_number(to_number)
-            
-            # IMPORTANT: Using Twilio's pre-approved "order_notification" template
-            # Content ID: HX350d429d32e64a552466cafece95f3c
-            # This template has variables: {{1}} and {{2}}
-            
-            # Map our message to fit the template
-            current_time = "now"  # Placeholder
-            delivery_time = "today"  # Placeholder
-            
-            message = self.client.messages.create(
-                content_sid='HX350d429d32e64a552466cafece95f3c',  # Pre-approved template
-                content_variables={
-                    '1': f"{student_name}",  # Name
-                    '2': f"{course_name}"    # Course
-                },
-                from_=self.from_number,
-                to=to_whatsapp
-            )
-            
-            logger.info(f"WhatsApp template sent to {to_number}. SID: {message.sid}")
-            
-            # AFTER they reply, you can send free-form messages for 24 hours
-            # So we'll send a follow-up with the actual message if we want
-            if message.sid:
-                self._send_followup_message(to_whatsapp, student_name, course_name)
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"WhatsApp error: {str(e)}")
-            return False
-    
-    def _send_followup_message(self, to_whatsapp, student_name, course_name):
-        """Send the actual message after user has replied (free form)"""
-        try:
-            # This only works if the user has replied to the template message
-            message_body = f"""
-🎉 CONGRATULATIONS {student_name.upper()}!
-
-You have been ACCEPTED into the {course_name} programme at Bathudi Automotive Training Center 🇿🇦
-
-📋 NEXT STEPS:
-1. Visit our offices for registration
-2. Bring your ID document
-3. Bring your Matric certificate
-4. Bring proof of payment (R661.25)
-
-📍 Address: 123 Training Street, Johannesburg
-📞 Contact: +27 68 917 6294
-
-We look forward to welcoming you! 🚗🔧
-
-- Bathudi Management
-            """.strip()
-            
-            followup = self.client.messages.create(
-                body=message_body,
-                from_=self.from_number,
-                to=to_whatsapp
-            )
-            
-            logger.info(f"Follow-up message sent. SID: {followup.sid}")
-            
-        except Exception as e:
-            logger.error(f"Follow-up error: {str(e)}")
-    
-    def send_rejection_message(self, to_number, student_name, course_name, reason=None):
-        """Send rejection notification"""
-        try:
-            to_whatsapp = self._format_phone_number(to_number)
-            
-            # Also use template for first message
-            message = self.client.messages.create(
-                content_sid='HX350d429d32e64a552466cafece95f3c',  # Same template
-                content_variables={
-                    '1': f"{student_name}",
-                    '2': f"application status update"
-                },
-                from_=self.from_number,
-                to=to_whatsapp
-            )
-            
-            # Follow up with rejection message after they reply
-            if message.sid:
-                self._send_rejection_followup(to_whatsapp, student_name, course_name, reason)
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"WhatsApp rejection error: {str(e)}")
-            return False
-    
-    def _send_rejection_followup(self, to_whatsapp, student_name, course_name, reason=None):
-        """Send rejection message after user replies"""
+            raise WhatsAppSendError("Twilio client not initialized (TWILIO_ACCOUNT_SID is not set)")
+
+        params = {'from_': self.from_number, 'to': self._format_phone_number(to_number)}
+        if content_sid:
+            params['content_sid'] = content_sid
+            params['content_variables'] = content_variables or {}
+        else:
+            params['body'] = body
+        if settings.TWILIO_STATUS_CALLBACK_URL:
+            params['status_callback'] = settings.TWILIO_STATUS_CALLBACK_URL
+
         try:
-            message_body = f"""
-Thank you for your interest in {course_name} at Bathudi Automotive Training Center.
-
-After careful review, we regret to inform you that your application has been unsuccessful at this time.
-            """.strip()
-            
-            if reason:
-                message_body += f"\n\nReason: {reason}"
-            
-            message_body += """
-
-You are welcome to reapply in the future when you meet the minimum requirements.
-
-Kind regards,
-Bathudi Management
-            """.strip()
-            
-            followup = self.client.messages.create(
-                body=message_body,
-                from_=self.from_number,
-                to=to_whatsapp
-            )
-            
-        except Exception as e:
-            logger.error(f"Rejection follow-up error: {str(e)}")
\ No newline at end of file
+            message = self.client.messages.create(**params)
+        except TwilioRestException as e:
+            # 429 and 5xx are Twilio being busy; anything else is about this message
+            retryable = e.status == 429 or e.status >= 500
+            raise WhatsAppSendError(f"Twilio {e.status} error {e.code}: {e.msg}", retryable=retryable, code=e.code) from e
+        except (TwilioException, OSError) as e:
+            raise WhatsAppSendError(f"Could not reach Twilio: {e}") from e
+
+        logger.info(f"WhatsApp message sent to {to_number}. SID: {message.sid}")
+        return message.sid
+
+
+# ========== STATUS NOTIFICATIONS ==========
+def approval_followup_body(application):
+    """The free-form approval message; only delivered once the student has replied to the template"""
+    return template_registry.render('whatsapp_approval', **application_context(application))
+
+
+def rejection_followup_body(application):
+    """The free-form rejection message; only delivered once the student has replied to the template"""
+    return template_registry.render('whatsapp_rejection', **application_context(application))
+
+
+def status_messages(application):
+    """
+    [(kind, fields)] to queue when ``application`` is approved or rejected: the
+    pre-approved template first (it opens the conversation), then the free-form
+    follow-up, which is only sent after the template went out.
+    """
+    student_name = application.name
+    course_name = application.course.title if application.course else application.course_title
+    if application.status == 'approved':
+        return [
+            ('approval', {
+                'content_sid': settings.TWILIO_ORDER_TEMPLATE_SID,
+                'content_variables': {'1': student_name, '2': course_name},
+            }),
+            ('approval_followup', {'body': approval_followup_body(application)}),
+        ]
+    if application.status == 'rejected':
+        return [
+            ('rejection', {
+                'content_sid': settings.TWILIO_ORDER_TEMPLATE_SID,
+                'content_variables': {'1': student_name, '2': 'application status update'},
+            }),
+            ('rejection_followup', {'body': rejection_followup_body(application)}),
+        ]
+    return []
@@ -0,0 +1,146 @@
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import WhatsAppMessage
+from core.services.whatsapp import WhatsAppSendError, sandbox_allows, status_messages
+
+logger = logging.getLogger(__name__)
+
+
+def _notifications_enabled(status):
+    if not getattr(settings, 'WHATSAPP_NOTIFICATIONS_ENABLED', True):
+        return False
+    if status == 'approved':
+        return getattr(settings, 'WHATSAPP_SEND_APPROVAL', True)
+    if status == 'rejected':
+        return getattr(settings, 'WHATSAPP_SEND_REJECTION', True)
+    return False
+
+
+def queue_status_messages(applications):
+    """
+    Queue the WhatsApp notifications for applications that were just approved
+    or rejected. Call it inside the transaction that changed the status, so the
+    messages exist if and only if the change was committed.
+    """
+    queued = []
+    for application in applications:
+        if not application.mobile or not _notifications_enabled(application.status):
+            continue
+        if not sandbox_allows(application.mobile):
+            logger.info(f"Sandbox mode: not queueing WhatsApp messages for application {application.pk}")
+            continue
+        previous = None
+        for kind, fields in status_messages(application):
+            previous = WhatsAppMessage.objects.create(
+                application=application, kind=kind, to_number=application.mobile_e164 or application.mobile,
+                depends_on=previous, **fields,
+            )
+            queued.append(previous)
+    return queued
+
+
+# ========== WORKER SIDE ==========
+def _claimable(now, lease):
+    due = Q(status='pending', next_attempt_at__lte=now) | Q(status='sending', locked_at__lt=now - lease)
+    ready = Q(depends_on__isnull=True) | Q(depends_on__status='sent')
+    return WhatsAppMessage.objects.filter(due & ready)
+
+
+def claim_batch(limit, lease=None):
+    """
+    Mark up to ``limit`` due messages as 'sending' and return them. Rows claimed
+    by a worker that died are reclaimed once their lease expires. Workers never
+    get the same row: Postgres skips locked rows, elsewhere each claim is a
+    compare-and-set UPDATE.
+    """
+    lease = lease or timedelta(seconds=getattr(settings, 'WHATSAPP_CLAIM_LEASE_SECONDS', 300))
+    now = timezone.now()
+    candidates = _claimable(now, lease).order_by('next_attempt_at', 'pk')
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            pks = list(candidates.select_for_update(skip_locked=True, of=('self',)).values_list('pk', flat=True)[:limit])
+            WhatsAppMessage.objects.filter(pk__in=pks).update(status='sending', locked_at=now)
+    else:
+        pks = []
+        for pk in candidates.values_list('pk', flat=True)[:limit]:
+            if _claimable(now, lease).filter(pk=pk).update(status='sending', locked_at=now):
+                pks.append(pk)
+
+    return list(WhatsAppMessage.objects.filter(pk__in=pks).order_by('next_attempt_at', 'pk'))
+
+
+def backoff_delay(attempts):
+    """Exponential backoff with equal jitter: half the step is fixed, half is random"""
+    base = getattr(settings, 'WHATSAPP_RETRY_BASE_SECONDS', 30)
+    cap = getattr(settings, 'WHATSAPP_RETRY_MAX_SECONDS', 3600)
+    step = min(cap, base * 2 ** max(attempts - 1, 0))
+    return step / 2 + random.uniform(0, step / 2)
+
+
+def send_message(service, message):
+    """(sid, error) for one claimed message; runs in a worker thread and never touches the database"""
+    try:
+        sid = service.send(
+            message.to_number, body=message.body,
+            content_sid=message.content_sid, content_variables=message.content_variables,
+        )
+        return sid, None
+    except WhatsAppSendError as e:
+        return None, e
+    except Exception as e:
+        logger.exception(f"Unexpected error sending WhatsApp message {message.pk}")
+        return None, WhatsAppSendError(str(e))
+
+
+def record_result(message, sid=None, error=None):
+    """Store the outcome of one attempt: sent, scheduled for a retry, or failed for good"""
+    now = timezone.now()
+    attempts = message.attempts + 1
+    if error is None:
+        WhatsAppMessage.objects.filter(pk=message.pk).update(
+            status='sent', attempts=attempts, twilio_sid=sid or '', sent_at=now, locked_at=None, last_error='', updated_at=now,
+        )
+        return 'sent'
+
+    max_attempts = getattr(settings, 'WHATSAPP_MAX_ATTEMPTS', 6)
+    if error.retryable and attempts < max_attempts:
+        delay = backoff_delay(attempts)
+        WhatsAppMessage.objects.filter(pk=message.pk).update(
+            status='pending', attempts=attempts, next_attempt_at=now + timedelta(seconds=delay),
+            locked_at=None, last_error=str(error), updated_at=now,
+        )
+        logger.warning(f"WhatsApp message {message.pk} failed (attempt {attempts}), retrying in {delay:.0f}s: {error}")
+        return 'retry'
+
+    WhatsAppMessage.objects.filter(pk=message.pk).update(
+        status='failed', attempts=attempts, locked_at=None, last_error=str(error), updated_at=now,
+    )
+    fail_dependents(message.pk)
+    logger.error(f"WhatsApp message {message.pk} failed permanently after {attempts} attempts: {error}")
+    return 'failed'
+
+
+def process_batch(pool, send, batch):
+    """Send a claimed batch on ``pool`` (send(message) -> (sid, error)) and record each result from this thread"""
+    return [record_result(message, sid, error) for message, (sid, error) in zip(batch, pool.map(send, batch))]
+
+
+def fail_dependents(pk):
+    """Follow-ups of a message that will never be sent can't be sent either"""
+    pending = [pk]
+    while pending:
+        dependents = list(
+            WhatsAppMessage.objects.filter(depends_on_id__in=pending, status='pending').values_list('pk', flat=True)
+        )
+        WhatsAppMessage.objects.filter(pk__in=dependents).update(
+            status='failed', last_error='Not sent: the message it follows failed', updated_at=timezone.now(),
+        )
+        pending = dependents
@@ -0,0 +1,90 @@
+import logging
+
+from django.db import connections, transaction
+from django.db.models.signals import pre_save, post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from .models import (
+    Application, Course, Student,
+    GalleryImage, NewsPost, TeamMember, Testimonial, Video, DirectorMessage, MessageTemplate
+)
+from .services.course_pdfs import course_pdf_is_stale, manages_pdf
+from .services.course_resolver import course_resolver
+from .services.image_variants import IMAGE_VARIANT_FIELDS, needs_variants
+from .services.notification_templates import template_registry
+from .services.render_jobs import queue_render
+from .services.search import ensure_sqlite_fts
+from .services.stats import counted_values, record_delete
+from .utils.response_cache import bump_model_version
+
+logger = logging.getLogger(__name__)
+
+
+# ========== COURSE SIGNALS ==========
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_index(sender, **kwargs):
+    """Rebuild the course resolver index after any course change"""
+    course_resolver.invalidate()
+
+
+@receiver(post_save, sender=Course)
+def regenerate_course_pdf(sender, instance, raw=False, **kwargs):
+    """Queue the generated outline for run_render_worker if its content hash changed"""
+    if not raw and manages_pdf(instance) and course_pdf_is_stale(instance):
+        queue_render('course_pdf', instance)
+
+
+# ========== NOTIFICATION TEMPLATES ==========
+@receiver([post_save, post_delete], sender=MessageTemplate)
+def invalidate_message_templates(sender, **kwargs):
+    """Recompile the notification templates after an edit"""
+    template_registry.invalidate()
+
+
+# ========== STATS COUNTERS ==========
+@receiver(post_delete, sender=Application)
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Course)
+def uncount_deleted(sender, instance, **kwargs):
+    """Take a deleted row off the counters; runs inside the delete's transaction"""
+    values = getattr(instance, '_counted_values', None) or counted_values(instance)
+    if values is not None:
+        record_delete(instance, values)
+
+
+# ========== RESPONSE CACHE ==========
+CACHED_MODELS = (Course, GalleryImage, NewsPost, TeamMember, Testimonial, Video, DirectorMessage)
+
+
+@receiver([post_save, post_delete])
+def invalidate_cached_responses(sender, **kwargs):
+    """Bump the model version once the write commits, retiring its cached responses"""
+    if sender in CACHED_MODELS:
+        transaction.on_commit(lambda: bump_model_version(sender))
+
+
+# ========== IMAGE VARIANTS ==========
+@receiver(pre_save)
+def clear_image_variants(sender, instance, raw=False, **kwargs):
+    """Forget the renditions of an image that was removed"""
+    field = IMAGE_VARIANT_FIELDS.get(sender._meta.label_lower)
+    if field and not raw and not getattr(instance, field) and instance.image_variants:
+        instance.image_variants = {}
+
+
+@receiver(post_save)
+def render_image_variants(sender, instance, raw=False, **kwargs):
+    """Queue resized variants of a new or replaced image for run_render_worker"""
+    if not raw and needs_variants(instance):
+        queue_render('image_variants', instance)
+
+
+# ========== SEARCH INDEX ==========
+@receiver(post_migrate)
+def repair_search_index(sender, app_config, using, **kwargs):
+    """Restore the SQLite FTS triggers if a table rebuild dropped them"""
+    if app_config.label != 'core':
+        return
+    connection = connections[using]
+    if connection.vendor == 'sqlite' and 'core_application' in connection.introspection.table_names():
+        ensure_sqlite_fts(connection)
@@ -1,3 +1,846 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from pypdf import PdfReader, PdfWriter
+from rest_framework.test import APIClient
+
+from .admin import StudentAdmin
+from .models import (
+    Application, Broadcast, Course, GalleryImage, MessageDelivery, ModelVersion, RenderJob, StatCounter, Student,
+    Testimonial, WhatsAppMessage,
+)
+from .services.delivery_status import StatusBuffer, status_buffer, write_statuses
+from .services.dossier import dossier_stream
+from .services.render_jobs import claim_jobs, run_job
+from .services.student_documents import student_document_name
+from .services.stats import compute_counters, get_counters, recount_counters, update_counted
+from .services.whatsapp import WhatsAppService
+from .services.whatsapp_outbox import backoff_delay, claim_batch, queue_status_messages, record_result, send_message
+from .utils.fake_twilio import FakeTwilioServer
+from .utils.phone_numbers import normalize_phone, normalize_phones
+from .utils.static_files import StaticIndex, load_manifest, static_url, write_manifest
+from .utils.uploads import PARTIAL_SUFFIX, StreamingDocumentUploadHandler
+from .utils.pdf_generator import render_pdf
+
+
+class MediaTestCase(TestCase):
+    """A TestCase with MEDIA_ROOT in a temporary directory"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+
+def sample_pdf(pages=1):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def sample_jpeg(size=(40, 30)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+# ========== DOCUMENT UPLOADS ==========
+class StreamingUploadTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        Course.objects.create(title='Occupational Certificate: Automotive Engine Repairer', description='-', duration='9 months')
+        self.id_bytes = b'%PDF-1.4 ' + os.urandom(200 * 1024)
+
+    def submission(self, **extra):
+        data = {
+            'name': 'Thabo', 'surname': 'Mokoena', 'age': 20, 'country': 'South Africa', 'mobile': '0821234567',
+            'email': 'thabo@example.com', 'course_id': 'automotive_engine_repairer',
+            'id_document': SimpleUploadedFile('id.pdf', self.id_bytes, content_type='application/pdf'),
+            'proof_of_payment': SimpleUploadedFile('pop.jpg', sample_jpeg(), content_type='image/jpeg'),
+        }
+        data.update(extra)
+        return data
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        )
+
+    def test_upload_is_stored_and_finalised_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/applications/', self.submission(), format='multipart')
+        self.assertEqual(response.status_code, 201)
+
+        application = Application.objects.get()
+        with application.id_document.open('rb') as stored:
+            self.assertEqual(stored.read(), self.id_bytes)
+        metadata = application.document_metadata['id_document']
+        self.assertEqual(metadata['size'], len(self.id_bytes))
+        self.assertEqual(metadata['sha256'], hashlib.sha256(self.id_bytes).hexdigest())
+        self.assertEqual(metadata['original_name'], 'id.pdf')
+        self.assertFalse(any(name.endswith(PARTIAL_SUFFIX) for name in self.stored_files()))
+
+    def test_documents_wait_for_the_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.post('/api/applications/', self.submission(), format='multipart')
+        self.assertEqual(response.status_code, 201)
+        application = Application.objects.get()
+        # Until the row commits, the bytes sit in .part files behind empty placeholders
+        self.assertEqual(os.path.getsize(application.id_document.path), 0)
+        self.assertTrue(os.path.exists(application.id_document.path + PARTIAL_SUFFIX))
+        for callback in callbacks:
+            callback()
+        self.assertEqual(os.path.getsize(application.id_document.path), len(self.id_bytes))
+
+    def test_rolled_back_submission_leaves_no_files(self):
+        with mock.patch('core.views.transaction.on_commit', side_effect=RuntimeError('database went away')):
+            response = self.client.post('/api/applications/', self.submission(), format='multipart')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(Application.objects.count(), 0)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_invalid_submission_leaves_no_files(self):
+        response = self.client.post('/api/applications/', self.submission(email='not-an-email'), format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_same_file_name_gets_its_own_reservation(self):
+        handler = StreamingDocumentUploadHandler()
+        first, first_part = handler._open_destination('id_document', 'id.pdf')
+        second, second_part = handler._open_destination('id_document', 'id.pdf')
+        first_part.close()
+        second_part.close()
+        self.assertNotEqual(first, second)
+        for name in (first, second):
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+            self.assertTrue(os.path.exists(os.path.join(self.media_root, name + PARTIAL_SUFFIX)))
+
+
+# ========== APPLICATIONS LIST ==========
+class ApplicationListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        statuses = ['approved', 'pending', 'rejected'] * 3 + ['pending']
+        Application.objects.bulk_create([
+            Application(name=f'Applicant{i}', surname='Test', age=20, email=f'a{i}@example.com', mobile='0821234567',
+                        status=status)
+            for i, status in enumerate(statuses)
+        ])
+
+    def test_status_filter_applies_before_paging(self):
+        seen = []
+        url = '/api/applications/?status=pending&page_size=2'
+        while url:
+            data = self.client.get(url).json()
+            self.assertTrue(all(row['status'] == 'pending' for row in data['results']))
+            seen.extend(row['id'] for row in data['results'])
+            url = data['next']
+        self.assertEqual(len(seen), 4)
+        self.assertEqual(len(set(seen)), 4)
+
+    def test_pending_action_returns_a_plain_list(self):
+        data = self.client.get('/api/applications/pending/').json()
+        self.assertIsInstance(data, list)
+        self.assertEqual(len(data), 4)
+
+
+# ========== CONDITIONAL GET ==========
+class ConditionalGetTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.course = Course.objects.create(title='Automotive Suspension Fitter', description='-', duration='6 months')
+
+    def test_unchanged_course_list_is_not_modified(self):
+        response = self.client.get('/api/courses/')
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/courses/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.course.title = 'Automotive Suspension Fitter (NQF 3)'
+        self.course.save()
+        self.assertEqual(self.client.get('/api/courses/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_course_detail_sends_last_modified(self):
+        response = self.client.get(f'/api/courses/{self.course.pk}/')
+        self.assertIn('Last-Modified', response)
+        response = self.client.get(f'/api/courses/{self.course.pk}/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_testimonials_change_with_their_course(self):
+        Testimonial.objects.create(student_name='Sipho', course=self.course, content='Great course')
+        etag = self.client.get('/api/testimonials/')['ETag']
+        self.assertEqual(self.client.get('/api/testimonials/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.course.title = 'Automotive Suspension Fitter (NQF 3)'
+        self.course.save()
+        self.assertEqual(self.client.get('/api/testimonials/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_application_reads_change_with_bulk_updates(self):
+        application = Application.objects.create(
+            name='Lerato', surname='Dube', age=20, email='lerato@example.com', mobile='0821234567', course=self.course,
+        )
+        list_etag = self.client.get('/api/applications/')['ETag']
+        detail_etag = self.client.get(f'/api/applications/{application.pk}/')['ETag']
+        self.assertEqual(self.client.get('/api/applications/', HTTP_IF_NONE_MATCH=list_etag).status_code, 304)
+
+        update_counted(Application.objects.all(), status='approved')
+        self.assertEqual(self.client.get('/api/applications/', HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+        response = self.client.get(f'/api/applications/{application.pk}/', HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_other_endpoints_are_not_hashed(self):
+        response = self.client.get('/api/students/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+
+# ========== RESPONSE CACHE ==========
+class ResponseCacheTests(TestCase):
+    def contents(self):
+        return [testimonial['content'] for testimonial in APIClient().get('/api/testimonials/').json()]
+
+    def test_version_bumped_by_another_process_invalidates_the_cache(self):
+        testimonial = Testimonial.objects.create(student_name='Sipho', content='Great course')
+        self.assertEqual(self.contents(), ['Great course'])
+        # Skips the signals, so this process' cache still has the old list
+        Testimonial.objects.filter(pk=testimonial.pk).update(content='Life changing')
+        self.assertEqual(self.contents(), ['Great course'])
+
+        # What bump_model_version in another worker writes
+        ModelVersion.objects.filter(label='core.testimonial').update(version=F('version') + 1)
+        self.assertEqual(self.contents(), ['Life changing'])
+
+
+# ========== WHATSAPP OUTBOX ==========
+@override_settings(
+    TWILIO_ACCOUNT_SID='AC' + 'a' * 32, TWILIO_AUTH_TOKEN='test-token', TWILIO_STATUS_CALLBACK_URL='',
+    WHATSAPP_NOTIFICATIONS_ENABLED=True, WHATSAPP_SEND_APPROVAL=True, WHATSAPP_SEND_REJECTION=True,
+    WHATSAPP_SANDBOX_MODE=False, WHATSAPP_MAX_ATTEMPTS=3,
+    WHATSAPP_RETRY_BASE_SECONDS=30, WHATSAPP_RETRY_MAX_SECONDS=3600,
+)
+class WhatsAppOutboxTests(TestCase):
+    """The outbox against a local fake Twilio answering 201, 429, 503 or 400"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake = FakeTwilioServer().__enter__()
+        cls.addClassCleanup(cls.fake.__exit__, None, None, None)
+
+    def setUp(self):
+        self.fake.error_rate = self.fake.throttle_rate = self.fake.invalid_rate = 0
+        api = override_settings(TWILIO_API_BASE_URL=self.fake.base_url)
+        api.enable()
+        self.addCleanup(api.disable)
+        self.application = Application.objects.create(
+            name='Thabo', surname='Mokoena', age=20, mobile='0821234567', email='t@example.com',
+            course_title='Diesel Mechanic', status='approved',
+        )
+        self.template, self.followup = queue_status_messages([self.application])
+
+    def attempt(self):
+        """Claim everything due, send it through the fake and record the results"""
+        service = WhatsAppService()
+        return {message.kind: record_result(message, *send_message(service, message)) for message in claim_batch(10)}
+
+    def make_due(self, message):
+        WhatsAppMessage.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+
+    def test_template_is_sent_before_its_follow_up(self):
+        self.assertEqual(self.attempt(), {'approval': 'sent'})
+        self.template.refresh_from_db()
+        self.assertTrue(self.template.twilio_sid.startswith('SM'))
+        self.assertEqual(self.attempt(), {'approval_followup': 'sent'})
+        self.assertEqual(self.fake.messages[WhatsAppMessage.objects.get(pk=self.followup.pk).twilio_sid]['to'], 'whatsapp:+27821234567')
+
+    def test_throttled_and_unavailable_sends_back_off_then_give_up(self):
+        self.fake.throttle_rate = 1
+        before = timezone.now()
+        self.assertEqual(self.attempt(), {'approval': 'retry'})
+        self.template.refresh_from_db()
+        self.assertEqual((self.template.status, self.template.attempts), ('pending', 1))
+        self.assertIn('429', self.template.last_error)
+        # First retry waits between half and all of the 30s base step
+        delay = (self.template.next_attempt_at - before).total_seconds()
+        self.assertTrue(15 <= delay <= 31, delay)
+        self.assertEqual(self.attempt(), {})
+
+        self.fake.throttle_rate, self.fake.error_rate = 0, 1
+        self.make_due(self.template)
+        self.assertEqual(self.attempt(), {'approval': 'retry'})
+        self.make_due(self.template)
+        with self.assertLogs('core.services.whatsapp_outbox', level='ERROR'):
+            self.assertEqual(self.attempt(), {'approval': 'failed'})
+        self.template.refresh_from_db()
+        self.followup.refresh_from_db()
+        self.assertEqual((self.template.status, self.template.attempts), ('failed', 3))
+        self.assertIn('503', self.template.last_error)
+        self.assertEqual(self.followup.status, 'failed')
+
+    def test_retry_succeeds_once_twilio_recovers(self):
+        self.fake.error_rate = 1
+        self.assertEqual(self.attempt(), {'approval': 'retry'})
+        self.fake.error_rate = 0
+        self.make_due(self.template)
+        self.assertEqual(self.attempt(), {'approval': 'sent'})
+        self.template.refresh_from_db()
+        self.assertEqual((self.template.status, self.template.attempts, self.template.last_error), ('sent', 2, ''))
+
+    def test_invalid_number_fails_at_once_with_its_follow_ups(self):
+        self.fake.invalid_rate = 1
+        with self.assertLogs('core.services.whatsapp_outbox', level='ERROR'):
+            self.assertEqual(self.attempt(), {'approval': 'failed'})
+        self.template.refresh_from_db()
+        self.followup.refresh_from_db()
+        self.assertEqual((self.template.status, self.template.attempts), ('failed', 1))
+        self.assertEqual(self.followup.status, 'failed')
+        self.assertEqual(self.followup.attempts, 0)
+        self.assertEqual(self.attempt(), {})
+
+    def test_claimed_rows_are_not_claimed_twice_until_the_lease_expires(self):
+        claimed = claim_batch(10)
+        self.assertEqual([message.pk for message in claimed], [self.template.pk])
+        self.assertEqual(claim_batch(10), [])
+        WhatsAppMessage.objects.filter(pk=self.template.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual([message.pk for message in claim_batch(10)], [self.template.pk])
+
+    def test_backoff_grows_exponentially_up_to_the_cap(self):
+        for attempts, step in ((1, 30), (2, 60), (3, 120), (20, 3600)):
+            for _ in range(20):
+                self.assertTrue(step / 2 <= backoff_delay(attempts) <= step)
+
+
+# ========== DELIVERY STATUS ==========
+def status_entry(status, error_code=''):
+    return {'status': status, 'error_code': error_code, 'to_number': '+27821234567', 'reported_at': timezone.now()}
+
+
+class DeliveryStatusTests(TestCase):
+    def stored(self, sid='SM1'):
+        return MessageDelivery.objects.get(sid=sid).status
+
+    def test_statuses_never_move_backwards(self):
+        write_statuses({'SM1': status_entry('delivered')})
+        # A late 'sent' from another worker must not overwrite it, whatever it read before
+        write_statuses({'SM1': status_entry('sent')})
+        self.assertEqual(self.stored(), 'delivered')
+        write_statuses({'SM1': status_entry('read'), 'SM2': status_entry('queued')})
+        self.assertEqual(self.stored(), 'read')
+        self.assertEqual(self.stored('SM2'), 'queued')
+
+    def test_final_states_of_equal_rank_take_the_latest(self):
+        write_statuses({'SM1': status_entry('delivered')})
+        write_statuses({'SM1': status_entry('undelivered', '63016')})
+        delivery = MessageDelivery.objects.get(sid='SM1')
+        self.assertEqual((delivery.status, delivery.error_code), ('undelivered', '63016'))
+
+    def callback(self, status, sid='SM1'):
+        return self.client.post('/api/webhooks/twilio/status/', {'MessageSid': sid, 'MessageStatus': status, 'To': 'whatsapp:+27821234567'})
+
+    @override_settings(TWILIO_AUTH_TOKEN='', WHATSAPP_STATUS_BUFFERED=False)
+    def test_callback_is_stored_before_the_webhook_answers(self):
+        self.assertEqual(self.callback('sent').status_code, 204)
+        self.assertEqual(self.stored(), 'sent')
+        self.assertEqual(self.callback('delivered').status_code, 204)
+        self.assertEqual(self.callback('sent').status_code, 204)
+        self.assertEqual(self.stored(), 'delivered')
+
+    @override_settings(TWILIO_AUTH_TOKEN='', WHATSAPP_STATUS_BUFFERED=False)
+    def test_callback_that_cannot_be_stored_is_not_acknowledged(self):
+        self.client.raise_request_exception = False
+        with mock.patch('core.services.delivery_status.write_statuses', side_effect=RuntimeError('database down')):
+            with self.assertLogs('django.request', level='ERROR'):
+                self.assertEqual(self.callback('sent').status_code, 500)
+
+    def test_many_statuses_are_one_insert_per_batch(self):
+        entries = {f'SM{i}': status_entry('sent') for i in range(7)}
+        with mock.patch('core.services.delivery_status._batch_size', return_value=3), \
+                CaptureQueriesContext(connection) as queries:
+            self.assertEqual(write_statuses(entries), 7)
+        self.assertEqual(sum(query['sql'].startswith('INSERT') for query in queries), 3)
+        self.assertEqual(MessageDelivery.objects.filter(status='sent').count(), 7)
+
+    @override_settings(TWILIO_AUTH_TOKEN='')
+    @mock.patch.object(StatusBuffer, '_ensure_thread')
+    def test_callbacks_are_buffered_by_default(self, ensure_thread):
+        self.addCleanup(status_buffer.flush)
+        self.assertEqual(self.callback('delivered').status_code, 204)
+        self.assertFalse(MessageDelivery.objects.exists())
+        self.assertEqual(status_buffer.flush(), 1)
+        self.assertEqual(self.stored(), 'delivered')
+
+    @mock.patch.object(StatusBuffer, '_ensure_thread')
+    def test_buffer_collapses_callbacks_and_flushes_the_highest(self, ensure_thread):
+        buffer = StatusBuffer(flush_size=100, flush_interval=60, max_size=1000)
+        for status in ('queued', 'delivered', 'sent'):
+            buffer.add('SM1', status)
+        buffer.add('SM2', 'sent')
+        self.assertEqual(MessageDelivery.objects.count(), 0)
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(self.stored(), 'delivered')
+        self.assertEqual(buffer.flush(), 0)
+
+    @mock.patch.object(StatusBuffer, '_ensure_thread')
+    def test_buffer_keeps_entries_when_a_flush_fails(self, ensure_thread):
+        buffer = StatusBuffer(flush_size=100, flush_interval=60, max_size=1000)
+        buffer.add('SM1', 'sent')
+        with mock.patch('core.services.delivery_status.write_statuses', side_effect=RuntimeError('database down')), \
+                mock.patch('core.services.delivery_status.connection.close'):
+            with self.assertRaises(RuntimeError):
+                buffer.flush()
+        buffer.add('SM2', 'delivered')
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(self.stored(), 'sent')
+
+    @mock.patch.object(StatusBuffer, '_ensure_thread')
+    def test_full_buffer_flushes_in_the_caller(self, ensure_thread):
+        buffer = StatusBuffer(flush_size=100, flush_interval=60, max_size=3)
+        for sid in ('SM1', 'SM2', 'SM3'):
+            buffer.add(sid, 'sent')
+        self.assertEqual(MessageDelivery.objects.count(), 3)
+
+
+# ========== STATS COUNTERS ==========
+class StatsCounterTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(title='Automotive Workshop Assistant', description='-', duration='3 months')
+
+    def application(self, **fields):
+        return Application.objects.create(
+            name='Lerato', surname='Dube', age=20, email='lerato@example.com', mobile='0821234567', **fields
+        )
+
+    def assertCountersMatchTables(self):
+        self.assertEqual(get_counters(), compute_counters())
+
+    def test_saves_and_deletes_move_the_counters(self):
+        first = self.application()
+        second = self.application(status='approved', fee_verified=True)
+        self.assertEqual(get_counters()['pending'], 1)
+        self.assertCountersMatchTables()
+
+        first.status = 'rejected'
+        first.save()
+        loaded = Application.objects.get(pk=second.pk)
+        loaded.status = 'contacted'
+        loaded.fee_verified = False
+        loaded.save()
+        self.assertCountersMatchTables()
+
+        # Fields left out of update_fields aren't written, so they don't count
+        first.status = 'approved'
+        first.save(update_fields=['notes'])
+        self.assertEqual(get_counters()['approved'], 0)
+        self.assertCountersMatchTables()
+
+        Student.objects.create(application=second, name='Lerato', surname='Dube', email='lerato@example.com')
+        first.delete()
+        Application.objects.filter(pk=second.pk).delete()
+        self.course.is_active = False
+        self.course.save()
+        self.assertCountersMatchTables()
+        self.assertEqual(get_counters()['students'], 1)
+
+    def test_missing_counter_rows_are_created(self):
+        StatCounter.objects.all().delete()
+        self.application()
+        self.assertEqual(dict(StatCounter.objects.values_list('name', 'value')), {'total': 1, 'pending': 1})
+
+    def test_save_of_an_instance_not_loaded_reads_the_stored_row(self):
+        stored = self.application()
+        Application(pk=stored.pk, name='Lerato', surname='Dube', age=20, email='lerato@example.com',
+                    mobile='0821234567', status='approved', applied_date=stored.applied_date).save()
+        self.assertEqual(get_counters()['pending'], 0)
+        self.assertCountersMatchTables()
+
+    def test_bulk_updates_move_the_counters(self):
+        for status in ['pending', 'pending', 'rejected']:
+            self.application(status=status)
+        self.assertEqual(update_counted(Application.objects.all(), status='approved', fee_verified=True), 3)
+        update_counted(Course.objects.all(), is_active=False)
+        self.assertCountersMatchTables()
+        self.assertEqual(get_counters()['approved'], 3)
+
+    def test_reading_is_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/dashboard/stats/')
+        self.assertEqual(response.json()['active_courses'], 1)
+
+    def test_recount_repairs_drift(self):
+        self.application()
+        Application.objects.bulk_create([
+            Application(name='Sipho', surname='Nkosi', age=20, email='sipho@example.com', mobile='0821234567'),
+        ])
+        with self.assertLogs('core.services.stats', 'WARNING'):
+            self.assertEqual(recount_counters(), {'total': (1, 2), 'pending': (1, 2)})
+        self.assertCountersMatchTables()
+
+
+# ========== RENDER JOBS ==========
+@override_settings(IMAGE_VARIANT_WIDTHS=[16, 32], RENDER_MAX_ATTEMPTS=2, RENDER_RETRY_SECONDS=60)
+class RenderJobTests(MediaTestCase):
+    def gallery_image(self):
+        return GalleryImage.objects.create(
+            title='Workshop', image=SimpleUploadedFile('workshop.jpg', sample_jpeg(), content_type='image/jpeg'),
+        )
+
+    def test_saving_an_image_queues_its_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = self.gallery_image()
+            image.save()
+        # Nothing rendered in the request: one job waits for the worker
+        image.refresh_from_db()
+        self.assertEqual(image.image_variants, {})
+        job = RenderJob.objects.get()
+        self.assertEqual((job.kind, job.label, job.object_id), ('image_variants', 'core.galleryimage', image.pk))
+
+        claimed = claim_jobs(10)
+        self.assertEqual(claimed, [job])
+        self.assertEqual(claim_jobs(10), [])
+        self.assertEqual(run_job(claimed[0]), 'done')
+        image.refresh_from_db()
+        self.assertEqual([width for width, _ in image.image_variants['variants']['webp']], [16, 32])
+        self.assertEqual(RenderJob.objects.get().status, 'done')
+
+    def test_failing_job_is_retried_then_given_up(self):
+        self.gallery_image()
+        with mock.patch('core.services.image_variants.generate_image_variants', side_effect=OSError('disk full')), \
+                self.assertLogs('core.services.render_jobs', 'WARNING'):
+            self.assertEqual(run_job(claim_jobs(10)[0]), 'retry')
+            job = RenderJob.objects.get()
+            self.assertEqual((job.status, job.attempts), ('pending', 1))
+            self.assertEqual(claim_jobs(10), [])
+
+            RenderJob.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(run_job(claim_jobs(10)[0]), 'failed')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.last_error), ('failed', 'disk full'))
+
+    def test_course_outline_is_rendered_by_the_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            course = Course.objects.create(title='Automotive Engine Repairer', description='-', duration='9 months')
+        course.refresh_from_db()
+        self.assertFalse(course.course_pdf)
+        job = RenderJob.objects.get(kind='course_pdf')
+
+        self.assertEqual(run_job(claim_jobs(10)[0]), 'done')
+        course.refresh_from_db()
+        self.assertTrue(course.course_pdf.name.startswith('course_pdfs/generated/'))
+        self.assertEqual(len(PdfReader(course.course_pdf.path).pages), 1)
+
+        # Saved again unchanged: nothing new to render
+        course.save()
+        self.assertEqual(RenderJob.objects.filter(kind='course_pdf').exclude(pk=job.pk).count(), 0)
+
+    @mock.patch.object(StudentAdmin, 'message_user')
+    def test_certificates_are_queued_from_the_admin(self, message_user):
+        completed, enrolled = (
+            Student.objects.create(name='Naledi', surname='Khumalo', email='naledi@example.com', phone='0821234567',
+                                   student_id=student_id, status=status)
+            for student_id, status in (('STU9001', 'completed'), ('STU9002', 'enrolled'))
+        )
+        student_admin = StudentAdmin(Student, admin.site)
+        student_admin.generate_certificates(None, Student.objects.all())
+        student_admin.generate_certificates(None, Student.objects.all())
+        self.assertEqual(message_user.call_args_list[0].args[1],
+                         '1 completion certificates queued; the render worker writes them to media storage. '
+                         '1 students skipped (not completed).')
+        job = RenderJob.objects.get()
+        self.assertEqual((job.kind, job.object_id), ('certificate', completed.pk))
+        self.assertFalse(default_storage.exists(student_document_name(completed, 'certificate')))
+
+        self.assertEqual(run_job(claim_jobs(10)[0]), 'done')
+        completed.refresh_from_db()
+        self.assertTrue(completed.certificate_id)
+        self.assertTrue(default_storage.exists(student_document_name(completed, 'certificate')))
+
+    def test_job_of_a_dead_worker_is_reclaimed(self):
+        self.gallery_image()
+        claim_jobs(10)
+        RenderJob.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(len(claim_jobs(10)), 1)
+
+
+# ========== BROADCASTS ==========
+class BroadcastPermissionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient(enforce_csrf_checks=True)
+        self.broadcast = Broadcast.objects.create(title='Open day', message='Visit us', audience='students')
+
+    def test_anonymous_cannot_create_broadcasts(self):
+        response = self.client.post('/api/broadcasts/', {
+            'title': 'Spam', 'message': 'Buy now', 'audience': 'pending_applicants',
+        }, format='json')
+        self.assertIn(response.status_code, (401, 403))
+        self.assertEqual(Broadcast.objects.count(), 1)
+
+    def test_anonymous_cannot_send_or_list_broadcasts(self):
+        self.assertIn(self.client.post(f'/api/broadcasts/{self.broadcast.pk}/send/').status_code, (401, 403))
+        self.assertIn(self.client.get('/api/broadcasts/').status_code, (401, 403))
+        self.broadcast.refresh_from_db()
+        self.assertEqual(self.broadcast.status, 'draft')
+
+    def test_non_staff_user_cannot_send(self):
+        User.objects.create_user('student', password='secret')
+        self.client.login(username='student', password='secret')
+        self.assertEqual(self.client.post(f'/api/broadcasts/{self.broadcast.pk}/send/').status_code, 403)
+
+    def test_staff_can_send(self):
+        staff = User.objects.create_user('staff', password='secret', is_staff=True)
+        client = APIClient()
+        client.force_authenticate(staff)
+        response = client.post(f'/api/broadcasts/{self.broadcast.pk}/send/')
+        self.assertEqual(response.status_code, 202)
+        self.broadcast.refresh_from_db()
+        self.assertEqual(self.broadcast.status, 'queued')
+
+
+# ========== STATIC LAYER ==========
+class StaticLayerTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.write('outline.pdf', b'%PDF-1.4 ' + b'course outline ' * 200)
+
+    def write(self, name, data):
+        path = os.path.join(self.root, name)
+        with open(path, 'wb') as handle:
+            handle.write(data)
+        return path
+
+    def index(self, **kwargs):
+        return StaticIndex([('/pdfs/', self.root)]).build(**kwargs)
+
+    def test_plain_urls_when_the_layer_is_off(self):
+        with override_settings(STATIC_LAYER_ENABLED=False):
+            self.assertEqual(static_url('/pdfs/outline.pdf'), '/pdfs/outline.pdf')
+
+    def test_workers_reuse_the_manifest_digests(self):
+        manifest = os.path.join(tempfile.mkdtemp(), 'manifest.json')
+        self.addCleanup(shutil.rmtree, os.path.dirname(manifest), ignore_errors=True)
+        with override_settings(STATIC_LAYER_MANIFEST=manifest):
+            built = self.index(compress=True)
+            write_manifest(built)
+            self.assertIn('gzip', built.lookup('/pdfs/outline.pdf')[0].variants)
+            with mock.patch('core.utils.static_files._sha256') as sha256, \
+                    mock.patch('core.utils.static_files.compress_file') as compress:
+                loaded = self.index(manifest=load_manifest())
+            sha256.assert_not_called()
+            compress.assert_not_called()
+        self.assertEqual(loaded.url('/pdfs/outline.pdf'), built.url('/pdfs/outline.pdf'))
+
+    def test_file_rewritten_in_place_is_reindexed(self):
+        index = self.index()
+        old_hashed = index.url('/pdfs/outline.pdf')
+        data = b'%PDF-1.4 new outline'
+        path = self.write('outline.pdf', data)
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10 ** 9))
+
+        entry, immutable = index.lookup('/pdfs/outline.pdf')
+        self.assertEqual((entry.size, entry.digest, immutable), (len(data), hashlib.sha256(data).hexdigest(), False))
+        self.assertIsNone(index.lookup(old_hashed))
+        self.assertNotEqual(index.url('/pdfs/outline.pdf'), old_hashed)
+        self.assertEqual(index.lookup(index.url('/pdfs/outline.pdf'))[0], entry)
+
+        os.remove(path)
+        self.assertIsNone(index.lookup('/pdfs/outline.pdf'))
+        self.assertEqual(index.url('/pdfs/outline.pdf'), '/pdfs/outline.pdf')
+
+
+# ========== PDF TEMPLATES ==========
+def pdf_text(pdf):
+    return ''.join(page.extract_text() for page in PdfReader(BytesIO(pdf)).pages)
+
+
+class PDFTemplateTests(SimpleTestCase):
+    def test_application_without_course_uses_course_title(self):
+        application = Application(
+            id=1, name='Thabo', surname='Mokoena', age=20, mobile='0821234567', email='t@example.com',
+            course=None, course_title='Diesel Mechanic', applied_date=timezone.now(),
+        )
+        self.assertIn('Diesel Mechanic', pdf_text(render_pdf('application_form', application)))
+
+    def test_values_with_markup_characters_render_as_typed(self):
+        course = Course(title='Brakes & <Clutch>', description='Pads & <discs>', duration='6 months')
+        application = Application(
+            id=1, name='A & B', surname='<Smith>', age=20, mobile='0821234567', email='t@example.com',
+            course=course, qualification='N3 & <N4>', applied_date=timezone.now(),
+        )
+        text = pdf_text(render_pdf('application_form', application))
+        for value in ('A & B <Smith>', 'Brakes & <Clutch>', 'N3 & <N4>'):
+            self.assertIn(value, text)
+        self.assertIn('Pads & <discs>', pdf_text(render_pdf('course_outline', course)))
+
+        student = Student(
+            id=1, student_id='S&1', name='Zo<e', surname='M&M', email='z@example.com', address='1 A&B St\n<Town>',
+            course=course, status='completed', enrollment_date=timezone.now().date(), certificate_id='C<1>',
+        )
+        letter = pdf_text(render_pdf('acceptance_letter', student))
+        for value in ('Zo<e M&M', '<Town>', 'Brakes & <Clutch>', 'S&1'):
+            self.assertIn(value, letter)
+        self.assertIn('C<1>', pdf_text(render_pdf('completion_certificate', student)))
+
+
+# ========== DOCUMENT METADATA ==========
+class DocumentMetadataTests(MediaTestCase):
+    def application(self, **fields):
+        return Application.objects.create(
+            name='Naledi', surname='Khumalo', age=22, email='naledi@example.com', mobile='0821234567', **fields
+        )
+
+    def test_fresh_upload_is_described_on_save(self):
+        data = sample_pdf()
+        application = self.application(id_document=SimpleUploadedFile('id.pdf', data, content_type='application/pdf'))
+        metadata = application.document_metadata['id_document']
+        self.assertEqual(metadata['name'], application.id_document.name)
+        self.assertEqual(metadata['sha256'], hashlib.sha256(data).hexdigest())
+
+    def test_save_never_reads_stored_files(self):
+        application = self.application()
+        data = sample_pdf(2)
+        application.id_document.name = default_storage.save('applications/id/legacy.pdf', ContentFile(data))
+        application.document_metadata = {'id_document': {'name': 'applications/id/older.pdf', 'sha256': 'stale'}}
+        with mock.patch('core.utils.uploads._sha256') as sha256:
+            application.save()
+        sha256.assert_not_called()
+        self.assertEqual(application.document_metadata, {})
+
+        out = StringIO()
+        call_command('backfill_document_metadata', stdout=out)
+        application.refresh_from_db()
+        metadata = application.document_metadata['id_document']
+        self.assertEqual((metadata['name'], metadata['size']), (application.id_document.name, len(data)))
+        self.assertEqual(metadata['sha256'], hashlib.sha256(data).hexdigest())
+        self.assertIn('1 documents described', out.getvalue())
+
+
+# ========== PHONE NUMBERS ==========
+class PhoneNumberTests(SimpleTestCase):
+    def test_local_numbers_follow_the_country_rules(self):
+        cases = [
+            ('082 123 4567', 'South Africa', '+27821234567'),
+            ('(082) 123-4567', 'South Africa', '+27821234567'),
+            ('58123456', 'Lesotho', '+26658123456'),
+            ('3912345', 'Botswana', '+2673912345'),
+            ('71234567', 'Botswana', '+26771234567'),
+            ('76123456', 'Eswatini', '+26876123456'),
+            ('0811234567', 'Namibia', '+264811234567'),
+            ('0771234567', 'Zimbabwe', '+263771234567'),
+            # Trunk 0 left off
+            ('771234567', 'Zimbabwe', '+263771234567'),
+            ('841234567', 'Mozambique', '+258841234567'),
+            ('0971234567', 'Zambia', '+260971234567'),
+        ]
+        for raw, country, expected in cases:
+            with self.subTest(raw=raw, country=country):
+                self.assertEqual(normalize_phone(raw, country), expected)
+
+    def test_international_forms(self):
+        self.assertEqual(normalize_phone('+27 82 123 4567', 'Lesotho'), '+27821234567')
+        self.assertEqual(normalize_phone('0027821234567'), '+27821234567')
+        self.assertEqual(normalize_phone('+44 20 7946 0958', 'Lesotho'), '+442079460958')
+        # A neighbouring country's code typed without the +
+        self.assertEqual(normalize_phone('26658123456', 'South Africa'), '+26658123456')
+        self.assertEqual(normalize_phone('27821234567', 'Zambia'), '+27821234567')
+
+    def test_countries_without_a_rule_read_south_african_numbers(self):
+        self.assertEqual(normalize_phone('0821234567', 'Other African Country'), '+27821234567')
+        self.assertEqual(normalize_phone('+260971234567', 'International'), '+260971234567')
+
+    def test_unusable_numbers_normalise_to_blank(self):
+        for raw in ['', None, '   ', 'n/a', '12345', '082123456', '+123', '+1234567890123456']:
+            with self.subTest(raw=raw):
+                self.assertEqual(normalize_phone(raw), '')
+
+    def test_bulk_mode_matches_single_numbers(self):
+        numbers = ['0821234567', '58123456', '0821234567', None]
+        countries = ['South Africa', 'Lesotho', 'South Africa', None]
+        self.assertEqual(normalize_phones(numbers, countries), ['+27821234567', '+26658123456', '+27821234567', ''])
+        self.assertEqual(normalize_phones(['0821234567']), ['+27821234567'])
+
+
+class StudentPhoneTests(TestCase):
+    def setUp(self):
+        self.application = Application.objects.create(
+            name='Kagiso', surname='Naidoo', age=24, email='kagiso@example.com', mobile='58123456', country='Lesotho',
+        )
+        Student.objects.create(application=self.application, name='Kagiso', surname='Naidoo',
+                               email='kagiso@example.com', phone='58123456')
+
+    def application_queries(self, student):
+        with CaptureQueriesContext(connection) as queries:
+            student.save()
+        return [query['sql'] for query in queries if 'core_application' in query['sql']]
+
+    def test_phone_is_read_with_the_application_country(self):
+        student = Student.objects.get()
+        self.assertEqual((student.student_id, student.phone_e164), (f'STU{self.application.pk:04d}', '+26658123456'))
+
+    def test_save_reads_only_the_country(self):
+        queries = self.application_queries(Student.objects.get())
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"name"', queries[0])
+
+    def test_save_uses_a_selected_application(self):
+        self.assertEqual(self.application_queries(Student.objects.select_related('application').get()), [])
+
+
+# ========== DOSSIER ==========
+class DossierTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.application = Application.objects.create(
+            name='Thabo', surname='Mokoena', age=20, mobile='0821234567', email='t@example.com',
+            course_title='Diesel Mechanic',
+            id_document=SimpleUploadedFile('id.pdf', sample_pdf(pages=2), content_type='application/pdf'),
+            matric_certificate=SimpleUploadedFile('matric.jpg', sample_jpeg(), content_type='image/jpeg'),
+        )
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'secret')
+        self.client.force_login(self.admin)
+
+    def test_dossier_merges_summary_and_documents(self):
+        pdf = b''.join(dossier_stream(self.application))
+        reader = PdfReader(BytesIO(pdf))
+        # Summary, two pages of the ID document, one page for the scan
+        self.assertEqual(len(reader.pages), 4)
+        self.assertIn('Diesel Mechanic', reader.pages[0].extract_text())
+
+    def test_admin_download_streams_the_dossier(self):
+        response = self.client.get(f'/admin/core/application/{self.application.pk}/dossier/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(PdfReader(BytesIO(b''.join(response.streaming_content))).pages), 4)
+
+    def test_summary_failure_is_reported_before_streaming(self):
+        with mock.patch('core.services.dossier.ApplicationPDFGenerator.generate_application_pdf', side_effect=ValueError('boom')):
+            with self.assertRaises(ValueError):
+                dossier_stream(self.application)
+            with self.assertLogs('core.admin', level='ERROR'):
+                response = self.client.get(f'/admin/core/application/{self.application.pk}/dossier/')
+        self.assertRedirects(response, f'/admin/core/application/{self.application.pk}/change/', fetch_redirect_response=False)
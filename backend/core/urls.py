@@ -4,8 +4,9 @@ from .views import (
     CourseViewSet, ApplicationViewSet, StudentViewSet,
     NewsletterViewSet, GalleryImageViewSet, NewsPostViewSet,
     TeamMemberViewSet, TestimonialViewSet,
-    VideoViewSet, DirectorMessageViewSet,
-    get_course_pdf, dashboard_stats, serve_document, debug_courses
+    VideoViewSet, DirectorMessageViewSet, BroadcastViewSet,
+    get_course_pdf, dashboard_stats, serve_document, debug_courses,
+    twilio_status_callback
 )
 
 router = DefaultRouter()
@@ -19,6 +20,7 @@ router.register(r'team', TeamMemberViewSet)
 router.register(r'testimonials', TestimonialViewSet)
 router.register(r'videos', VideoViewSet)
 router.register(r'director-message', DirectorMessageViewSet)
+router.register(r'broadcasts', BroadcastViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -32,6 +34,9 @@ urlpatterns = [
     # Simple PDF URL getter
     path('course/<int:course_id>/pdf/', get_course_pdf, name='get_course_pdf'),
     
+    # Twilio delivery status callbacks
+    path('webhooks/twilio/status/', twilio_status_callback, name='twilio-status-callback'),
+    
     # Dashboard stats
     path('dashboard/stats/', dashboard_stats, name='dashboard_stats'),
 ]
\ No newline at end of file
@@ -0,0 +1,73 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def _etag(*parts):
+    return quote_etag(hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified validators for viewsets whose model has ``updated_at``.
+
+    The validator comes from one aggregate query (row count plus the newest
+    ``updated_at`` of the filtered queryset, or the row's own ``updated_at`` for
+    a detail view), so a matching If-None-Match / If-Modified-Since is answered
+    with 304 before anything is loaded or serialised. Writes that bypass
+    ``save()`` must set ``updated_at`` themselves to change the validator.
+    ``related_validator_fields`` adds the timestamps of related rows the
+    serializer renders too, such as ``course__updated_at`` for a course title.
+    """
+    validator_field = 'updated_at'
+    related_validator_fields = ()
+
+    def list_validators(self, request):
+        aggregates = {'count': Count('pk'), 'latest': Max(self.validator_field)}
+        for i, field in enumerate(self.related_validator_fields):
+            # The count changes when a related row is detached (SET_NULL), the max when one is edited
+            aggregates[f'related_count_{i}'] = Count(field)
+            aggregates[f'related_latest_{i}'] = Max(field)
+        state = self.filter_queryset(self.get_queryset()).aggregate(**aggregates)
+        parts = [value.isoformat() if hasattr(value, 'isoformat') else value for _, value in sorted(state.items())]
+        return _etag(request.build_absolute_uri(), *parts), None
+
+    def retrieve_validators(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = self.get_queryset().filter(
+            **{self.lookup_field: kwargs[lookup_url_kwarg]}
+        ).values_list(self.validator_field, *self.related_validator_fields).first()
+        if row is None or row[0] is None:
+            return None, None
+        updated = max(value for value in row if value is not None)
+        parts = [value and value.isoformat() for value in row]
+        return _etag(request.build_absolute_uri(), *parts), int(updated.timestamp())
+
+    def conditional_response(self, request, validators, render):
+        etag, last_modified = validators
+        if etag is None:
+            return render()
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
+        response = render()
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, self.list_validators(request),
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, self.retrieve_validators(request, *args, **kwargs),
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
@@ -0,0 +1,192 @@
+"""
+A local stand-in for the Twilio Messages API, for benchmarks and offline runs.
+Point the client at it with TWILIO_API_BASE_URL (or twilio_client(base_url=...)).
+
+It accepts and fetches messages, answers with configurable latency and error
+rates (5xx, 429 throttling, 400 invalid number), and posts signed
+status callbacks (sent, then delivered or undelivered) to a message's
+StatusCallback URL, like Twilio does.
+"""
+import itertools
+import json
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import requests
+from twilio.request_validator import RequestValidator
+
+logger = logging.getLogger(__name__)
+
+MESSAGES_PATH = re.compile(r'^/2010-04-01/Accounts/(?P<account>[^/]+)/Messages\.json$')
+MESSAGE_PATH = re.compile(r'^/2010-04-01/Accounts/(?P<account>[^/]+)/Messages/(?P<sid>SM[0-9a-f]+)\.json$')
+
+# Failure modes: (HTTP status, Twilio error code, message)
+SERVER_ERROR = (503, 20503, 'Service unavailable')
+THROTTLED = (429, 20429, 'Too Many Requests')
+INVALID_NUMBER = (400, 21211, "The 'To' number is not a valid phone number.")
+
+
+class FakeTwilioHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so clients can keep connections alive, like the real API
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; with Nagle on, a kept-alive
+    # connection stalls ~40ms on the client's delayed ACK, which Twilio doesn't
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.record('connections')
+
+    def do_POST(self):
+        match = MESSAGES_PATH.match(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        form = {key: values[-1] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+        if not match:
+            return self.error(404, 20404, 'The requested resource was not found')
+
+        self.server.wait()
+        failure = self.server.pick_failure()
+        if failure:
+            self.server.record(f'http_{failure[0]}')
+            return self.error(*failure)
+
+        message = self.server.create_message(match['account'], form)
+        self.reply(201, message)
+
+    def do_GET(self):
+        match = MESSAGE_PATH.match(self.path)
+        message = self.server.messages.get(match['sid']) if match else None
+        if message is None:
+            return self.error(404, 20404, 'The requested resource was not found')
+        self.server.wait()
+        self.reply(200, message)
+
+    def error(self, status, code, message):
+        self.reply(status, {
+            'code': code, 'message': message, 'status': status,
+            'more_info': f'https://www.twilio.com/docs/errors/{code}',
+        })
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeTwilioServer(ThreadingHTTPServer):
+    """
+    Threaded fake Twilio on 127.0.0.1; use as a context manager to run it in
+    the background. Rates are fractions of requests (0.05 = 5%); latency and
+    jitter are seconds. Callbacks are signed with ``auth_token``.
+    """
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0, invalid_rate=0.0,
+                 undelivered_rate=0.0, callback_delay=0.05, auth_token='', seed=None):
+        super().__init__(('127.0.0.1', port), FakeTwilioHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.invalid_rate = invalid_rate
+        self.undelivered_rate = undelivered_rate
+        self.callback_delay = callback_delay
+        self.validator = RequestValidator(auth_token) if auth_token else None
+        self.messages = {}
+        self.sids = itertools.count(1)
+        self.counts = {'connections': 0, 'messages': 0, 'callbacks': 0, 'callback_errors': 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._callbacks = ThreadPoolExecutor(max_workers=4, thread_name_prefix='fake-twilio-callback')
+        self._callback_session = requests.Session()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def record(self, name):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts = {'connections': 0, 'messages': 0, 'callbacks': 0, 'callback_errors': 0}
+
+    def _uniform(self):
+        with self._lock:
+            return self._random.random()
+
+    def wait(self):
+        delay = self.latency + (self.jitter * self._uniform() if self.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+    def pick_failure(self):
+        roll = self._uniform()
+        for rate, failure in ((self.error_rate, SERVER_ERROR), (self.throttle_rate, THROTTLED), (self.invalid_rate, INVALID_NUMBER)):
+            if roll < rate:
+                return failure
+            roll -= rate
+        return None
+
+    def create_message(self, account, form):
+        sid = f'SM{next(self.sids):032x}'
+        message = {
+            'sid': sid, 'account_sid': account, 'status': 'queued',
+            'to': form.get('To'), 'from': form.get('From'), 'body': form.get('Body', ''),
+            'num_segments': '1', 'direction': 'outbound-api', 'error_code': None, 'error_message': None,
+            'uri': f'/2010-04-01/Accounts/{account}/Messages/{sid}.json',
+        }
+        self.messages[sid] = message
+        self.record('messages')
+        if form.get('StatusCallback'):
+            self._callbacks.submit(self._report_status, message, form['StatusCallback'])
+        return message
+
+    def _report_status(self, message, url):
+        """Move the message through sent -> delivered/undelivered, posting a callback for each step"""
+        final = 'undelivered' if self._uniform() < self.undelivered_rate else 'delivered'
+        for status in ('sent', final):
+            time.sleep(self.callback_delay)
+            message['status'] = status
+            if status == 'undelivered':
+                message['error_code'] = 63016
+            params = {
+                'MessageSid': message['sid'], 'SmsSid': message['sid'], 'AccountSid': message['account_sid'],
+                'MessageStatus': status, 'SmsStatus': status, 'To': message['to'], 'From': message['from'],
+                'ApiVersion': '2010-04-01',
+            }
+            if message['error_code']:
+                params['ErrorCode'] = str(message['error_code'])
+            headers = {'X-Twilio-Signature': self.validator.compute_signature(url, params)} if self.validator else {}
+            try:
+                response = self._callback_session.post(url, data=params, headers=headers, timeout=10)
+                self.record('callbacks' if response.status_code < 400 else 'callback_errors')
+            except requests.RequestException as e:
+                self.record('callback_errors')
+                logger.warning(f"Fake Twilio could not post a status callback to {url}: {e}")
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-twilio', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self._callbacks.shutdown(wait=True)
+        self._callback_session.close()
+        self.server_close()
+        self._thread.join()
@@ -0,0 +1,197 @@
+import mimetypes
+import os
+import secrets
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+STREAM_CHUNK_SIZE = 64 * 2 ** 10
+# More ranges than this in one request are ignored and the whole file is sent
+MAX_RANGES = 16
+OFFLOAD_ACCEL_REDIRECT = 'x-accel-redirect'
+OFFLOAD_SENDFILE = 'x-sendfile'
+
+
+def parse_range_header(header, size):
+    """
+    Parse ``Range: bytes=...`` into sorted, merged inclusive (start, end) pairs.
+
+    Returns None when the header is absent, malformed or should be ignored
+    (serve the whole file), and [] when no range is satisfiable (416).
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    specs = header[len('bytes='):].split(',')
+    if len(specs) > MAX_RANGES:
+        return None
+    ranges = []
+    for spec in specs:
+        start, sep, end = spec.strip().partition('-')
+        if not sep:
+            return None
+        try:
+            if not start:
+                # Suffix range: the last N bytes
+                length = int(end)
+                if length > 0 and size > 0:
+                    ranges.append((max(size - length, 0), size - 1))
+                continue
+            first = int(start)
+            last = int(end) if end else size - 1
+        except ValueError:
+            return None
+        if first >= size:
+            # Unsatisfiable; only a 416 if every range is
+            continue
+        if last < first:
+            return None
+        ranges.append((first, min(last, size - 1)))
+
+    merged = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def read_range(path, first, last):
+    """Yield bytes ``first``..``last`` (inclusive) of the file at ``path``"""
+    with open(path, 'rb') as handle:
+        handle.seek(first)
+        remaining = last - first + 1
+        while remaining > 0:
+            chunk = handle.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _multipart_body(path, ranges, size, content_type, boundary):
+    for first, last in ranges:
+        yield (
+            f'--{boundary}\r\nContent-Type: {content_type}\r\n'
+            f'Content-Range: bytes {first}-{last}/{size}\r\n\r\n'
+        ).encode('latin-1')
+        yield from read_range(path, first, last)
+        yield b'\r\n'
+    yield f'--{boundary}--\r\n'.encode('latin-1')
+
+
+def _multipart_length(ranges, size, content_type, boundary):
+    length = len(f'--{boundary}--\r\n')
+    for first, last in ranges:
+        length += len(
+            f'--{boundary}\r\nContent-Type: {content_type}\r\n'
+            f'Content-Range: bytes {first}-{last}/{size}\r\n\r\n'
+        )
+        length += last - first + 1 + 2
+    return length
+
+
+def _if_range_matches(request, etag, last_modified):
+    """A Range request with a stale If-Range validator gets the whole file instead"""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == last_modified
+
+
+def serve_file(request, root, relative_path, attachment=False):
+    """
+    Serve ``relative_path`` under ``root`` with validators, byte ranges and optional proxy offload.
+
+    Sends ETag / Last-Modified / Cache-Control and answers conditional requests
+    with 304. Range requests get 206 (multipart/byteranges for several ranges)
+    or 416. With MEDIA_OFFLOAD set, the bytes are left to the front proxy via
+    X-Accel-Redirect or X-Sendfile, so the worker is free as soon as the
+    headers are built.
+    """
+    try:
+        full_path = safe_join(root, relative_path)
+    except SuspiciousFileOperation:
+        raise Http404("File does not exist")
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404("File does not exist")
+    if not os.path.isfile(full_path):
+        raise Http404("File does not exist")
+
+    size = stat.st_size
+    last_modified = int(stat.st_mtime)
+    etag = f'"{size:x}-{stat.st_mtime_ns:x}"'
+    content_type, encoding = mimetypes.guess_type(full_path)
+    if content_type is None or encoding:
+        # Compressed files are served as-is, not decoded by the browser
+        content_type = 'application/octet-stream'
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        not_modified['ETag'] = etag
+        return not_modified
+
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Cache-Control': f"private, max-age={getattr(settings, 'MEDIA_CACHE_MAX_AGE', 3600)}",
+        'Content-Disposition': content_disposition_header(attachment, os.path.basename(full_path)),
+        'Accept-Ranges': 'bytes',
+    }
+
+    offload = getattr(settings, 'MEDIA_OFFLOAD', '').lower()
+    if offload in (OFFLOAD_ACCEL_REDIRECT, OFFLOAD_SENDFILE):
+        # The proxy handles Range itself; it only needs to know which file
+        response = HttpResponse(content_type=content_type, headers=headers)
+        if offload == OFFLOAD_ACCEL_REDIRECT:
+            prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(os.path.relpath(full_path, root))
+        else:
+            response['X-Sendfile'] = full_path
+        return response
+
+    ranges = None
+    if request.method == 'GET' and _if_range_matches(request, etag, last_modified):
+        ranges = parse_range_header(request.META.get('HTTP_RANGE'), size)
+
+    if ranges == []:
+        response = HttpResponse(status=416, headers=headers)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if ranges is None:
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type, headers=headers)
+        else:
+            # FileResponse hands the handle to wsgi.file_wrapper (sendfile under gunicorn)
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type, headers=headers)
+        response['Content-Length'] = size
+        return response
+
+    if len(ranges) == 1:
+        first, last = ranges[0]
+        response = StreamingHttpResponse(
+            read_range(full_path, first, last), status=206, content_type=content_type, headers=headers,
+        )
+        response['Content-Range'] = f'bytes {first}-{last}/{size}'
+        response['Content-Length'] = last - first + 1
+        return response
+
+    boundary = secrets.token_hex(16)
+    response = StreamingHttpResponse(
+        _multipart_body(full_path, ranges, size, content_type, boundary),
+        status=206,
+        content_type=f'multipart/byteranges; boundary={boundary}',
+        headers=headers,
+    )
+    response['Content-Length'] = _multipart_length(ranges, size, content_type, boundary)
+    return response
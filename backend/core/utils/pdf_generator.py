@@ -1,213 +1,365 @@
-import os
-from django.conf import settings
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from io import BytesIO
 from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+from operator import attrgetter
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+BRAND_BLUE = colors.HexColor('#1e40af')
+
+
+# ========== STYLES ==========
+@lru_cache(maxsize=None)
+def get_stylesheet():
+    """ReportLab's sample styles plus ours, built once per process and shared by every render"""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        'CustomTitle', parent=styles['Heading1'], fontSize=24, spaceAfter=30, textColor=BRAND_BLUE,
+    ))
+    styles.add(ParagraphStyle(
+        'CustomHeading', parent=styles['Heading2'], fontSize=16, spaceAfter=12, spaceBefore=20, textColor=BRAND_BLUE,
+    ))
+    styles.add(ParagraphStyle(
+        'ApplicationTitle', parent=styles['Heading1'], fontSize=20, spaceAfter=30, textColor=BRAND_BLUE, alignment=1,
+    ))
+    styles.add(ParagraphStyle('Footer', parent=styles['Normal'], fontSize=9, textColor=colors.gray))
+    styles.add(ParagraphStyle('CenteredFooter', parent=styles['Footer'], alignment=1))
+    styles.add(ParagraphStyle('Letterhead', parent=styles['Heading1'], fontSize=18, textColor=BRAND_BLUE, spaceAfter=4))
+    styles.add(ParagraphStyle('LetterBody', parent=styles['Normal'], fontSize=11, leading=16, spaceAfter=10))
+    styles.add(ParagraphStyle(
+        'CertificateTitle', parent=styles['Title'], fontSize=34, leading=40, textColor=BRAND_BLUE, spaceAfter=24,
+    ))
+    styles.add(ParagraphStyle('CertificateText', parent=styles['Normal'], fontSize=14, leading=20, alignment=1))
+    styles.add(ParagraphStyle(
+        'CertificateName', parent=styles['Title'], fontSize=28, leading=34, fontName='Times-BoldItalic', spaceAfter=12,
+    ))
+    return styles
+
+
+HEADER_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), BRAND_BLUE),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8fafc')),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+
+class Markup(str):
+    """Paragraph markup that is already safe; see ``markup``"""
+
+
+def markup(template, *values):
+    """``template`` with ``values`` escaped into it, e.g. markup('<b>{}</b>', student.name)"""
+    return Markup(template.format(*(escape(str(value)) for value in values)))
+
+
+def _resolve(value, obj):
+    return value(obj) if callable(value) else value
+
+
+def _paragraph_text(value, obj):
+    """
+    Text for a Paragraph. Strings written into a template are markup; values
+    read from the object are escaped, so names with & or < render as typed,
+    unless the template built them with ``markup``.
+    """
+    if not callable(value):
+        return value
+    value = value(obj)
+    if isinstance(value, Markup):
+        return value
+    return escape('' if value is None else str(value))
+
+
+# ========== SECTIONS ==========
+class Section:
+    """One block of a template; ``when`` skips it for objects it doesn't apply to"""
+
+    def __init__(self, when=None, space_after=20):
+        self.when = when
+        self.space_after = space_after
+
+    def build(self, obj, styles):
+        if self.when is not None and not self.when(obj):
+            return []
+        flowables = self.flowables(obj, styles)
+        if flowables and self.space_after:
+            flowables.append(Spacer(1, self.space_after))
+        return flowables
+
+    def flowables(self, obj, styles):
+        raise NotImplementedError
+
+
+class Title(Section):
+    def __init__(self, text, style='CustomTitle', **kwargs):
+        super().__init__(**kwargs)
+        self.text = text
+        self.style = style
+
+    def flowables(self, obj, styles):
+        return [Paragraph(_paragraph_text(self.text, obj), styles[self.style])]
+
+
+class Text(Section):
+    """Paragraphs in one style; callables that return markup build it with ``markup``"""
+
+    def __init__(self, *texts, style='Normal', **kwargs):
+        kwargs.setdefault('space_after', 0)
+        super().__init__(**kwargs)
+        self.texts = texts
+        self.style = style
+
+    def flowables(self, obj, styles):
+        return [Paragraph(_paragraph_text(text, obj), styles[self.style]) for text in self.texts]
+
+
+class Fields(Section):
+    """``<b>Label</b> value`` lines under an optional heading"""
+
+    def __init__(self, fields, heading=None, heading_style='Heading2', line_spacing=5, skip_empty=False, **kwargs):
+        super().__init__(**kwargs)
+        self.fields = fields
+        self.heading = heading
+        self.heading_style = heading_style
+        self.line_spacing = line_spacing
+        self.skip_empty = skip_empty
+
+    def flowables(self, obj, styles):
+        flowables = [Paragraph(self.heading, styles[self.heading_style])] if self.heading else []
+        for label, value in self.fields:
+            value = _paragraph_text(value, obj)
+            if self.skip_empty and not value:
+                continue
+            flowables.append(Paragraph(f"<b>{label}</b> {value}", styles['Normal']))
+            if self.line_spacing:
+                flowables.append(Spacer(1, self.line_spacing))
+        return flowables
+
+
+class TextBlock(Section):
+    """A heading and a paragraph of text; left out when the text is empty unless ``required``"""
+
+    def __init__(self, heading, text, heading_style='CustomHeading', required=False, **kwargs):
+        super().__init__(**kwargs)
+        self.heading = heading
+        self.text = text
+        self.heading_style = heading_style
+        self.required = required
+
+    def flowables(self, obj, styles):
+        text = _paragraph_text(self.text, obj)
+        if not text and not self.required:
+            return []
+        return [Paragraph(self.heading, styles[self.heading_style]), Paragraph(text, styles['Normal'])]
+
+
+class KeyValueTable(Section):
+    def __init__(self, heading, header, rows, col_widths, heading_style='CustomHeading', table_style=HEADER_TABLE_STYLE, **kwargs):
+        super().__init__(**kwargs)
+        self.heading = heading
+        self.header = header
+        self.rows = rows
+        self.col_widths = col_widths
+        self.heading_style = heading_style
+        self.table_style = table_style
+
+    def flowables(self, obj, styles):
+        data = [list(self.header)] + [[label, _resolve(value, obj)] for label, value in self.rows]
+        table = Table(data, colWidths=self.col_widths)
+        table.setStyle(self.table_style)
+        return [Paragraph(self.heading, styles[self.heading_style]), table]
+
+
+class Footer(Section):
+    def __init__(self, text, style='Footer', space_before=0, **kwargs):
+        kwargs.setdefault('space_after', 0)
+        super().__init__(**kwargs)
+        self.text = text
+        self.style = style
+        self.space_before = space_before
+
+    def flowables(self, obj, styles):
+        flowables = [Spacer(1, self.space_before)] if self.space_before else []
+        flowables.append(Paragraph(_paragraph_text(self.text, obj), styles[self.style]))
+        return flowables
+
+
+# ========== TEMPLATES ==========
+class PDFTemplate:
+    """A page setup plus a list of sections; rendering only walks the sections"""
+
+    def __init__(self, name, sections, pagesize=letter, margins=(72, 72, 72, 72)):
+        self.name = name
+        self.sections = sections
+        self.pagesize = pagesize
+        self.margins = margins
+
+    def story(self, obj):
+        styles = get_stylesheet()
+        story = []
+        for section in self.sections:
+            story.extend(section.build(obj, styles))
+        return story
+
+    def render_to(self, stream, obj):
+        top, right, bottom, left = self.margins
+        doc = SimpleDocTemplate(
+            stream, pagesize=self.pagesize,
+            topMargin=top, rightMargin=right, bottomMargin=bottom, leftMargin=left,
+        )
+        doc.build(self.story(obj))
+
+    def render(self, obj):
+        buffer = BytesIO()
+        self.render_to(buffer, obj)
+        return buffer.getvalue()
+
+
+TEMPLATES = {}
+
+
+def register_template(template):
+    TEMPLATES[template.name] = template
+    return template
+
+
+def get_template(name):
+    return TEMPLATES[name]
+
+
+def render_pdf(name, obj):
+    return TEMPLATES[name].render(obj)
+
+
+def _money(field):
+    return lambda obj: f"R{getattr(obj, field)}"
+
+
+COURSE_OUTLINE = register_template(PDFTemplate('course_outline', [
+    Title(attrgetter('title'), space_after=10),
+    Fields([
+        ('Duration:', attrgetter('duration')),
+        ('Level:', lambda course: course.get_level_display()),
+        ('Credits:', attrgetter('credits')),
+        ('Short Description:', attrgetter('short_description')),
+    ]),
+    TextBlock('Course Description', attrgetter('description'), required=True),
+    KeyValueTable('Fee Structure', ['Item', 'Amount (ZAR)'], [
+        ('Deposit Amount', _money('deposit_amount')),
+        ('Monthly Payment', _money('monthly_payment')),
+        ('Total Payment', _money('total_payment')),
+        ('Assessment Fee', _money('assessment_fee')),
+        ('Registration Fee', _money('registration_fee')),
+    ], col_widths=[3 * inch, 2 * inch]),
+    TextBlock('Course Curriculum', attrgetter('curriculum')),
+    TextBlock('Prerequisites', attrgetter('prerequisites')),
+    TextBlock('Admission Requirements', attrgetter('requirements')),
+    TextBlock('Career Opportunities', attrgetter('career_opportunities')),
+    Footer(
+        lambda course: f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M')} | Bathudi Training Center",
+        style='CenteredFooter', space_before=40,
+    ),
+]))
+
+APPLICATION_FORM = register_template(PDFTemplate('application_form', [
+    Title('Application Form', style='ApplicationTitle'),
+    Fields([
+        ('Name:', lambda application: f"{application.name} {application.surname}"),
+        ('Age:', attrgetter('age')),
+        ('Country:', attrgetter('country')),
+        ('Mobile:', attrgetter('mobile')),
+        ('Email:', attrgetter('email')),
+    ], heading='Personal Information'),
+    Fields([('Course:', lambda application: application.course.title if application.course else application.course_title)],
+           heading='Course Application', line_spacing=0, space_after=10),
+    Fields([
+        ('Education Level:', attrgetter('education_level')),
+        ('Previous School:', attrgetter('previous_school')),
+    ], heading='Educational Background', line_spacing=0, skip_empty=True,
+        when=lambda application: application.education_level or application.previous_school),
+    TextBlock('Qualifications', attrgetter('qualification'), heading_style='Heading2'),
+    TextBlock('Experience', attrgetter('experience'), heading_style='Heading2'),
+    TextBlock('Application Message', attrgetter('message'), heading_style='Heading2'),
+    Footer(lambda application: (
+        f"Application ID: {application.id} | Applied: {application.applied_date.strftime('%Y-%m-%d %H:%M')} "
+        f"| Status: {application.get_status_display()}"
+    )),
+]))
+
+
+def _student_course(student):
+    return student.course.title if student.course else 'your chosen programme'
+
+
+def _long_date(value):
+    return f"{value.day} {value.strftime('%B %Y')}"
+
+
+ACCEPTANCE_LETTER = register_template(PDFTemplate('acceptance_letter', [
+    Text('Bathudi Training Center', style='Letterhead'),
+    Text(lambda student: _long_date(datetime.now()), style='Footer', space_after=30),
+    Text(
+        lambda student: f"{student.name} {student.surname}",
+        lambda student: Markup(escape(student.address).replace('\n', '<br/>')) if student.address else student.email,
+        style='LetterBody', space_after=10,
+    ),
+    Title(lambda student: f"Letter of Acceptance: {_student_course(student)}", style='Heading2', space_after=10),
+    Text(
+        lambda student: f"Dear {student.name},",
+        lambda student: markup(
+            'We are pleased to confirm your acceptance into <b>{}</b>{}, with enrolment effective {}.',
+            _student_course(student), f" ({student.course.duration})" if student.course else '',
+            _long_date(student.enrollment_date),
+        ),
+        lambda student: markup(
+            'Your student number is <b>{}</b>. Please quote it on all correspondence and fee payments, '
+            'and bring this letter and your certified ID copy on your first day.',
+            student.student_id or student.pk,
+        ),
+        'We look forward to welcoming you to Bathudi Training Center.',
+        'Yours sincerely,',
+        style='LetterBody', space_after=30,
+    ),
+    Text('<b>The Registrar</b><br/>Bathudi Training Center', style='LetterBody'),
+]))
+
+COMPLETION_CERTIFICATE = register_template(PDFTemplate('completion_certificate', [
+    Text('Bathudi Training Center', style='CertificateText', space_after=30),
+    Title('Certificate of Completion', style='CertificateTitle', space_after=10),
+    Text('This is to certify that', style='CertificateText', space_after=16),
+    Title(lambda student: f"{student.name} {student.surname}", style='CertificateName', space_after=4),
+    Text(
+        'has successfully completed',
+        lambda student: markup('<b>{}</b>', _student_course(student)),
+        lambda student: f"on {_long_date(student.completion_date or datetime.now())}",
+        style='CertificateText', space_after=40,
+    ),
+    Footer(
+        lambda student: f"Certificate No. {student.certificate_id} | Student No. {student.student_id or student.pk}",
+        style='CenteredFooter',
+    ),
+], pagesize=landscape(letter), margins=(54, 54, 54, 54)))
+
 
 class CoursePDFGenerator:
     @staticmethod
     def generate_course_pdf(course):
         """Generate a PDF for a course"""
-        buffer = BytesIO()
-        
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        story = []
-        styles = getSampleStyleSheet()
-        
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            textColor=colors.HexColor('#1e40af')
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            spaceAfter=12,
-            spaceBefore=20,
-            textColor=colors.HexColor('#1e40af')
-        )
-        
-        story.append(Paragraph(f"{course.title}", title_style))
-        story.append(Spacer(1, 10))
-        
-        details = [
-            f"<b>Duration:</b> {course.duration}",
-            f"<b>Level:</b> {course.get_level_display()}",
-            f"<b>Credits:</b> {course.credits}",
-            f"<b>Short Description:</b> {course.short_description}"
-        ]
-        
-        for detail in details:
-            story.append(Paragraph(detail, styles['Normal']))
-            story.append(Spacer(1, 5))
-        
-        story.append(Spacer(1, 20))
-        
-        story.append(Paragraph("Course Description", heading_style))
-        story.append(Paragraph(course.description, styles['Normal']))
-        story.append(Spacer(1, 20))
-        
-        story.append(Paragraph("Fee Structure", heading_style))
-        
-        fee_data = [
-            ['Item', 'Amount (ZAR)'],
-            ['Deposit Amount', f"R{course.deposit_amount}"],
-            ['Monthly Payment', f"R{course.monthly_payment}"],
-            ['Total Payment', f"R{course.total_payment}"],
-            ['Assessment Fee', f"R{course.assessment_fee}"],
-            ['Registration Fee', f"R{course.registration_fee}"]
-        ]
-        
-        fee_table = Table(fee_data, colWidths=[3*inch, 2*inch])
-        fee_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8fafc')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e2e8f0')),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
-        
-        story.append(fee_table)
-        story.append(Spacer(1, 20))
-        
-        if course.curriculum:
-            story.append(Paragraph("Course Curriculum", heading_style))
-            story.append(Paragraph(course.curriculum, styles['Normal']))
-            story.append(Spacer(1, 20))
-        
-        if course.prerequisites:
-            story.append(Paragraph("Prerequisites", heading_style))
-            story.append(Paragraph(course.prerequisites, styles['Normal']))
-            story.append(Spacer(1, 20))
-        
-        if course.requirements:
-            story.append(Paragraph("Admission Requirements", heading_style))
-            story.append(Paragraph(course.requirements, styles['Normal']))
-            story.append(Spacer(1, 20))
-        
-        if course.career_opportunities:
-            story.append(Paragraph("Career Opportunities", heading_style))
-            story.append(Paragraph(course.career_opportunities, styles['Normal']))
-            story.append(Spacer(1, 20))
-        
-        footer_text = f"Generated on {datetime.now().strftime('%Y-%m-%d %H:%M')} | Bathudi Training Center"
-        story.append(Spacer(1, 40))
-        story.append(Paragraph(footer_text, ParagraphStyle(
-            'Footer',
-            parent=styles['Normal'],
-            fontSize=9,
-            textColor=colors.gray,
-            alignment=1
-        )))
-        
-        doc.build(story)
-        pdf_content = buffer.getvalue()
-        buffer.close()
-        
-        return pdf_content
+        return COURSE_OUTLINE.render(course)
 
 class ApplicationPDFGenerator:
     @staticmethod
     def generate_application_pdf(application):
         """Generate PDF for an application"""
-        buffer = BytesIO()
-        
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        story = []
-        styles = getSampleStyleSheet()
-        
-        title_style = ParagraphStyle(
-            'ApplicationTitle',
-            parent=styles['Heading1'],
-            fontSize=20,
-            spaceAfter=30,
-            textColor=colors.HexColor('#1e40af'),
-            alignment=1
-        )
-        
-        story.append(Paragraph("Application Form", title_style))
-        story.append(Spacer(1, 20))
-        
-        story.append(Paragraph("Personal Information", styles['Heading2']))
-        
-        personal_data = [
-            ['Name:', f"{application.name} {application.surname}"],
-            ['Age:', str(application.age)],
-            ['Country:', application.country],
-            ['Mobile:', application.mobile],
-            ['Email:', application.email]
-        ]
-        
-        for item in personal_data:
-            story.append(Paragraph(f"<b>{item[0]}</b> {item[1]}", styles['Normal']))
-            story.append(Spacer(1, 5))
-        
-        story.append(Spacer(1, 20))
-        
-        story.append(Paragraph("Course Application", styles['Heading2']))
-        story.append(Paragraph(f"<b>Course:</b> {application.course.title}", styles['Normal']))
-        story.append(Spacer(1, 10))
-        
-        if application.education_level or application.previous_school:
-            story.append(Paragraph("Educational Background", styles['Heading2']))
-            if application.education_level:
-                story.append(Paragraph(f"<b>Education Level:</b> {application.education_level}", styles['Normal']))
-            if application.previous_school:
-                story.append(Paragraph(f"<b>Previous School:</b> {application.previous_school}", styles['Normal']))
-            story.append(Spacer(1, 20))
-        
-        if application.qualification:
-            story.append(Paragraph("Qualifications", styles['Heading2']))
-            story.append(Paragraph(application.qualification, styles['Normal']))
-            story.append(Spacer(1, 20))
-        
-        if application.experience:
-            story.append(Paragraph("Experience", styles['Heading2']))
-            story.append(Paragraph(application.experience, styles['Normal']))
-            story.append(Spacer(1, 20))
-        
-        if application.message:
-            story.append(Paragraph("Application Message", styles['Heading2']))
-            story.append(Paragraph(application.message, styles['Normal']))
-            story.append(Spacer(1, 20))
-        
-        footer = Paragraph(
-            f"Application ID: {application.id} | Applied: {application.applied_date.strftime('%Y-%m-%d %H:%M')} | Status: {application.get_status_display()}",
-            ParagraphStyle('Footer', parent=styles['Normal'], fontSize=9, textColor=colors.gray)
-        )
-        story.append(footer)
-        
-        doc.build(story)
-        pdf_content = buffer.getvalue()
-        buffer.close()
-        
-        return pdf_content
\ No newline at end of file
+        return APPLICATION_FORM.render(application)
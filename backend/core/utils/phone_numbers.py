@@ -0,0 +1,90 @@
+"""
+E.164 normalisation for the countries applicants can pick (Application.COUNTRIES).
+
+A number is read as international when it starts with + or 00; otherwise the
+applicant's country decides the calling code and how a leading trunk 0 is
+dropped. Numbers that can't be made into a plausible E.164 number normalise
+to '' rather than to a guess.
+"""
+import re
+from functools import lru_cache
+
+DEFAULT_COUNTRY = 'South Africa'
+
+# Country -> (calling code, lengths of the national number, trunk prefix dialled before it)
+COUNTRY_RULES = {
+    'South Africa': ('27', (9,), '0'),
+    'Lesotho': ('266', (8,), ''),
+    'Botswana': ('267', (7, 8), ''),
+    'Eswatini': ('268', (8,), ''),
+    'Namibia': ('264', (8, 9), '0'),
+    'Zimbabwe': ('263', (9,), '0'),
+    'Mozambique': ('258', (8, 9), ''),
+    'Zambia': ('260', (9,), '0'),
+}
+# 'Other African Country' and 'International' have no rule: those numbers must carry
+# their calling code, or are taken as South African numbers dialled locally.
+
+_NON_DIGITS = re.compile(r'\D')
+E164_MAX_DIGITS = 15
+E164_MIN_DIGITS = 8
+
+
+def _with_code(digits, code, lengths):
+    if digits.startswith(code) and len(digits) - len(code) in lengths:
+        return '+' + digits
+    return ''
+
+
+def _national(digits, rule):
+    code, lengths, trunk = rule
+    if trunk and digits.startswith(trunk) and len(digits) - len(trunk) in lengths:
+        return f'+{code}{digits[len(trunk):]}'
+    if len(digits) in lengths and not (trunk and digits.startswith(trunk)):
+        return f'+{code}{digits}'
+    return ''
+
+
+@lru_cache(maxsize=4096)
+def normalize_phone(raw, country=DEFAULT_COUNTRY):
+    """``raw`` as an E.164 string ('+27821234567'), or '' when it isn't a usable number"""
+    raw = (raw or '').strip()
+    digits = _NON_DIGITS.sub('', raw)
+    if not digits:
+        return ''
+
+    if raw.startswith('+') or digits.startswith('00'):
+        if not raw.startswith('+'):
+            digits = digits[2:]
+        return '+' + digits if E164_MIN_DIGITS <= len(digits) <= E164_MAX_DIGITS else ''
+
+    rule = COUNTRY_RULES.get(country)
+    if rule:
+        number = _with_code(digits, rule[0], rule[1]) or _national(digits, rule)
+        if number:
+            return number
+
+    # Typed with a neighbouring country's code but no +, or a local South African number
+    for code, lengths, _ in COUNTRY_RULES.values():
+        number = _with_code(digits, code, lengths)
+        if number:
+            return number
+    return _national(digits, COUNTRY_RULES[DEFAULT_COUNTRY])
+
+
+def normalize_phones(numbers, countries=None):
+    """
+    Bulk mode for imports and backfills: normalise parallel sequences of
+    numbers and countries (default: South Africa for all). Repeated
+    (number, country) pairs are normalised once.
+    """
+    if countries is None:
+        countries = [DEFAULT_COUNTRY] * len(numbers)
+    seen = {}
+    results = []
+    for pair in zip(numbers, countries):
+        number = seen.get(pair)
+        if number is None:
+            number = seen[pair] = normalize_phone(pair[0] or '', pair[1] or DEFAULT_COUNTRY)
+        results.append(number)
+    return results
@@ -0,0 +1,15 @@
+def iter_chunks(queryset, chunk_size=100):
+    """
+    Yield the queryset as lists of at most ``chunk_size`` rows, one keyset
+    query per chunk, so no cursor stays open between chunks (while worker
+    processes fork, or while a batch is being sent).
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
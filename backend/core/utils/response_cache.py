@@ -0,0 +1,88 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from rest_framework import status
+from rest_framework.response import Response
+
+RESPONSE_KEY = 'core:response:{view}:{versions}:{url}'
+
+
+def _fresh_version():
+    # Never reuse a version number: after the table is reset (a restored
+    # database), entries cached under the old numbers must not become reachable again
+    return time.time_ns()
+
+
+def model_versions(models):
+    """
+    Current version number of each model, in order, from one query.
+
+    The versions live in the database (ModelVersion), not the cache, so a bump
+    in one gunicorn worker or in run_render_worker reaches every process even
+    with the per-process LocMemCache.
+    """
+    from core.models import ModelVersion
+
+    labels = [model._meta.label_lower for model in models]
+    found = dict(ModelVersion.objects.filter(label__in=labels).values_list('label', 'version'))
+    missing = [label for label in labels if label not in found]
+    if missing:
+        ModelVersion.objects.bulk_create(
+            [ModelVersion(label=label, version=_fresh_version()) for label in missing], ignore_conflicts=True,
+        )
+        found.update(ModelVersion.objects.filter(label__in=missing).values_list('label', 'version'))
+    return [found[label] for label in labels]
+
+
+def bump_model_version(model):
+    """Invalidate every cached response that depends on ``model``"""
+    from core.models import ModelVersion
+
+    label = model._meta.label_lower
+    if not ModelVersion.objects.filter(label=label).update(version=F('version') + 1):
+        ModelVersion.objects.bulk_create([ModelVersion(label=label, version=_fresh_version())], ignore_conflicts=True)
+
+
+class CachedResponseMixin:
+    """
+    Serve GET list/retrieve responses from the cache until a model they depend
+    on changes.
+
+    Entries are keyed by view, action, absolute URL (query string included) and
+    the version of every model in ``cache_models``; saving or deleting one of
+    those models bumps its version (see core.signals), so stale entries are
+    simply never looked up again and age out of the cache. Only the rendered
+    responses are cached; the versions are read from the database.
+    """
+    cache_models = ()
+
+    def get_cache_models(self):
+        return self.cache_models or (self.queryset.model,)
+
+    def get_response_cache_key(self, request):
+        versions = '.'.join(str(v) for v in model_versions(self.get_cache_models()))
+        url = hashlib.md5(request.build_absolute_uri().encode('utf-8')).hexdigest()
+        view = f'{self.__class__.__name__}.{self.action}'
+        return RESPONSE_KEY.format(view=view, versions=versions, url=url)
+
+    def cached_response(self, request, render):
+        """Return the cached response for this request, or call ``render`` and cache a 200"""
+        if request.method not in ('GET', 'HEAD'):
+            return render()
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = render()
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedResponseMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedResponseMixin, self).retrieve(request, *args, **kwargs))
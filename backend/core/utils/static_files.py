@@ -0,0 +1,377 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import threading
+
+from django.conf import settings
+from django.utils.http import http_date, parse_http_date_safe
+
+from .file_serving import parse_range_header, read_range
+
+try:
+    import brotli
+except ImportError:  # optional: gzip variants only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Encodings in order of preference, with the suffix of their precompressed sibling
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/javascript', 'application/json', 'application/xml',
+    'application/pdf', 'image/svg+xml',
+)
+MIN_COMPRESS_SIZE = 1024
+# A variant is only kept if it saves at least this fraction of the original
+MIN_COMPRESS_SAVING = 0.05
+HASH_LENGTH = 12
+CHUNK_SIZE = 64 * 2 ** 10
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class StaticFile:
+    """One indexed file and its precompressed variants"""
+    __slots__ = ('url', 'path', 'size', 'mtime_ns', 'content_type', 'digest', 'variants')
+
+    def __init__(self, url, path, size, mtime_ns, content_type, digest, variants):
+        self.url = url
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.content_type = content_type
+        self.digest = digest
+        # encoding -> (path, size)
+        self.variants = variants
+
+    @property
+    def last_modified(self):
+        return self.mtime_ns // 10 ** 9
+
+    def etag(self, encoding=None):
+        return f'"{self.digest[:16]}-{encoding}"' if encoding else f'"{self.digest[:16]}"'
+
+    def is_current(self):
+        """True while the file on disk is still the one that was indexed"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+
+def hashed_name(name, digest):
+    """``css/site.css`` -> ``css/site.<hash>.css``"""
+    root, ext = os.path.splitext(name)
+    return f'{root}.{digest[:HASH_LENGTH]}{ext}'
+
+
+def _sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _compressible(path, content_type, size):
+    return size >= MIN_COMPRESS_SIZE and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _write_variant(path, suffix, compress):
+    """Write ``path + suffix`` atomically; drop it if compression doesn't pay off"""
+    target = path + suffix
+    if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+        return
+    with open(path, 'rb') as handle:
+        data = handle.read()
+    compressed = compress(data)
+    if len(compressed) > len(data) * (1 - MIN_COMPRESS_SAVING):
+        if os.path.exists(target):
+            os.remove(target)
+        return
+    partial = f'{target}.{os.getpid()}.tmp'
+    with open(partial, 'wb') as handle:
+        handle.write(compressed)
+    os.replace(partial, target)
+
+
+def compress_file(path):
+    """Create (or refresh) the .gz and, when brotli is installed, .br siblings of ``path``"""
+    _write_variant(path, '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write_variant(path, '.br', lambda data: brotli.compress(data, quality=11))
+
+
+class StaticIndex:
+    """
+    In-memory map of URL path -> StaticFile for every file under the mounts.
+
+    Each file is reachable at its plain URL (short max-age, revalidated by
+    ETag) and at a content-hashed URL that never changes meaning, so it is
+    served with a far-future immutable Cache-Control.
+
+    Digests come from the manifest written by ``compress_static`` when the
+    file's size and mtime still match it; only new or changed files are
+    hashed, and nothing is compressed outside that command. Lookups stat the
+    file and re-index it if it was rewritten in place.
+    """
+
+    def __init__(self, mounts):
+        self.mounts = [(prefix.rstrip('/') + '/', str(root)) for prefix, root in mounts]
+        self.files = {}
+        self.hashed_urls = {}
+        self._lock = threading.Lock()
+
+    def build(self, compress=False, manifest=None):
+        manifest = manifest or {}
+        files, hashed_urls = {}, {}
+        suffixes = tuple(suffix for _, suffix in ENCODINGS)
+        for prefix, root in self.mounts:
+            if not os.path.isdir(root):
+                continue
+            for directory, _, names in os.walk(root):
+                for name in names:
+                    path = os.path.join(directory, name)
+                    if name.endswith(suffixes) and os.path.exists(path.rsplit('.', 1)[0]):
+                        continue  # precompressed sibling of an indexed file
+                    if name.endswith('.tmp'):
+                        continue
+                    relative = os.path.relpath(path, root).replace(os.sep, '/')
+                    url = prefix + relative
+                    entry = self._index_file(url, path, compress, manifest.get(url))
+                    hashed = hashed_name(url, entry.digest)
+                    files[url] = (entry, False)
+                    files[hashed] = (entry, True)
+                    hashed_urls[url] = hashed
+        self.files, self.hashed_urls = files, hashed_urls
+        logger.info(f"Static index: {len(hashed_urls)} files under {len(self.mounts)} mounts")
+        return self
+
+    def _index_file(self, url, path, compress, known=None):
+        stat = os.stat(path)
+        content_type, encoding = mimetypes.guess_type(path)
+        if content_type is None or encoding:
+            content_type = 'application/octet-stream'
+        if compress and _compressible(path, content_type, stat.st_size):
+            try:
+                compress_file(path)
+            except OSError as e:
+                logger.warning(f"Could not precompress {path}: {e}")
+        variants = {}
+        for encoding, suffix in ENCODINGS:
+            variant = path + suffix
+            if os.path.exists(variant) and os.stat(variant).st_mtime_ns >= stat.st_mtime_ns:
+                variants[encoding] = (variant, os.path.getsize(variant))
+        unchanged = known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns
+        return StaticFile(
+            url=url,
+            path=path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            content_type=content_type,
+            digest=known['digest'] if unchanged else _sha256(path),
+            variants=variants,
+        )
+
+    def _refresh(self, url):
+        """Re-index the file behind ``url`` after it was rewritten in place, or drop it once it is gone"""
+        with self._lock:
+            entry, _ = self.files.get(url, (None, None))
+            if entry is None or entry.is_current():
+                return
+            # The old hashed URL promised the old bytes forever: retire it
+            self.files.pop(self.hashed_urls.pop(url, None), None)
+            self.files.pop(url, None)
+            if not os.path.exists(entry.path):
+                return
+            fresh = self._index_file(url, entry.path, False)
+            hashed = hashed_name(url, fresh.digest)
+            self.files[url] = (fresh, False)
+            self.files[hashed] = (fresh, True)
+            self.hashed_urls[url] = hashed
+            logger.info(f"Static index: {url} changed on disk, re-indexed")
+
+    def lookup(self, url_path):
+        """(entry, immutable) for ``url_path``; a file changed on disk is re-indexed first"""
+        found = self.files.get(url_path)
+        if found is None or found[0].is_current():
+            return found
+        self._refresh(found[0].url)
+        # A hashed URL is only ever served with the bytes it was hashed from
+        return None if found[1] else self.files.get(url_path)
+
+    def url(self, url_path):
+        """Content-hashed URL for ``url_path``, or ``url_path`` itself when it isn't indexed"""
+        if self.lookup(url_path) is None:
+            return url_path
+        return self.hashed_urls.get(url_path, url_path)
+
+    def manifest(self):
+        """What ``compress_static`` writes: URL -> size, mtime and digest of the indexed file"""
+        return {
+            url: {'size': entry.size, 'mtime_ns': entry.mtime_ns, 'digest': entry.digest}
+            for url, (entry, immutable) in self.files.items() if not immutable
+        }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def default_mounts():
+    return getattr(settings, 'STATIC_LAYER_MOUNTS', [(settings.STATIC_URL, settings.STATIC_ROOT)])
+
+
+def manifest_path():
+    return getattr(settings, 'STATIC_LAYER_MANIFEST', os.path.join(settings.BASE_DIR, 'static-manifest.json'))
+
+
+def load_manifest(path=None):
+    path = path or manifest_path()
+    try:
+        with open(path, encoding='utf-8') as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        logger.warning(f"No static manifest at {path}; run compress_static. Hashing every file instead")
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable static manifest {path}: {e}")
+    return {}
+
+
+def write_manifest(index, path=None):
+    path = path or manifest_path()
+    partial = f'{path}.{os.getpid()}.tmp'
+    with open(partial, 'w', encoding='utf-8') as handle:
+        json.dump(index.manifest(), handle, indent=0, sort_keys=True)
+    os.replace(partial, path)
+    return path
+
+
+def get_static_index():
+    """The process-wide index, loaded from the manifest on first use"""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = StaticIndex(default_mounts()).build(manifest=load_manifest())
+    return _index
+
+
+def static_url(url_path):
+    """
+    Content-hashed (immutable) URL for a file served by the static layer, e.g.
+    ``/pdfs/...``; the plain path when the layer is off, since only it can
+    resolve hashed URLs.
+    """
+    if not getattr(settings, 'STATIC_LAYER_ENABLED', True):
+        return url_path
+    return get_static_index().url(url_path)
+
+
+def _accepted_encodings(environ):
+    accepted = set()
+    for item in environ.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _etag_matches(header, etags):
+    if header.strip() == '*':
+        return True
+    candidates = {tag.strip().removeprefix('W/') for tag in header.split(',')}
+    return bool(candidates & etags)
+
+
+class StaticFilesMiddleware:
+    """
+    WSGI layer serving indexed static files before Django is involved.
+
+    Picks the best precompressed variant the client accepts, answers
+    conditional requests with 304 and single byte ranges with 206, and hands
+    whole files to ``wsgi.file_wrapper`` so gunicorn can use sendfile.
+    Paths that aren't in the index fall through to the Django application.
+    """
+
+    def __init__(self, application, index=None):
+        self.application = application
+        self.index = index or get_static_index()
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '').encode('latin-1').decode('utf-8', 'replace')
+        found = self.index.lookup(path)
+        if found is None:
+            return self.application(environ, start_response)
+        return self.serve(environ, start_response, *found)
+
+    def serve(self, environ, start_response, entry, immutable):
+        method = environ['REQUEST_METHOD']
+        if method not in ('GET', 'HEAD'):
+            start_response('405 Method Not Allowed', [('Allow', 'GET, HEAD'), ('Content-Length', '0')])
+            return []
+
+        accepted = _accepted_encodings(environ) if not environ.get('HTTP_RANGE') else set()
+        encoding = next((coding for coding, _ in ENCODINGS if coding in entry.variants and coding in accepted), None)
+        file_path, size = entry.variants[encoding] if encoding else (entry.path, entry.size)
+        etag = entry.etag(encoding)
+
+        headers = [
+            ('ETag', etag),
+            ('Last-Modified', http_date(entry.last_modified)),
+            ('Cache-Control', IMMUTABLE_CACHE_CONTROL if immutable
+                else f"public, max-age={getattr(settings, 'STATIC_LAYER_MAX_AGE', 60)}"),
+            ('Access-Control-Allow-Origin', '*'),
+        ]
+        if entry.variants:
+            headers.append(('Vary', 'Accept-Encoding'))
+
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            not_modified = _etag_matches(if_none_match, {etag, entry.etag(), *(entry.etag(e) for e in entry.variants)})
+        else:
+            since = parse_http_date_safe(environ.get('HTTP_IF_MODIFIED_SINCE', ''))
+            not_modified = since is not None and entry.last_modified <= since
+        if not_modified:
+            start_response('304 Not Modified', headers)
+            return []
+
+        headers.append(('Content-Type', entry.content_type))
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        else:
+            headers.append(('Accept-Ranges', 'bytes'))
+
+        ranges = None
+        if encoding is None and method == 'GET':
+            ranges = parse_range_header(environ.get('HTTP_RANGE'), size)
+        if ranges == []:
+            start_response('416 Range Not Satisfiable', headers + [
+                ('Content-Range', f'bytes */{size}'), ('Content-Length', '0'),
+            ])
+            return []
+        if ranges and len(ranges) == 1:
+            first, last = ranges[0]
+            start_response('206 Partial Content', headers + [
+                ('Content-Range', f'bytes {first}-{last}/{size}'),
+                ('Content-Length', str(last - first + 1)),
+            ])
+            return read_range(file_path, first, last)
+
+        start_response('200 OK', headers + [('Content-Length', str(size))])
+        if method == 'HEAD':
+            return []
+        handle = open(file_path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(handle, CHUNK_SIZE)
+        return self._read_all(handle)
+
+    @staticmethod
+    def _read_all(handle):
+        with handle:
+            yield from iter(lambda: handle.read(CHUNK_SIZE), b'')
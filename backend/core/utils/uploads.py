@@ -0,0 +1,217 @@
+import hashlib
+import logging
+import mimetypes
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+
+logger = logging.getLogger(__name__)
+
+# Application fields whose uploads are streamed straight to storage
+APPLICATION_DOCUMENT_FIELDS = [
+    'id_document', 'matric_certificate', 'proof_of_payment',
+    'additional_doc_1', 'additional_doc_2',
+]
+
+
+PARTIAL_SUFFIX = '.part'
+
+
+class StreamedUploadedFile(UploadedFile):
+    """An upload that has already been written to storage, pending finalise() on commit"""
+
+    def __init__(self, storage, storage_name, name, content_type, size, charset,
+                 sha256, content_type_extra=None):
+        self.storage = storage
+        self.storage_name = storage_name
+        self.partial_name = storage_name + PARTIAL_SUFFIX
+        self.sha256 = sha256
+        self.finalised = False
+        # The handle is opened lazily so the upload can be copied along with request.data
+        super().__init__(
+            file=None,
+            name=name,
+            content_type=content_type,
+            size=size,
+            charset=charset,
+            content_type_extra=content_type_extra,
+        )
+
+    def open(self, mode='rb'):
+        if self.file is None or self.file.closed:
+            self.file = self.storage.open(self.storage_name if self.finalised else self.partial_name, mode)
+        else:
+            self.seek(0)
+        return self
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+    def finalise(self):
+        """Move the written bytes over the reserved name, making the document visible"""
+        if not self.finalised:
+            self.close()
+            os.replace(self.storage.path(self.partial_name), self.storage.path(self.storage_name))
+            self.finalised = True
+
+    def discard(self):
+        """Close the handle and remove the stored file and its reservation"""
+        self.close()
+        self.storage.delete(self.partial_name)
+        self.storage.delete(self.storage_name)
+
+
+class StreamingDocumentUploadHandler(FileUploadHandler):
+    """
+    Write application documents to storage chunk by chunk, hashing and
+    counting bytes on the way, so a request never holds a whole document in
+    memory. The final name is reserved up front and the bytes go to a
+    ``.part`` file beside it until finalise() runs on commit. Other file fields
+    fall through to the default handlers.
+    """
+    chunk_size = getattr(settings, 'DOCUMENT_UPLOAD_CHUNK_SIZE', 64 * 2 ** 10)
+
+    def __init__(self, request=None, model=None, fields=None, storage=None):
+        super().__init__(request)
+        if model is None:
+            from core.models import Application
+            model = Application
+        self.model = model
+        self.fields = set(fields or APPLICATION_DOCUMENT_FIELDS)
+        self.storage = storage or default_storage
+        self.stored = []
+        self._reset()
+
+    def _reset(self):
+        self.active = False
+        self.destination = None
+        self.storage_name = None
+        self.hasher = None
+        self.bytes_written = 0
+
+    def _supports_paths(self):
+        try:
+            self.storage.path('')
+        except NotImplementedError:
+            return False
+        return True
+
+    def _open_destination(self, field_name, file_name):
+        """Reserve a free name under the field's upload_to and open its partial file"""
+        field = self.model._meta.get_field(field_name)
+        name = field.generate_filename(None, file_name)
+        while True:
+            name = self.storage.get_available_name(name, max_length=field.max_length)
+            full_path = self.storage.path(name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+            try:
+                # An empty placeholder holds the name until the upload is finalised
+                os.close(os.open(full_path, flags, 0o666))
+            except FileExistsError:
+                # Another request claimed the name between the check and the open
+                continue
+            return name, open(full_path + PARTIAL_SUFFIX, 'wb')
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self._reset()
+        if field_name not in self.fields or not self._supports_paths():
+            return
+        self.storage_name, self.destination = self._open_destination(field_name, file_name)
+        self.hasher = hashlib.sha256()
+        self.active = True
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        self.hasher.update(raw_data)
+        self.destination.write(raw_data)
+        self.bytes_written += len(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.destination.close()
+        if settings.FILE_UPLOAD_PERMISSIONS is not None:
+            os.chmod(self.storage.path(self.storage_name + PARTIAL_SUFFIX), settings.FILE_UPLOAD_PERMISSIONS)
+        uploaded = StreamedUploadedFile(
+            storage=self.storage,
+            storage_name=self.storage_name,
+            name=self.file_name,
+            content_type=self.content_type,
+            size=self.bytes_written,
+            charset=self.charset,
+            sha256=self.hasher.hexdigest(),
+            content_type_extra=self.content_type_extra,
+        )
+        self.stored.append(uploaded)
+        logger.info(f"Streamed {self.field_name} to {self.storage_name} ({self.bytes_written} bytes, sha256 {uploaded.sha256})")
+        self._reset()
+        return uploaded
+
+    def upload_interrupted(self):
+        """Remove the partially written file when the client goes away"""
+        if self.active:
+            self.destination.close()
+            self.storage.delete(self.storage_name + PARTIAL_SUFFIX)
+            self.storage.delete(self.storage_name)
+            self._reset()
+
+    def finalise(self):
+        """Finalise every stored file; register with transaction.on_commit"""
+        for uploaded in self.stored:
+            uploaded.finalise()
+
+    def discard(self):
+        """Remove every file this handler stored, e.g. after a failed submission"""
+        self.upload_interrupted()
+        for uploaded in self.stored:
+            # Finalised files belong to a committed application
+            if not uploaded.finalised:
+                uploaded.discard()
+        self.stored = []
+
+
+def stored_file_names(files):
+    """Map field name -> storage name for uploads already written by the streaming handler"""
+    return {
+        field: file_obj.storage_name
+        for field, file_obj in files.items()
+        if isinstance(file_obj, StreamedUploadedFile)
+    }
+
+
+def _sha256(file_obj):
+    hasher = hashlib.sha256()
+    for chunk in file_obj.chunks():
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def document_metadata(file_obj, storage_name):
+    """Size, content type, SHA-256 and original filename persisted for a stored document"""
+    content_type = getattr(file_obj, 'content_type', None) or mimetypes.guess_type(storage_name)[0]
+    return {
+        'name': storage_name,
+        'original_name': os.path.basename(file_obj.name or storage_name),
+        'size': file_obj.size,
+        'content_type': content_type or 'application/octet-stream',
+        # Streamed uploads were hashed on the way in; anything else is read once here
+        'sha256': getattr(file_obj, 'sha256', None) or _sha256(file_obj),
+    }
+
+
+def stored_document_metadata(files):
+    """Map field name -> document metadata for uploads already written by the streaming handler"""
+    return {
+        field: document_metadata(file_obj, file_obj.storage_name)
+        for field, file_obj in files.items()
+        if isinstance(file_obj, StreamedUploadedFile)
+    }
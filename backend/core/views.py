@@ -1,19 +1,22 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny
+from rest_framework.exceptions import ValidationError
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from django.http import FileResponse, Http404
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseForbidden
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST, require_safe
 from django.conf import settings
-import os
-import mimetypes
+from django.utils import timezone
 
 from .models import (
     Course, CourseRequirement, Application, Student, 
     Newsletter, GalleryImage, NewsPost,
-    TeamMember, Testimonial, Video, DirectorMessage
+    TeamMember, Testimonial, Video, DirectorMessage, Broadcast
 )
 from .serializers import (
     CourseSerializer, CourseRequirementSerializer,
@@ -21,34 +24,43 @@ from .serializers import (
     StudentSerializer,
     NewsletterSerializer, GalleryImageSerializer,
     NewsPostSerializer, TeamMemberSerializer,
-    TestimonialSerializer, VideoSerializer, DirectorMessageSerializer
+    TestimonialSerializer, VideoSerializer, DirectorMessageSerializer,
+    BroadcastSerializer
 )
+from .pagination import ApplicationCursorPagination
+from .services.broadcasts import audience_size
+from .services.delivery_status import broadcast_delivery, record_status, valid_signature, with_delivery_status
+from .services.search import search_applications
+from .services.whatsapp_outbox import queue_status_messages
+from .services.stats import get_counters
+from .utils.conditional import ConditionalGetMixin
+from .utils.file_serving import serve_file
+from .utils.response_cache import CachedResponseMixin
+from .utils.static_files import static_url
+from .utils.uploads import StreamingDocumentUploadHandler, stored_document_metadata, stored_file_names
 
 # ========== DOCUMENT SERVING VIEW ==========
-@api_view(['GET'])
+@require_safe
 def serve_document(request, file_path):
-    """Serve document files with proper content disposition"""
-    # Construct the full file path
-    full_path = os.path.join(settings.MEDIA_ROOT, file_path)
-    
-    # Check if file exists
-    if not os.path.exists(full_path):
-        raise Http404("File does not exist")
-    
-    # Open the file
-    file_handle = open(full_path, 'rb')
-    
-    # Guess content type
-    content_type, encoding = mimetypes.guess_type(full_path)
-    if content_type is None:
-        content_type = 'application/octet-stream'
-    
-    # Create response
-    response = FileResponse(file_handle, content_type=content_type)
-    response['Content-Disposition'] = f'inline; filename="{os.path.basename(full_path)}"'
-    response['Content-Length'] = os.path.getsize(full_path)
-    
-    return response
+    """Serve document files with proper content disposition, byte ranges and validators"""
+    return serve_file(request, settings.MEDIA_ROOT, file_path)
+
+# ========== TWILIO WEBHOOKS ==========
+@csrf_exempt
+@require_POST
+def twilio_status_callback(request):
+    """Delivery status from Twilio; stored before answering, so a 204 means it was saved (see delivery_status)"""
+    if not valid_signature(request):
+        return HttpResponseForbidden('Invalid Twilio signature')
+    sid = request.POST.get('MessageSid') or request.POST.get('SmsSid')
+    message_status = request.POST.get('MessageStatus') or request.POST.get('SmsStatus')
+    if not sid or not message_status:
+        return HttpResponseBadRequest('MessageSid and MessageStatus are required')
+    record_status(
+        sid, message_status.lower(), error_code=request.POST.get('ErrorCode', ''),
+        to_number=request.POST.get('To', ''),
+    )
+    return HttpResponse(status=204)
 
 # ========== DEBUG VIEW ==========
 @api_view(['GET'])
@@ -69,11 +81,13 @@ def debug_courses(request):
     return Response(data)
 
 # ========== APPLICATION VIEWS ==========
-class ApplicationViewSet(viewsets.ModelViewSet):
+class ApplicationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Application.objects.all().order_by('-applied_date')
     serializer_class = ApplicationSerializer
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     permission_classes = [AllowAny]
+    pagination_class = ApplicationCursorPagination
+    related_validator_fields = ('course__updated_at',)
     
     def get_serializer_class(self):
         """Return different serializers based on action"""
@@ -104,20 +118,19 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             elif fee_verified.lower() == 'false':
                 queryset = queryset.filter(fee_verified=False)
         
-        # Search by name, email, or mobile
+        # Full-text search by name, email, ID number, course or mobile prefix, ranked by relevance
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(surname__icontains=search) |
-                Q(email__icontains=search) |
-                Q(mobile__icontains=search)
-            )
+            queryset = search_applications(queryset, search)
         
         return queryset
     
     def create(self, request, *args, **kwargs):
         """Create a new application with file uploads - FIXED"""
+        # Stream documents straight to storage instead of buffering them in memory
+        upload_handler = StreamingDocumentUploadHandler(request)
+        request.upload_handlers.insert(0, upload_handler)
+        
         try:
             print("=" * 60)
             print("📝 RECEIVING APPLICATION SUBMISSION")
@@ -138,36 +151,6 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                 
                 # Set form_course_id for the serializer
                 data['form_course_id'] = course_id_value
-                
-                # Also try to directly map to a Course object
-                course_mapping = {
-                    'automotive_engine_repairer': 'Automotive Engine Repairer',
-                    'automotive_clutch_brake_repairer': 'Automotive Clutch and Brake Repairer',
-                    'automotive_suspension_fitter': 'Automotive Suspension Fitter',
-                    'automotive_workshop_assistant': 'Automotive Workshop Assistant',
-                }
-                
-                if course_id_value in course_mapping:
-                    course_title = course_mapping[course_id_value]
-                    try:
-                        # Try contains first
-                        course = Course.objects.filter(title__icontains=course_title).first()
-                        
-                        # If not found, try exact match
-                        if not course:
-                            course = Course.objects.filter(title=course_title).first()
-                        
-                        if course:
-                            data['course'] = course.id
-                            print(f"✅ SUCCESS: Mapped course: {course.title} (ID: {course.id})")
-                        else:
-                            print(f"⚠️ WARNING: Course not found for title: {course_title}")
-                            
-                            # List all available courses for debugging
-                            all_courses = Course.objects.all()
-                            print(f"📚 Available courses: {[c.title for c in all_courses]}")
-                    except Exception as e:
-                        print(f"❌ Error finding course: {e}")
             
             # Also check for 'course' field
             elif 'course' in data and isinstance(data['course'], str):
@@ -178,20 +161,19 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             serializer = self.get_serializer(data=data, context={'request': request})
             
             if serializer.is_valid():
-                # Save application
-                application = serializer.save()
+                # Streamed documents are already in storage; save their names and metadata so they aren't read again
+                stored_names = stored_file_names(files)
                 
-                # Handle file uploads
-                file_fields = ['id_document', 'matric_certificate', 'proof_of_payment', 
-                             'additional_doc_1', 'additional_doc_2']
+                # Persist the row and its document references in a single INSERT,
+                # and only move the streamed documents into place once it commits
+                with transaction.atomic():
+                    application = serializer.save(
+                        document_metadata=stored_document_metadata(files), **stored_names
+                    )
+                    transaction.on_commit(upload_handler.finalise)
                 
-                for field in file_fields:
-                    if field in files:
-                        file_obj = files[field]
-                        setattr(application, field, file_obj)
-                        print(f"📎 Attached {field}: {file_obj.name}")
-                
-                application.save()
+                for field, file_obj in files.items():
+                    print(f"📎 Attached {field}: {file_obj.name}")
                 
                 # Return response
                 response_serializer = ApplicationDetailSerializer(
@@ -215,6 +197,7 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                 }, status=status.HTTP_201_CREATED)
             else:
                 print("❌ Serializer errors:", serializer.errors)
+                upload_handler.discard()
                 return Response({
                     'error': 'Validation failed',
                     'details': serializer.errors
@@ -222,6 +205,7 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                 
         except Exception as e:
             print(f"❌ Error creating application: {str(e)}")
+            upload_handler.discard()
             import traceback
             traceback.print_exc()
             return Response({
@@ -243,20 +227,26 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     def approve(self, request, pk=None):
         """Approve an application"""
         application = self.get_object()
-        application.status = 'approved'
-        application.save()
-        
-        # Create student record if approved
-        if not hasattr(application, 'student_record'):
-            Student.objects.create(
-                application=application,
-                name=application.name,
-                surname=application.surname,
-                email=application.email,
-                phone=application.mobile,
-                course=application.course,
-                address=application.address
-            )
+        notify = application.status != 'approved'
+        with transaction.atomic():
+            application.status = 'approved'
+            application.save()
+            
+            # Create student record if approved
+            if not hasattr(application, 'student_record'):
+                Student.objects.create(
+                    application=application,
+                    name=application.name,
+                    surname=application.surname,
+                    email=application.email,
+                    phone=application.mobile,
+                    course=application.course,
+                    address=application.address
+                )
+            
+            # Sent by the outbox worker, so the response never waits on Twilio
+            if notify:
+                queue_status_messages([application])
         
         return Response({
             'message': 'Application approved successfully',
@@ -267,9 +257,13 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     def reject(self, request, pk=None):
         """Reject an application"""
         application = self.get_object()
-        application.status = 'rejected'
-        application.rejection_reason = request.data.get('reason', '')
-        application.save()
+        notify = application.status != 'rejected'
+        with transaction.atomic():
+            application.status = 'rejected'
+            application.rejection_reason = request.data.get('reason', '')
+            application.save()
+            if notify:
+                queue_status_messages([application])
         
         return Response({
             'message': 'Application rejected successfully',
@@ -277,6 +271,16 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             'reason': application.rejection_reason
         })
     
+    @action(detail=True, methods=['get'])
+    def notifications(self, request, pk=None):
+        """WhatsApp messages queued for an application, with the delivery status Twilio reported"""
+        application = self.get_object()
+        messages = with_delivery_status(application.whatsapp_messages.order_by('created_at')).values(
+            'id', 'kind', 'status', 'attempts', 'twilio_sid', 'last_error', 'created_at', 'sent_at',
+            'delivery_status', 'delivery_error',
+        )
+        return Response(list(messages))
+    
     @action(detail=True, methods=['patch'])
     def verify_fee(self, request, pk=None):
         """Verify payment fee"""
@@ -303,7 +307,7 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def pending(self, request):
-        """Get all pending applications"""
+        """Get all pending applications, as a plain list; ?status=pending on the list is the paginated form"""
         queryset = Application.objects.filter(status='pending').order_by('-applied_date')
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
@@ -311,22 +315,17 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get application statistics"""
-        total = Application.objects.count()
-        pending = Application.objects.filter(status='pending').count()
-        approved = Application.objects.filter(status='approved').count()
-        rejected = Application.objects.filter(status='rejected').count()
-        fee_verified = Application.objects.filter(fee_verified=True).count()
-        
+        counters = get_counters()
         return Response({
-            'total': total,
-            'pending': pending,
-            'approved': approved,
-            'rejected': rejected,
-            'fee_verified': fee_verified,
+            'total': counters['total'],
+            'pending': counters['pending'],
+            'approved': counters['approved'],
+            'rejected': counters['rejected'],
+            'fee_verified': counters['fee_verified'],
         })
 
 # ========== COURSE VIEWS ==========
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Course.objects.all().order_by('display_order', '-created_at')
     serializer_class = CourseSerializer
     permission_classes = [AllowAny]
@@ -361,7 +360,7 @@ class NewsletterViewSet(viewsets.ModelViewSet):
     serializer_class = NewsletterSerializer
     permission_classes = [AllowAny]
 
-class GalleryImageViewSet(viewsets.ModelViewSet):
+class GalleryImageViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = GalleryImage.objects.filter(is_active=True)
     serializer_class = GalleryImageSerializer
     parser_classes = [MultiPartParser, FormParser]
@@ -373,7 +372,7 @@ class GalleryImageViewSet(viewsets.ModelViewSet):
         context['request'] = self.request
         return context
 
-class NewsPostViewSet(viewsets.ModelViewSet):
+class NewsPostViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = NewsPost.objects.all().order_by('-created_at')
     serializer_class = NewsPostSerializer
     parser_classes = [JSONParser, MultiPartParser, FormParser]
@@ -391,7 +390,7 @@ class NewsPostViewSet(viewsets.ModelViewSet):
         context['request'] = self.request
         return context
 
-class TeamMemberViewSet(viewsets.ModelViewSet):
+class TeamMemberViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = TeamMember.objects.filter(is_active=True).order_by('order')
     serializer_class = TeamMemberSerializer
     parser_classes = [MultiPartParser, FormParser]
@@ -403,12 +402,14 @@ class TeamMemberViewSet(viewsets.ModelViewSet):
         context['request'] = self.request
         return context
 
-class TestimonialViewSet(viewsets.ModelViewSet):
+class TestimonialViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Testimonial.objects.all()
     serializer_class = TestimonialSerializer
     permission_classes = [AllowAny]
+    cache_models = (Testimonial, Course)
+    related_validator_fields = ('course__updated_at',)
 
-class VideoViewSet(viewsets.ModelViewSet):
+class VideoViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Video.objects.filter(is_active=True).order_by('-created_at')
     serializer_class = VideoSerializer
     parser_classes = [MultiPartParser, FormParser]
@@ -420,7 +421,7 @@ class VideoViewSet(viewsets.ModelViewSet):
         context['request'] = self.request
         return context
 
-class DirectorMessageViewSet(viewsets.ModelViewSet):
+class DirectorMessageViewSet(ConditionalGetMixin, CachedResponseMixin, viewsets.ModelViewSet):
     queryset = DirectorMessage.objects.all().order_by('-created_at')
     serializer_class = DirectorMessageSerializer
     parser_classes = [MultiPartParser, FormParser, JSONParser]
@@ -434,20 +435,65 @@ class DirectorMessageViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def active(self, request):
-        message = DirectorMessage.objects.filter(is_active=True).first()
-        if message:
-            serializer = self.get_serializer(message, context={'request': request})
-            return Response(serializer.data)
-        return Response({})
+        def render():
+            message = DirectorMessage.objects.filter(is_active=True).first()
+            if message:
+                serializer = self.get_serializer(message, context={'request': request})
+                return Response(serializer.data)
+            return Response({})
+        return self.cached_response(request, render)
     
     def create(self, request, *args, **kwargs):
-        DirectorMessage.objects.filter(is_active=True).update(is_active=False)
+        DirectorMessage.objects.filter(is_active=True).update(is_active=False, updated_at=timezone.now())
         
         serializer = self.get_serializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+class BroadcastViewSet(viewsets.ModelViewSet):
+    """Staff only: a broadcast messages every applicant or student, at Twilio's cost"""
+    queryset = Broadcast.objects.select_related('course')
+    serializer_class = BroadcastSerializer
+    # Signed in through the Django admin
+    authentication_classes = [SessionAuthentication]
+    permission_classes = [IsAdminUser]
+    
+    def perform_update(self, serializer):
+        if serializer.instance.status != 'draft':
+            raise ValidationError({'status': 'Only draft broadcasts can be edited.'})
+        serializer.save()
+    
+    @action(detail=True, methods=['get'])
+    def audience(self, request, pk=None):
+        """How many contacts, emails and WhatsApp numbers the broadcast would reach"""
+        return Response(audience_size(self.get_object()))
+    
+    @action(detail=True, methods=['get'])
+    def delivery(self, request, pk=None):
+        """Recipients per channel and delivery state (Twilio's latest report for WhatsApp)"""
+        broadcast = self.get_object()
+        return Response({'id': broadcast.id, 'status': broadcast.status, 'channels': broadcast_delivery(broadcast)})
+    
+    @action(detail=True, methods=['post'])
+    def send(self, request, pk=None):
+        """Queue the broadcast; run_broadcasts does the sending"""
+        broadcast = self.get_object()
+        if not Broadcast.objects.filter(pk=broadcast.pk, status='draft').update(status='queued'):
+            return Response({'error': f'Broadcast is already {broadcast.status}'}, status=status.HTTP_409_CONFLICT)
+        broadcast.refresh_from_db()
+        return Response(self.get_serializer(broadcast).data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Stop a broadcast that hasn't finished; recipients already messaged stay messaged"""
+        broadcast = self.get_object()
+        if not Broadcast.objects.filter(pk=broadcast.pk, status__in=['draft', 'queued', 'sending']).update(
+                status='cancelled', finished_at=timezone.now()):
+            return Response({'error': f'Broadcast is already {broadcast.status}'}, status=status.HTTP_409_CONFLICT)
+        broadcast.refresh_from_db()
+        return Response(self.get_serializer(broadcast).data)
+
 # Simple view to get PDF URL
 @api_view(['GET'])
 def get_course_pdf(request, course_id):
@@ -458,7 +504,7 @@ def get_course_pdf(request, course_id):
         return Response({"error": "No PDF available for this course"}, status=404)
     
     pdf_filename = course.course_pdf_url.split('/')[-1]
-    pdf_url = f"http://localhost:8000/pdfs/course-outlines/{pdf_filename}"
+    pdf_url = f"http://localhost:8000{static_url(f'/pdfs/course-outlines/{pdf_filename}')}"
     
     return Response({"pdf_url": pdf_url})
 
@@ -466,16 +512,11 @@ def get_course_pdf(request, course_id):
 @api_view(['GET'])
 def dashboard_stats(request):
     """Get dashboard statistics"""
-    total_applications = Application.objects.count()
-    pending_applications = Application.objects.filter(status='pending').count()
-    approved_applications = Application.objects.filter(status='approved').count()
-    total_students = Student.objects.count()
-    active_courses = Course.objects.filter(is_active=True).count()
-    
+    counters = get_counters()
     return Response({
-        'total_applications': total_applications,
-        'pending_applications': pending_applications,
-        'approved_applications': approved_applications,
-        'total_students': total_students,
-        'active_courses': active_courses,
+        'total_applications': counters['total'],
+        'pending_applications': counters['pending'],
+        'approved_applications': counters['approved'],
+        'total_students': counters['students'],
+        'active_courses': counters['active_courses'],
     })
\ No newline at end of file
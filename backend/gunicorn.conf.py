@@ -0,0 +1,13 @@
+"""Gunicorn hooks, read from the directory the Procfile starts gunicorn in"""
+
+
+def worker_exit(server, worker):
+    """Write the delivery statuses this worker still has buffered before it goes"""
+    from core.services.delivery_status import status_buffer
+
+    try:
+        written = status_buffer.flush()
+        if written:
+            server.log.info(f"Flushed {written} buffered delivery statuses on exit")
+    except Exception:
+        server.log.exception("Lost buffered delivery statuses on exit")
@@ -35,6 +35,8 @@ account_sid = os.environ.get('TWILIO_ACCOUNT_SID')
 auth_token = os.environ.get('TWILIO_AUTH_TOKEN')
 from_number = os.environ.get('TWILIO_WHATSAPP_NUMBER', 'whatsapp:+14155238886')
 template_sid = os.environ.get('TWILIO_ORDER_TEMPLATE_SID', 'HX350d429d32e64a552466cafece95f3c')
+# Set to a fake server (python manage.py run_fake_twilio) to try this without the real API
+api_base_url = os.environ.get('TWILIO_API_BASE_URL', '')
 
 # Your test number - Zimbabwe
 to_number = "whatsapp:+263773074487"
@@ -45,6 +47,7 @@ print(f"   Auth Token: {'✅ SET' if auth_token else '❌ NOT SET'}")
 print(f"   From: {from_number}")
 print(f"   To: {to_number}")
 print(f"   Template SID: {template_sid}")
+print(f"   API: {api_base_url or 'https://api.twilio.com'}")
 print("-" * 60)
 
 # Check if credentials are set
@@ -57,7 +60,11 @@ if not account_sid or not auth_token:
 
 try:
     # Initialize Twilio client
-    client = Client(account_sid, auth_token)
+    if api_base_url:
+        from core.services.http_clients import PooledTwilioHttpClient, new_session
+        client = Client(account_sid, auth_token, http_client=PooledTwilioHttpClient(new_session(pool_size=1), base_url=api_base_url))
+    else:
+        client = Client(account_sid, auth_token)
     
     # Student details for the message
     student_name = "Brian Dube"
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 
 // Define types for the application
 interface Application {
@@ -26,6 +26,14 @@ interface Application {
   };
 }
 
+// Cursor-paginated list response from GET /applications/
+interface ApplicationPage {
+  next: string | null;
+  previous: string | null;
+  page_size: number;
+  results: Application[];
+}
+
 interface ApplicationDocuments {
   id_document: {
     url: string;
@@ -59,7 +67,9 @@ const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api'
 
 const AdminApplications: React.FC = () => {
   const [applications, setApplications] = useState<Application[]>([]);
+  const [nextPageUrl, setNextPageUrl] = useState<string | null>(null);
   const [loading, setLoading] = useState<boolean>(true);
+  const [loadingMore, setLoadingMore] = useState<boolean>(false);
   const [selectedApp, setSelectedApp] = useState<Application | null>(null);
   const [documentUrls, setDocumentUrls] = useState<ApplicationDocuments | null>(null);
   const [processing, setProcessing] = useState<number | null>(null);
@@ -72,39 +82,84 @@ const AdminApplications: React.FC = () => {
     feeVerified: 0
   });
 
+  // Only the latest list request may update the list, so a slow response can't land on another tab
+  const listRequest = useRef(0);
+
+  // Each tab is filtered by the API and starts again from the first page
   useEffect(() => {
     fetchApplications();
-  }, []);
+  }, [filter]);
 
-  useEffect(() => {
-    calculateStats();
-  }, [applications]);
-
-  const calculateStats = () => {
-    const total = applications.length;
-    const pending = applications.filter(app => app.status === 'pending').length;
-    const approved = applications.filter(app => app.status === 'approved').length;
-    const rejected = applications.filter(app => app.status === 'rejected').length;
-    const feeVerified = applications.filter(app => app.fee_verified).length;
-    
-    setStats({ total, pending, approved, rejected, feeVerified });
+  // Counts come from the server because the list only holds the pages loaded so far
+  const fetchStats = async () => {
+    try {
+      const response = await fetch(`${API_BASE_URL}/applications/stats/`);
+      if (response.ok) {
+        const data = await response.json();
+        setStats({
+          total: data.total,
+          pending: data.pending,
+          approved: data.approved,
+          rejected: data.rejected,
+          feeVerified: data.fee_verified
+        });
+      }
+    } catch (error) {
+      console.error('Error fetching application stats:', error);
+    }
+  };
+
+  // Update a single application in place instead of re-fetching the whole list
+  const updateApplication = (appId: number, changes: Partial<Application>) => {
+    setApplications(prev => prev.map(app => (app.id === appId ? { ...app, ...changes } : app)));
+    fetchStats();
   };
 
   const fetchApplications = async () => {
+    const request = ++listRequest.current;
     try {
       setLoading(true);
-      const response = await fetch(`${API_BASE_URL}/applications/`);
+      setNextPageUrl(null);
+      fetchStats();
+      const query = filter === 'all' ? '' : `?status=${filter}`;
+      const response = await fetch(`${API_BASE_URL}/applications/${query}`);
+      if (request !== listRequest.current) return;
       if (response.ok) {
-        const data: Application[] = await response.json();
-        console.log('Fetched applications:', data.length);
-        setApplications(data);
+        const data: ApplicationPage = await response.json();
+        if (request !== listRequest.current) return;
+        console.log('Fetched applications:', data.results.length);
+        setApplications(data.results);
+        setNextPageUrl(data.next);
       } else {
         console.error('Failed to fetch applications:', response.status);
       }
     } catch (error) {
       console.error('Error fetching applications:', error);
     } finally {
-      setLoading(false);
+      if (request === listRequest.current) {
+        setLoading(false);
+      }
+    }
+  };
+
+  const loadMoreApplications = async () => {
+    if (!nextPageUrl) return;
+    const request = listRequest.current;
+    try {
+      setLoadingMore(true);
+      const response = await fetch(nextPageUrl);
+      if (response.ok) {
+        const data: ApplicationPage = await response.json();
+        if (request !== listRequest.current) return;
+        setApplications(prev => [...prev, ...data.results]);
+        setNextPageUrl(data.next);
+      } else {
+        console.error('Failed to fetch more applications:', response.status);
+      }
+    } catch (error) {
+      console.error('Error fetching more applications:', error);
+    } finally {
+      setLoadingMore(false);
     }
   };
 
@@ -207,7 +262,7 @@ const AdminApplications: React.FC = () => {
             alert(`✅ ${result.message || 'Application approved successfully!'}`);
           }
           
-          fetchApplications(); // Refresh the list
+          updateApplication(appId, { status: 'approved' });
           if (selectedApp?.id === appId) {
             setSelectedApp(null);
             setDocumentUrls(null);
@@ -242,7 +297,7 @@ const AdminApplications: React.FC = () => {
         if (response.ok) {
           const result = await response.json();
           alert(`❌ ${result.message || 'Application rejected.'}`);
-          fetchApplications(); // Refresh the list
+          updateApplication(appId, { status: 'rejected' });
           if (selectedApp?.id === appId) {
             setSelectedApp(null);
             setDocumentUrls(null);
@@ -272,7 +327,7 @@ const AdminApplications: React.FC = () => {
       if (response.ok) {
         const result = await response.json();
         alert(`💰 ${result.message || 'Fee verified successfully!'}`);
-        fetchApplications(); // Refresh the list
+        updateApplication(appId, { fee_verified: true });
       } else {
         alert('Failed to verify fee. Please try again.');
       }
@@ -319,6 +374,7 @@ const AdminApplications: React.FC = () => {
     }
   };
 
+  // The API already filtered the list; this drops rows approved or rejected since, until the next fetch
   const getFilteredApplications = () => {
     if (filter === 'all') return applications;
     return applications.filter(app => app.status === filter);
@@ -834,6 +890,18 @@ const AdminApplications: React.FC = () => {
           ))
         )}
       </div>
+
+      {nextPageUrl && (
+        <div className="flex justify-center">
+          <button 
+            onClick={loadMoreApplications}
+            disabled={loadingMore}
+            className="px-6 py-2 bg-white/5 hover:bg-white/10 disabled:opacity-50 disabled:cursor-not-allowed text-gray-300 rounded-lg text-sm font-bold transition-all"
+          >
+            {loadingMore ? 'Loading...' : 'Load More Applications'}
+          </button>
+        </div>
+      )}
     </div>
   );
 };
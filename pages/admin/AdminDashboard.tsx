@@ -28,7 +28,7 @@ const AdminDashboard: React.FC = () => {
       setLoading(true);
       
       const [appsResponse, studentsResponse, statsResponse] = await Promise.all([
-        fetch(`${API_BASE_URL}/applications/?limit=3`),
+        fetch(`${API_BASE_URL}/applications/?page_size=3`),
         fetch(`${API_BASE_URL}/students/`),
         fetch(`${API_BASE_URL}/applications/stats/`)
       ]);